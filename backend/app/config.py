@@ -8,8 +8,129 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     DEBUG: bool = False
 
+    # Issue category classifier
+    CLASSIFIER_MODEL_PATH: str = os.path.join(os.path.dirname(__file__), "routers", "model_new.h5")
+    CLASSIFIER_ENCODER_NAME: str = "roberta-base"
+    CLASSIFIER_MAX_LENGTH: int = 128
+    CLASSIFIER_VARIANT: str = "base"  # "base" (RoBERTa-base + model_new.h5) or "distilled" (distill_classifier.py output)
+    CLASSIFIER_BACKEND: str = "keras"  # "keras" (PyTorch encoder + NumPy head) or "onnx" (ONNX Runtime)
+    CLASSIFIER_ONNX_PATH: str = os.path.join(os.path.dirname(__file__), "routers", "onnx", "classifier.int8.onnx")
+    CLASSIFIER_DISTILLED_PATH: str = os.path.join(os.path.dirname(__file__), "routers", "distilled")
+    CLASSIFIER_DISTILLED_ONNX_PATH: str = os.path.join(os.path.dirname(__file__), "routers", "distilled", "onnx", "classifier.int8.onnx")
+    CLASSIFIER_ONNX_THREADS: int = 0  # 0 lets ONNX Runtime pick the intra-op thread count
+    CLASSIFIER_PRELOAD: bool = True  # Load and warm up the classifier when the app starts
+    CLASSIFIER_BATCHING_ENABLED: bool = True  # Micro-batch concurrent classification requests
+    CLASSIFIER_BATCH_MAX_SIZE: int = 32
+    CLASSIFIER_BATCH_MAX_WAIT_MS: float = 10.0
+    CLASSIFIER_BATCH_TIMEOUT_SECONDS: float = 30.0
+    CLASSIFIER_POOL_ENABLED: bool = False  # Run the classifier in dedicated worker processes instead of the web process
+    CLASSIFIER_POOL_WORKERS: int = 2
+    CLASSIFIER_POOL_THREADS_PER_WORKER: int = 2  # torch / ONNX Runtime intra-op threads in each worker
+    CLASSIFIER_POOL_MAX_BATCH: int = 32  # Descriptions per call; sizes the shared-memory buffers
+    CLASSIFIER_POOL_TIMEOUT_SECONDS: float = 30.0  # A worker slower than this is killed and restarted
+    CLASSIFIER_POOL_START_TIMEOUT_SECONDS: float = 600.0  # Model download + load in a fresh worker
+    REQUEST_LOG_ENABLED: bool = True  # One JSON line per traced request (create_issue) with per-stage timings
+    CLASSIFIER_REGISTRY_ENABLED: bool = False  # Serve versioned models from CLASSIFIER_REGISTRY_DIR with hot reload
+    CLASSIFIER_REGISTRY_DIR: str = os.path.join(os.path.dirname(__file__), "routers", "models")
+    CLASSIFIER_REGISTRY_POLL_SECONDS: float = 5.0  # How often registry.json is checked for a new primary/shadow
+    CLASSIFIER_SHADOW_QUEUE_SIZE: int = 256  # Batches waiting for the shadow model; extra batches are not compared
+    CLASSIFIER_SHADOW_LOG_EVERY: int = 100  # Log shadow agreement and latency every N compared items
+
+    # Persist the [CLS] embedding of each issue description (issue_embeddings table)
+    EMBEDDINGS_ENABLED: bool = True
+
+    # Semantic duplicate detection: cosine similarity of description embeddings inside the geo window
+    SEMANTIC_DUPLICATES_ENABLED: bool = False
+    SEMANTIC_DUPLICATE_THRESHOLD: float = 0.97  # Candidate in the same category
+    SEMANTIC_DUPLICATE_CROSS_CATEGORY_THRESHOLD: float = 0.985  # Candidate filed under another category
+
+    # LLM enrichment of new issues
+    AI_ENRICHMENT_MODE: str = "separate"  # "separate" (spam, priority, radius prompts) or "combined" (one call)
+
+    # Concurrent AI stages in create_issue, each with its own deadline in seconds
+    AI_PIPELINE_MAX_WORKERS: int = 16
+    AI_STAGE_TIMEOUT_SPAM: float = 20.0
+    AI_STAGE_TIMEOUT_CATEGORY: float = 30.0
+    AI_STAGE_TIMEOUT_PRIORITY: float = 20.0
+    AI_STAGE_TIMEOUT_RADIUS: float = 20.0
+    AI_STAGE_TIMEOUT_ENRICHMENT: float = 30.0
+
+    # Local spam pre-filter: decides clear-cut descriptions without the LLM spam check
+    SPAM_FILTER_ENABLED: bool = True
+    SPAM_FILTER_HAM_DATASET: str = ""  # Civic complaints CSV (text column); default model/dataset_cleaned.csv
+    SPAM_FILTER_SPAM_THRESHOLD: float = 0.99  # Model spam probability at or above which a report is rejected locally
+    SPAM_FILTER_LOCAL_HAM: bool = False  # Skip the LLM spam check for confident local "ham"; off, only local rejections
+    SPAM_FILTER_HAM_THRESHOLD: float = 0.01  # At or below which the LLM spam check is skipped (SPAM_FILTER_LOCAL_HAM)
+    SPAM_FILTER_MIN_TOKENS: int = 5
+    SPAM_FILTER_USER_MAX_REPORTS: int = 10  # Per user within the window
+    SPAM_FILTER_USER_WINDOW_SECONDS: float = 600.0
+
+    # Near-identical descriptions (MinHash LSH over recent open issues) are duplicates without any model or LLM call
+    NEAR_DUPLICATES_ENABLED: bool = True
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8  # Estimated Jaccard similarity of word 3-gram shingles
+    NEAR_DUPLICATE_NUM_PERM: int = 64  # MinHash signature length
+    NEAR_DUPLICATE_BANDS: int = 16  # LSH bands; NUM_PERM must be a multiple
+    NEAR_DUPLICATE_MIN_WORDS: int = 8  # Shorter descriptions are too generic to match on text alone
+    NEAR_DUPLICATE_MAX_DISTANCE_M: float = 2000.0  # 0 matches anywhere in the district
+    NEAR_DUPLICATE_WINDOW_DAYS: int = 30
+    NEAR_DUPLICATE_MAX_ENTRIES: int = 50000
+
+    # Reporter reputation: trusted reporters do not wait for the LLM spam check
+    REPUTATION_ENABLED: bool = False  # Changes who gets the inline spam check, so opt-in
+    REPUTATION_SPAM_CHECK: str = "defer"  # "defer" (checked in the background after the issue is stored) or "skip"
+    REPUTATION_MIN_REPORTS: int = 5  # Accepted or rejected reports before a user can be trusted
+    REPUTATION_TRUST_THRESHOLD: float = 0.85  # Smoothed acceptance rate
+    REPUTATION_VOTE_WEIGHT: float = 0.25  # Per vote from other users on accepted reports
+    REPUTATION_CACHE_TTL_SECONDS: float = 900.0
+    REPUTATION_REFRESH_SECONDS: float = 300.0  # Reputations read since the last pass are recomputed this often
+    REPUTATION_CACHE_MAX_ENTRIES: int = 10000
+
+    # Store issues immediately with a keyword-based guess and run the AI stages in the background
+    AI_ENRICHMENT_ASYNC: bool = False
+    AI_ENRICHMENT_WORKERS: int = 2
+
+    # Cache of LLM answers keyed by normalized query + system prompt hash
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 2048
+    LLM_CACHE_MEMORY_TTL_SECONDS: int = 3600
+    LLM_CACHE_DB_ENABLED: bool = True
+    LLM_CACHE_DB_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # g4f.Provider names tried in order; each has a circuit breaker that skips it while it is failing or slow
+    LLM_PROVIDERS: str = "Blackbox"  # Comma-separated failover list
+    LLM_BREAKER_WINDOW: int = 20  # Recent calls per provider the thresholds are computed over
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_ERROR_RATE: float = 0.5
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    LLM_BREAKER_SLOW_RATE: float = 0.8
+    LLM_BREAKER_OPEN_SECONDS: float = 30.0
+
+    # Outbound LLM calls: concurrent slots, bounded wait queue, 503 + Retry-After when saturated
+    LLM_MAX_CONCURRENT_CALLS: int = 8
+    LLM_MAX_QUEUED_CALLS: int = 32
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    LLM_DEGRADABLE_QUEUE_TIMEOUT_SECONDS: float = 1.0  # Calls with a default answer (priority, radius) give up sooner
+    LLM_RETRY_AFTER_SECONDS: int = 5
+
+    # Concurrent identical LLM queries share one upstream call
+    LLM_SINGLEFLIGHT_ENABLED: bool = True
+    LLM_SINGLEFLIGHT_WAIT_SECONDS: float = 60.0  # A waiter past this makes its own call
+
+    # Answer LLM calls from the local fake provider (tests, load tests, offline development)
+    LLM_FAKE_ENABLED: bool = False
+    LLM_FAKE_TOKEN_DELAY_MS: float = 20.0
+    LLM_FAKE_LATENCY_DISTRIBUTION: str = "constant"  # "constant", "uniform", "normal" or "lognormal"
+    LLM_FAKE_LATENCY_MS: float = 0.0  # Mean latency per call
+    LLM_FAKE_LATENCY_SPREAD_MS: float = 0.0  # Half-width (uniform) or standard deviation (normal, lognormal)
+    LLM_FAKE_ERROR_RATE: float = 0.0
+    LLM_FAKE_SEED: int = 0
+    LLM_FAKE_RESPONSES_FILE: str = ""  # Optional JSON overriding canned answers by prompt kind
+
+    # System prompt files are cached in memory; how often to check them for edits on disk
+    PROMPT_RELOAD_INTERVAL_SECONDS: float = 1.0
+
     class Config:
         env_file = ".env"
         extra = "ignore"  # Ignore extra fields in .env
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
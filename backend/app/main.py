@@ -1,8 +1,29 @@
-from fastapi import FastAPI
+import threading
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from app.auth import get_admin_user
+from app.config import settings
 from app.database import engine
-from app.models import Base
-from app.routers import chatbot, auth, users, issues, authorities, votes, stats, heatmap, notifications, leaderboards
+from app.models import Base, User
+from app.routers import chatbot, auth, users, issues, authorities, votes, stats, heatmap, notifications, leaderboards, classifier_models
+from app.services.classifier import get_classifier_service
+from app.services.classifier_batcher import existing_classifier_batcher
+from app.services.enrichment import enrichment_stats
+from app.services.llm_cache import get_llm_cache
+from app.services.singleflight import get_llm_singleflight
+from app.services.llm_limiter import get_llm_limiter
+from app.services.circuit_breaker import provider_breakers_status
+from app.services.fake_llm import get_fake_llm
+from app.services.spam_filter import get_spam_filter
+from app.services.near_duplicates import get_near_duplicate_index
+from app.services.reputation import get_reputation_service
+from app.services.ai_pipeline import pipeline_stats
+from app.services.enrichment_worker import get_enrichment_worker
+from app.services.prompt_store import get_prompt_store
+from app.services.model_registry import get_model_registry
+from app.services.metrics import latency_metrics
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 # Import all models to ensure they're registered
 from app import models
@@ -10,10 +31,40 @@ from app import models
 # Note: Using Alembic migrations instead of create_all
 # Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the category classifier once per process instead of per request
+    if settings.CLASSIFIER_REGISTRY_ENABLED:
+        # Activates the versions named in registry.json and watches it for hot swaps
+        get_model_registry().start_watching(preload=settings.CLASSIFIER_PRELOAD)
+    elif settings.CLASSIFIER_PRELOAD:
+        get_classifier_service().start_background_load()
+    if settings.NEAR_DUPLICATES_ENABLED:
+        get_near_duplicate_index().start_background_build()
+    if settings.REPUTATION_ENABLED:
+        get_reputation_service().start_refreshing()
+        # Queries the database, which must not hold up (or fail) startup
+        threading.Thread(target=issues.requeue_deferred_spam_checks, name="spam-check-requeue", daemon=True).start()
+    # Finish background enrichment interrupted by a restart
+    if settings.AI_ENRICHMENT_ASYNC:
+        issues.requeue_pending_enrichment()
+    yield
+    if settings.REPUTATION_ENABLED:
+        get_reputation_service().stop()
+    batcher = existing_classifier_batcher()
+    if batcher is not None:
+        batcher.stop()
+    get_enrichment_worker().stop()
+    if settings.CLASSIFIER_REGISTRY_ENABLED:
+        get_model_registry().stop()
+    else:
+        get_classifier_service().close()
+
 app = FastAPI(
     title="GCET Hack API",
     description="Backend API for GCET Hack project - Civic Engagement Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - Allow all origins for development
@@ -50,6 +101,7 @@ app.include_router(stats.router, prefix="/api")
 app.include_router(heatmap.router, prefix="/api")
 app.include_router(notifications.router, prefix="/api")
 app.include_router(leaderboards.router, prefix="/api")
+app.include_router(classifier_models.router, prefix="/api")
 
 @app.get("/")
 def root():
@@ -61,4 +113,35 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "database": "connected"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "classifier": get_classifier_service().status(),
+        "llm_providers": {name: breaker["state"] for name, breaker in provider_breakers_status().items()}
+    }
+
+# Service internals and per-stage latency are for admins only (Prometheus can send an admin bearer token)
+@app.get("/metrics")
+def metrics(current_user: User = Depends(get_admin_user)):
+    batcher = existing_classifier_batcher()
+    return {
+        "classifier_batcher": batcher.status() if batcher is not None else None,
+        "enrichment": {"mode": settings.AI_ENRICHMENT_MODE, **enrichment_stats.snapshot()},
+        "llm_cache": get_llm_cache().stats(),
+        "llm_singleflight": get_llm_singleflight().stats(),
+        "llm_limiter": get_llm_limiter().status(),
+        "llm_providers": provider_breakers_status(),
+        "llm_fake": get_fake_llm().status() if settings.LLM_FAKE_ENABLED else None,
+        "prompt_store": get_prompt_store().stats(),
+        "ai_stages": pipeline_stats.snapshot(),
+        "spam_filter": get_spam_filter().stats() if settings.SPAM_FILTER_ENABLED else None,
+        "near_duplicates": get_near_duplicate_index().stats() if settings.NEAR_DUPLICATES_ENABLED else None,
+        "reputation": get_reputation_service().stats() if settings.REPUTATION_ENABLED else None,
+        "enrichment_worker": get_enrichment_worker().status(),
+        "model_registry": get_model_registry().status() if settings.CLASSIFIER_REGISTRY_ENABLED else None,
+        "latency": latency_metrics.snapshot()
+    }
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+def metrics_prometheus(current_user: User = Depends(get_admin_user)):
+    return latency_metrics.render_prometheus()
\ No newline at end of file
@@ -1,6 +1,6 @@
 
 from app.database import Base
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, BigInteger, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
@@ -56,6 +56,7 @@ class Issue(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     priority = Column(Integer, default=1)  # 1: low, 2: medium, 3: high, 4: urgent
     category = Column(String(100), nullable=False)
+    enrichment_status = Column(String(20), default="complete", server_default="complete", nullable=False)  # pending, complete, merged, spam, failed, spam_check
     
     # Relationships
     user = relationship("User", back_populates="issues")
@@ -117,3 +118,23 @@ class Award(Base):
     
     # Relationships
     winner = relationship("User", back_populates="awards")
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of prompt name + prompt hash + normalized query
+    prompt_name = Column(String(255), nullable=False, index=True)  # System prompt file, e.g. "system_prompt1.txt"
+    prompt_hash = Column(String(64), nullable=False)  # sha256 of the prompt file contents
+    response = Column(Text, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=func.now())
+    expires_at = Column(DateTime, nullable=True)
+
+class IssueEmbedding(Base):
+    __tablename__ = "issue_embeddings"
+    
+    issue_id = Column(UUID(as_uuid=True), ForeignKey("issues.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String(255), nullable=False, index=True)  # Encoder that produced the vector, e.g. "roberta-base/keras"
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 [CLS] embedding of the description, little-endian
+    created_at = Column(DateTime, default=func.now())
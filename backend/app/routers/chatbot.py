@@ -1,18 +1,101 @@
-from fastapi import APIRouter, Body
-from g4f.client import Client
-import g4f
-import g4f.Provider
+from fastapi import APIRouter, Body, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import sys
 import os
-from app.util import get_query_response
+import json
+import threading
+import time
+from app.util import get_query_response, stream_query_response
+from app.services.llm_limiter import LLMOverloadedError, get_llm_limiter
+from app.services.metrics import record_span
 
 router = APIRouter(
     prefix="/chatbot",         # optional: adds /users to all routes
     tags=["chatbot"]           # optional: groups routes in docs
 )
 
+def _overloaded(e: LLMOverloadedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="The assistant is busy, please try again shortly",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
 @router.post("/")
 def chat(query : str = Body(...,embed=True)):
-    
-    result = get_query_response(query)
-    return {"response": result}
\ No newline at end of file
+
+    try:
+        result = get_query_response(query)
+    except LLMOverloadedError as e:
+        raise _overloaded(e)
+    return {"response": result}
+
+
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def _chat_events(request: Request, query: str):
+    """Forward answer deltas as SSE messages until the answer ends or the client goes away"""
+    cancelled = threading.Event()
+    deltas = stream_query_response(query, cancelled=cancelled)
+    started = time.perf_counter()
+    first_delta = True
+    outcome = "completed"
+    try:
+        while True:
+            if await request.is_disconnected():
+                outcome = "disconnected"
+                break
+            # The provider iterator blocks, so each next() runs in the threadpool
+            delta = await run_in_threadpool(next, deltas, None)
+            if delta is None:
+                break
+            if first_delta:
+                record_span("chatbot.first_token", (time.perf_counter() - started) * 1000)
+                first_delta = False
+            yield _sse({"delta": delta})
+        if outcome == "completed":
+            yield _sse({}, event="done")
+    except LLMOverloadedError as e:
+        # Headers are already sent, so the 503 becomes an error event with the same hint
+        outcome = "overloaded"
+        yield _sse({"detail": "The assistant is busy, please try again shortly", "retry_after": e.retry_after}, event="error")
+    except Exception as e:
+        outcome = "error"
+        print(f"Error streaming chatbot response: {str(e)}")
+        yield _sse({"detail": "The assistant could not complete the answer"}, event="error")
+    finally:
+        # Also reached when Starlette cancels the response on disconnect
+        cancelled.set()
+        try:
+            deltas.close()
+        except ValueError:
+            # Still inside next() in a worker thread; it stops at the next delta because of `cancelled`
+            pass
+        record_span(f"chatbot.stream.{outcome}", (time.perf_counter() - started) * 1000)
+
+
+def _event_stream_response(request: Request, query: str) -> StreamingResponse:
+    limiter = get_llm_limiter()
+    if limiter.queue_full():
+        raise _overloaded(LLMOverloadedError("Too many pending LLM requests", limiter.retry_after))
+    return StreamingResponse(
+        _chat_events(request, query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/stream")
+async def chat_stream(request: Request, query: str = Body(..., embed=True)):
+    """Same answer as POST /chatbot/, sent as Server-Sent Events while it is generated"""
+    return _event_stream_response(request, query)
+
+
+@router.get("/stream")
+async def chat_stream_get(request: Request, query: str):
+    """GET variant for browser EventSource clients, which cannot send a request body"""
+    return _event_stream_response(request, query)
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.auth import get_admin_user
+from app.config import settings
+from app.models import User
+from app.services.model_registry import ModelRegistry, get_model_registry
+from app.schemas.model_schemas import ModelVersionRequest
+
+router = APIRouter(
+    prefix="/admin/models",
+    tags=["admin"]
+)
+
+def get_registry() -> ModelRegistry:
+    """The model registry, or 409 when versioned models are not enabled"""
+    if not settings.CLASSIFIER_REGISTRY_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Model registry is disabled (set CLASSIFIER_REGISTRY_ENABLED)"
+        )
+    return get_model_registry()
+
+def apply_registry(registry: ModelRegistry, primary, shadow) -> dict:
+    try:
+        registry.write_registry(primary=primary, shadow=shadow)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    if registry.last_error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model version could not be loaded: {registry.last_error}"
+        )
+    return registry.status()
+
+@router.get("/")
+def get_models(
+    current_user: User = Depends(get_admin_user)
+):
+    """Available model versions, the primary and shadow versions and their live metrics"""
+    return get_registry().status()
+
+@router.put("/primary")
+def set_primary_model(
+    request: ModelVersionRequest,
+    current_user: User = Depends(get_admin_user)
+):
+    """Load a version and make it primary. Promoting the shadow version also clears the shadow."""
+    registry = get_registry()
+    if not request.version:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="version is required")
+    shadow = registry.shadow_version if registry.shadow_version != request.version else None
+    return apply_registry(registry, request.version, shadow)
+
+@router.put("/shadow")
+def set_shadow_model(
+    request: ModelVersionRequest,
+    current_user: User = Depends(get_admin_user)
+):
+    """Score live traffic with a candidate version next to the primary, or stop shadowing (version null)"""
+    registry = get_registry()
+    primary = registry.read_registry().get("primary")
+    return apply_registry(registry, primary, request.version)
@@ -2,15 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, File, Uplo
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import desc, asc, or_, and_, func
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 import math
 import os
 import pathlib
+import time
 import uuid as uuid_lib
 from uuid import UUID
 from app.util import get_query_response
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import Issue, User, Authority, Vote, Media, Notification
 from app.services.azure_storage import get_azure_storage_service
 from app.schemas.issue_schemas import (
@@ -27,9 +28,21 @@ from app.schemas.issue_schemas import (
     MediaResponse
 )
 from app.auth import get_current_user
-from transformers import RobertaTokenizer, RobertaModel
-import torch
-import tensorflow as tf
+from app.config import settings
+from app.services.classifier import get_classifier_service, DEFAULT_CATEGORY
+from app.services.classifier_batcher import get_classifier_batcher
+from app.services.enrichment import EnrichmentResult, request_enrichment
+from app.services.ai_pipeline import Stage, pipeline_stats, run_stages
+from app.services.keyword_classifier import guess_category
+from app.services.enrichment_worker import get_enrichment_worker
+from app.services.llm_limiter import LLMOverloadedError
+from app.services.embedding_store import save_issue_embedding, get_issue_embeddings
+from app.services.duplicate_detection import select_duplicate
+from app.services.model_registry import leased_classifier, record_inference
+from app.services.metrics import annotate, span, traced
+from app.services.spam_filter import SpamScreen, get_spam_filter
+from app.services.near_duplicates import NearDuplicateMatch, get_near_duplicate_index
+from app.services.reputation import get_reputation_service
 import numpy as np
 
 
@@ -94,6 +107,7 @@ def create_issue_response(issue: Issue) -> IssueResponse:
         updated_at=issue.updated_at,
         priority=issue.priority,
         category=issue.category,
+        enrichment_status=issue.enrichment_status or "complete",
         user=user_response,
         authority=authority_response,
         votes=vote_responses,
@@ -122,7 +136,7 @@ def get_authority(category: str, district: str, db: Session) -> str:
 def get_priority_from_text(description : str):
     """Get the priority from issue description"""
     try:
-        result = get_query_response(description, "system_prompt1.txt")
+        result = get_query_response(description, "system_prompt1.txt", max_queue_wait=settings.LLM_DEGRADABLE_QUEUE_TIMEOUT_SECONDS)
         
         # Parse the AI response to extract integer priority
         # Expected format: "Priority: X" or just "X" where X is 0, 1, or 2
@@ -159,46 +173,41 @@ def get_priority_from_text(description : str):
         print(f"Priority detection failed: {e}")
         return 1  # Default to normal priority
 
-def get_category_from_text(description: str):
-    """Get the category from issue description"""
+def get_category_and_embedding(description: str):
+    """Get the category and the [CLS] embedding of the issue description.
+    The embedding is None when the classifier is unavailable."""
     try:
-        # Suppress warnings for cleaner output
-        import warnings
-        warnings.filterwarnings("ignore", category=UserWarning)
-        
-        # Initialize models with warning suppression
-        tokenizer = RobertaTokenizer.from_pretrained("roberta-base")
-        roberta = RobertaModel.from_pretrained("roberta-base")
-        
-        tokenized = tokenizer(description, 
-                       return_tensors="pt", 
-                       truncation=True, 
-                       padding=True, 
-                       max_length=128)
-        
-        # Extract the embeddings using RoBERTa
-        with torch.no_grad():
-            outputs = roberta(**tokenized)
-            # Use the [CLS] token embedding (first token)
-            embeddings = outputs.last_hidden_state[:, 0, :].numpy()
-        
-        # Load the TensorFlow model with proper path
-        model_path = os.path.join(os.path.dirname(__file__), 'model_new.h5')
-        if not os.path.exists(model_path):
-            print(f"Model file not found at: {model_path}")
-            return "Road Authority"  # Default fallback
-            
-        model = tf.keras.models.load_model(model_path)
-        pred = model.predict(embeddings, verbose=0)  # Suppress TF output
-        pred_label = np.argmax(pred, axis=1)
-        categories = ["Road Authority", "Dumping/Waste Authority","Public Amenities Authority","Electricity Company"]
-        return categories[pred_label[0]]
+        # Models are loaded once per process by the classifier service
+        classifier = get_classifier_service()
+        if not classifier.ensure_loaded():
+            print(f"Category classifier unavailable: {classifier.load_error}")
+            return DEFAULT_CATEGORY, None  # Default fallback
+        if settings.CLASSIFIER_BATCHING_ENABLED:
+            # Share one padded forward pass with concurrent reports
+            return get_classifier_batcher().classify_with_embedding_sync(description)
+        with leased_classifier() as classifier:
+            started = time.perf_counter()
+            labels, embeddings = classifier.predict_with_embeddings([description])
+            record_inference(classifier, [description], labels, time.perf_counter() - started)
+        return labels[0], embeddings[0]
     except Exception as e:
         # Fallback to default category if AI fails
         print(f"AI category detection failed: {str(e)}")
-        return "Road Authority"
-        print(f"AI category detection failed: {e}")
-        return "Road Authority"
+        return DEFAULT_CATEGORY, None
+
+def get_category_from_text(description: str):
+    """Get the category from issue description"""
+    return get_category_and_embedding(description)[0]
+
+def store_issue_embedding(issue_id: UUID, embedding, db: Session):
+    """Persist the description embedding; a failure here never fails the request"""
+    if embedding is None or not settings.EMBEDDINGS_ENABLED:
+        return
+    try:
+        save_issue_embedding(db, issue_id, embedding, get_classifier_service().embedding_model)
+    except Exception as e:
+        db.rollback()
+        print(f"Storing embedding for issue {issue_id} failed: {str(e)}")
 def get_radius_from_text(description : str):
     result = get_query_response(description,"system_prompt3.txt")
     return result;
@@ -227,7 +236,7 @@ def check_issue_edit_permission(current_user: User, issue: Issue):
 def get_radius_from_text(description: str):
     """Get the radius from issue description"""
     try:
-        result = get_query_response(description,"system_prompt3.txt")
+        result = get_query_response(description,"system_prompt3.txt", max_queue_wait=settings.LLM_DEGRADABLE_QUEUE_TIMEOUT_SECONDS)
         # Extract number from AI response, default to 500 if parsing fails
         import re
         numbers = re.findall(r'\d+', result)
@@ -278,48 +287,164 @@ def check_duplicate_issue(
     location: str, 
     radius: int, 
     current_user_id: UUID, 
-    db: Session
+    db: Session,
+    exclude_issue_id: Optional[UUID] = None
 ) -> Optional[Issue]:
     """
     Check if there's already an existing issue of the same category and district 
     within the specified radius from the given location.
     Returns the existing issue if found, None otherwise.
     """
+    duplicate = find_duplicate_issue(category, district, location, radius, db, exclude_issue_id=exclude_issue_id)
+    return duplicate[0] if duplicate else None
+
+def find_duplicate_issue(
+    category: str,
+    district: str,
+    location: str,
+    radius: int,
+    db: Session,
+    embedding=None,
+    exclude_issue_id: Optional[UUID] = None
+) -> Optional[tuple[Issue, float, Optional[float]]]:
+    """
+    Find the best existing open issue in the district that duplicates the new report.
+    With SEMANTIC_DUPLICATES_ENABLED and an embedding, candidates inside the geo window are
+    scored by description similarity (also across categories); otherwise the closest issue of
+    the same category within the larger of the two radii is the duplicate.
+    Returns (issue, distance in meters, similarity or None), or None when there is no duplicate.
+    """
+    with span("duplicate_scan"):
+        return _find_duplicate_issue(category, district, location, radius, db, embedding, exclude_issue_id)
+
+def _find_duplicate_issue(
+    category: str,
+    district: str,
+    location: str,
+    radius: int,
+    db: Session,
+    embedding=None,
+    exclude_issue_id: Optional[UUID] = None
+) -> Optional[tuple[Issue, float, Optional[float]]]:
     try:
-        # Parse the new issue location
         new_lat, new_lon = parse_location_coordinates(location)
-        
-        # Get all open issues of the same category in the same district
-        existing_issues = db.query(Issue).join(Authority).filter(
-            Issue.category == category,
-            Authority.district == district,
-            Issue.status.in_([0, 1])  # Only open and in-progress issues
-        ).all()
-        
-        # Check distance for each existing issue
-        for existing_issue in existing_issues:
-            try:
-                existing_lat, existing_lon = parse_location_coordinates(existing_issue.location)
-                
-                # Calculate distance between locations
-                distance = calculate_distance(new_lat, new_lon, existing_lat, existing_lon)
-                
-                # Check if within either issue's radius (use the larger radius)
-                max_radius = max(radius, existing_issue.radius)
-                
-                if distance <= max_radius:
-                    return existing_issue
-                    
-            except ValueError:
-                # Skip issues with invalid location format
-                continue
-                
-        return None
-        
     except ValueError as e:
         # If we can't parse the new location, we can't check for duplicates
         print(f"Location parsing error: {e}")
         return None
+    
+    semantic = settings.SEMANTIC_DUPLICATES_ENABLED and embedding is not None
+    query = db.query(Issue).join(Authority).filter(
+        Authority.district == district,
+        Issue.status.in_([0, 1])  # Only open and in-progress issues
+    )
+    if not semantic:
+        query = query.filter(Issue.category == category)
+    if exclude_issue_id is not None:
+        query = query.filter(Issue.id != exclude_issue_id)
+    
+    candidates, coordinates = [], []
+    with span("duplicate.query"):
+        existing_issues = query.order_by(Issue.created_at).all()
+    for existing_issue in existing_issues:
+        try:
+            coordinates.append(parse_location_coordinates(existing_issue.location))
+            candidates.append(existing_issue)
+        except ValueError:
+            # Skip issues with invalid location format
+            continue
+    if not candidates:
+        return None
+    
+    coordinates = np.array(coordinates, dtype=np.float64)
+    candidate_embeddings, has_embedding = None, None
+    if semantic:
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with span("duplicate.embeddings"):
+            stored = get_issue_embeddings(db, [issue.id for issue in candidates], get_classifier_service().embedding_model)
+        candidate_embeddings = np.zeros((len(candidates), embedding.shape[0]), dtype=np.float32)
+        has_embedding = np.zeros(len(candidates), dtype=bool)
+        for row, issue in enumerate(candidates):
+            vector = stored.get(issue.id)
+            if vector is not None and vector.shape == embedding.shape:
+                candidate_embeddings[row] = vector
+                has_embedding[row] = True
+    
+    with span("duplicate.select"):
+        match = select_duplicate(
+            category, new_lat, new_lon, radius,
+            [issue.category for issue in candidates],
+            coordinates[:, 0], coordinates[:, 1],
+            np.array([issue.radius for issue in candidates]),
+            embedding=embedding if semantic else None,
+            candidate_embeddings=candidate_embeddings,
+            has_embedding=has_embedding
+        )
+    if match is None:
+        return None
+    return candidates[match.index], match.distance_meters, match.similarity
+
+def find_near_duplicate_issue(issue_data: IssueCreateRequest, db: Session) -> Optional[tuple[Issue, NearDuplicateMatch]]:
+    """
+    Find an open issue in the district whose description is near-identical to the new report,
+    using the in-memory MinHash index, so copy-paste floods are caught before any model or LLM call.
+    Returns (issue, match), or None.
+    """
+    if not settings.NEAR_DUPLICATES_ENABLED:
+        return None
+    index = get_near_duplicate_index()
+    with span("near_duplicate"):
+        index.ensure_built()
+        match = index.query(issue_data.description, issue_data.district, issue_data.location)
+    if match is None:
+        return None
+    # The index does not see other workers' edits; the database has the final say
+    existing_issue = db.query(Issue).filter(Issue.id == match.issue_id, Issue.status.in_([0, 1])).first()
+    if existing_issue is None:
+        index.remove(match.issue_id)
+        return None
+    return existing_issue, match
+
+def index_issue(issue: Issue, district: str):
+    """Add an open issue to the near-duplicate index, or drop it from the index once it is resolved or closed"""
+    if not settings.NEAR_DUPLICATES_ENABLED:
+        return
+    if issue.status in (0, 1):
+        get_near_duplicate_index().add(issue.id, issue.description, district, issue.location, issue.created_at)
+    else:
+        get_near_duplicate_index().remove(issue.id)
+
+def unindex_issue(issue_id: UUID):
+    if settings.NEAR_DUPLICATES_ENABLED:
+        get_near_duplicate_index().remove(issue_id)
+
+def create_duplicate_response(
+    duplicate_issue: Issue,
+    user_id: UUID,
+    message: str,
+    distance: Optional[float],
+    similarity: Optional[float],
+    db: Session
+) -> IssueDuplicateResponse:
+    """Upvote the existing issue on behalf of the reporter and describe the match"""
+    # Load relationships for the existing issue
+    existing_issue_with_relations = db.query(Issue).options(
+        joinedload(Issue.user),
+        joinedload(Issue.authority),
+        joinedload(Issue.votes),
+        joinedload(Issue.media)
+    ).filter(Issue.id == duplicate_issue.id).first()
+    
+    # Auto-upvote the existing issue
+    auto_upvoted = auto_upvote_issue(duplicate_issue, user_id, db)
+    
+    return IssueDuplicateResponse(
+        message=f"{message} Your vote has been {'added' if auto_upvoted else 'already recorded'}.",
+        existing_issue=create_issue_response(existing_issue_with_relations),
+        auto_upvoted=auto_upvoted,
+        distance_meters=round(distance, 2) if distance is not None else None,
+        similarity=round(similarity, 4) if similarity is not None else None
+    )
 
 def auto_upvote_issue(issue: Issue, user_id: UUID, db: Session) -> bool:
     """
@@ -349,24 +474,158 @@ def is_spam_from_text(description: str):
     result = get_query_response(description,"system_prompt4.txt")
     return result;
 
+def get_combined_enrichment(description: str) -> EnrichmentResult:
+    """Get spam verdict, priority and radius from one LLM call.
+    Any field the combined answer fails to provide falls back to its dedicated prompt."""
+    enrichment = request_enrichment(description)
+    
+    if enrichment.is_spam is None:
+        spam_result = is_spam_from_text(description)
+        enrichment.is_spam = "SPAM" in spam_result.upper()
+        enrichment.verdict = spam_result
+    
+    # Spam is rejected before priority/radius are used, so skip their fallbacks
+    if enrichment.is_spam:
+        return enrichment
+    
+    if enrichment.priority is None:
+        enrichment.priority = get_priority_from_text(description)
+    
+    if enrichment.radius is None:
+        enrichment.radius = get_radius_from_text(description)
+    
+    return enrichment
+
+class SpamCheckUnavailableError(LLMOverloadedError):
+    """The LLM spam check timed out or failed; the issue is not stored without a verdict"""
+
+def llm_calls_per_issue() -> int:
+    """LLM calls the AI stages make for one issue"""
+    return 1 if settings.AI_ENRICHMENT_MODE == "combined" else 3
+
+def screen_spam(description: str, user_id: Optional[UUID] = None) -> Optional[SpamScreen]:
+    """Local spam pre-filter; None when it is disabled"""
+    if not settings.SPAM_FILTER_ENABLED:
+        return None
+    with span("spam_filter"):
+        return get_spam_filter().screen(description, user_id)
+
+def trusted_reporter_screen(user_id: UUID, spam_screen: Optional[SpamScreen]) -> Optional[SpamScreen]:
+    """Waive the LLM spam check for a reporter with a trusted history, unless the pre-filter
+    already decided the description. None when the check still has to run."""
+    if not settings.REPUTATION_ENABLED or settings.AI_ENRICHMENT_MODE == "combined":
+        # The combined prompt answers the spam question in the same call as priority and radius
+        return None
+    if spam_screen is not None and spam_screen.decision is not None:
+        return None
+    with span("reputation"):
+        if not get_reputation_service().is_trusted(user_id):
+            return None
+    return SpamScreen("ham", "trusted reporter", "reputation")
+
+def run_ai_stages(description: str, spam_screen: Optional[SpamScreen] = None) -> tuple[EnrichmentResult, str, Optional[object]]:
+    """Run the spam, category, priority and radius stages concurrently.
+    Each stage has its own deadline and falls back to its default when it times out or fails,
+    except the spam check: without a verdict SpamCheckUnavailableError is raised.
+    The local spam pre-filter runs first (unless its result is passed in): a clear spam verdict
+    skips every stage, a clear legitimate one skips the LLM spam check.
+    Returns the enrichment, the category and the description embedding (None if unavailable)."""
+    if spam_screen is None:
+        spam_screen = screen_spam(description)
+    if spam_screen is not None and spam_screen.decision == "spam":
+        get_spam_filter().record_avoided_calls(llm_calls_per_issue())
+        return EnrichmentResult(is_spam=True, verdict=spam_screen.verdict), DEFAULT_CATEGORY, None
+    locally_legitimate = spam_screen is not None and spam_screen.decision == "ham"
+    
+    stages = [
+        Stage("category", lambda: get_category_and_embedding(description), (DEFAULT_CATEGORY, None), settings.AI_STAGE_TIMEOUT_CATEGORY)
+    ]
+    if settings.AI_ENRICHMENT_MODE == "combined":
+        # Spam, priority and radius from a single LLM call
+        stages.append(Stage("enrichment", lambda: get_combined_enrichment(description), None, settings.AI_STAGE_TIMEOUT_ENRICHMENT))
+    else:
+        if not locally_legitimate:
+            stages.append(Stage("spam", lambda: is_spam_from_text(description), None, settings.AI_STAGE_TIMEOUT_SPAM))
+        stages += [
+            Stage("priority", lambda: get_priority_from_text(description), 1, settings.AI_STAGE_TIMEOUT_PRIORITY),
+            Stage("radius", lambda: get_radius_from_text(description), 500, settings.AI_STAGE_TIMEOUT_RADIUS)
+        ]
+    
+    results = run_stages(stages)
+    
+    if "enrichment" in results:
+        enrichment = results["enrichment"].value or EnrichmentResult()
+        llm_is_spam = enrichment.is_spam if results["enrichment"].status == "ok" else None
+    elif locally_legitimate:
+        if spam_screen.tier == "reputation":
+            # The spam stage would have run alongside the others, so only its excess over them is saved
+            slowest_ms = max(result.elapsed_ms for result in results.values())
+            get_reputation_service().record_skipped_check(max(0.0, pipeline_stats.average_ms("spam") - slowest_ms))
+        else:
+            get_spam_filter().record_avoided_calls(1)
+        enrichment = EnrichmentResult(
+            is_spam=False,
+            verdict=spam_screen.verdict,
+            priority=results["priority"].value,
+            radius=results["radius"].value
+        )
+        llm_is_spam = None
+    else:
+        spam_result = results["spam"].value
+        enrichment = EnrichmentResult(
+            is_spam="SPAM" in spam_result.upper() if spam_result is not None else None,
+            verdict=spam_result,
+            priority=results["priority"].value,
+            radius=results["radius"].value
+        )
+        llm_is_spam = enrichment.is_spam if results["spam"].status == "ok" else None
+    
+    # Verdicts on descriptions the pre-filter escalated teach its text model
+    if spam_screen is not None and spam_screen.decision is None and llm_is_spam is not None:
+        get_spam_filter().learn(description, llm_is_spam)
+    
+    # Defaults for anything the stages could not provide; there is none for the spam verdict
+    if enrichment.is_spam is None:
+        raise SpamCheckUnavailableError("Spam check unavailable", settings.LLM_RETRY_AFTER_SECONDS)
+    if enrichment.priority is None:
+        enrichment.priority = 1
+    if enrichment.radius is None:
+        enrichment.radius = 500
+    
+    category, embedding = results["category"].value
+    return enrichment, category, embedding
+
 def create_issue_data(
     request: IssueCreateRequest, 
     user_id: UUID, 
-    db: Session
+    db: Session,
+    enrichment: Optional[EnrichmentResult] = None,
+    ai_category: Optional[str] = None
 ) -> IssueCreateData:
     """Convert API request to internal issue data model with AI processing"""
     
-    # Get AI-generated category first
-    ai_category = get_category_from_text(request.description)
+    # Get AI-generated category first (already known when the AI stages ran)
+    if ai_category is None:
+        with span("stage.category"):
+            ai_category = get_category_from_text(request.description)
     
     # Get authority based on AI-detected category and user's district
-    authority_id = get_authority(ai_category, request.district, db)
+    with span("authority_lookup"):
+        authority_id = get_authority(ai_category, request.district, db)
     
-    # Get AI-generated priority
-    ai_priority = get_priority_from_text(request.description)
+    # Get AI-generated priority (already known when the combined enrichment ran)
+    if enrichment is not None and enrichment.priority is not None:
+        ai_priority = enrichment.priority
+    else:
+        with span("stage.priority"):
+            ai_priority = get_priority_from_text(request.description)
     
     # Get AI-generated radius (always use AI, no user input)
-    ai_radius = get_radius_from_text(request.description)
+    if enrichment is not None and enrichment.radius is not None:
+        ai_radius = enrichment.radius
+    else:
+        with span("stage.radius"):
+            ai_radius = get_radius_from_text(request.description)
     
     # Create the internal data model
     return IssueCreateData(
@@ -407,7 +666,248 @@ def create_notification_for_user(issue: Issue, db: Session):
     )
     db.add(notification)
 
-@router.post("/", response_model=IssueCreateResponse, status_code=201)
+def create_notification(issue: Issue, user_id: UUID, message: str, is_citizen: bool, db: Session):
+    db.add(Notification(
+        issue_id=issue.id,
+        user_id=user_id,
+        message=message,
+        is_citizen=is_citizen,
+        is_read=False
+    ))
+
+def notify_authority(issue: Issue, authority_id: UUID, message: str, db: Session):
+    """Notify the account of the given authority about one of its issues"""
+    authority = db.query(Authority).filter(Authority.id == authority_id).first()
+    if authority:
+        create_notification(issue, authority.user_id, message, False, db)
+
+def create_provisional_issue(issue_data: IssueCreateRequest, current_user: User, db: Session) -> IssueCreateResponse:
+    """Store the issue right away with a keyword-based category, default priority and radius.
+    Spam check, AI category, priority, radius and duplicate merge run in the background."""
+    category = guess_category(issue_data.description)
+    authority_id = get_authority(category, issue_data.district, db)
+    
+    new_issue = Issue(
+        user_id=current_user.id,
+        authority_id=UUID(authority_id),
+        title=issue_data.title,
+        description=issue_data.description,
+        location=issue_data.location,
+        radius=500,
+        category=category,
+        priority=1,
+        status=0,
+        enrichment_status="pending"
+    )
+    db.add(new_issue)
+    db.commit()
+    db.refresh(new_issue)
+    index_issue(new_issue, issue_data.district)
+    
+    create_notification_for_authority(new_issue, db)
+    db.commit()
+    
+    get_enrichment_worker().submit(enrich_issue_in_background, new_issue.id)
+    
+    issue_with_relations = db.query(Issue).options(
+        joinedload(Issue.user),
+        joinedload(Issue.authority),
+        joinedload(Issue.votes),
+        joinedload(Issue.media)
+    ).filter(Issue.id == new_issue.id).first()
+    
+    return IssueCreateResponse(
+        message="Issue created successfully. Category, priority and duplicate checks are in progress.",
+        issue=create_issue_response(issue_with_relations)
+    )
+
+def enrich_issue_in_background(issue_id: UUID):
+    """Run the full AI stages for a provisional issue and apply the results.
+    Spam is closed, duplicates are merged into the existing issue (with an upvote),
+    otherwise category, authority, priority and radius are updated.
+    The reporter and authorities are notified about anything that changed."""
+    db = SessionLocal()
+    try:
+        issue = db.query(Issue).options(joinedload(Issue.authority)).filter(Issue.id == issue_id).first()
+        if not issue or issue.enrichment_status != "pending":
+            return
+        
+        try:
+            enrichment, ai_category, embedding = run_ai_stages(issue.description)
+        except Exception as e:
+            # Keep the provisional values; the issue stays routed to the guessed authority
+            print(f"Background enrichment failed for issue {issue_id}: {str(e)}")
+            issue.enrichment_status = "failed"
+            db.commit()
+            return
+        
+        if enrichment.is_spam:
+            issue.status = 3  # Closed
+            issue.enrichment_status = "spam"
+            create_notification(
+                issue, issue.user_id,
+                f"Your issue '{issue.title}' was closed because it was flagged as spam: {enrichment.spam_verdict}",
+                True, db
+            )
+            notify_authority(
+                issue, issue.authority_id,
+                f"Issue '{issue.title}' was closed as spam after review. No action needed.",
+                db
+            )
+            db.commit()
+            unindex_issue(issue.id)
+            return
+        
+        district = issue.authority.district
+        previous_authority_id = issue.authority_id
+        provisional = (issue.category, issue.priority)
+        
+        if ai_category != issue.category:
+            try:
+                issue.authority_id = UUID(get_authority(ai_category, district, db))
+                issue.category = ai_category
+            except Exception as e:
+                # No authority for the AI category in this district, keep the provisional routing
+                print(f"Re-routing issue {issue_id} failed: {str(e)}")
+        issue.priority = enrichment.priority
+        issue.radius = enrichment.radius
+        if embedding is not None and settings.EMBEDDINGS_ENABLED:
+            save_issue_embedding(db, issue.id, embedding, get_classifier_service().embedding_model, commit=False)
+        
+        duplicate = find_duplicate_issue(
+            category=issue.category,
+            district=district,
+            location=issue.location,
+            radius=issue.radius,
+            db=db,
+            embedding=embedding,
+            exclude_issue_id=issue.id
+        )
+        
+        if duplicate:
+            duplicate_issue = duplicate[0]
+            auto_upvoted = auto_upvote_issue(duplicate_issue, issue.user_id, db)
+            issue.status = 3  # Closed in favour of the existing issue
+            issue.enrichment_status = "merged"
+            create_notification(
+                issue, issue.user_id,
+                f"Your issue '{issue.title}' matches an existing report '{duplicate_issue.title}'. "
+                f"It was merged and your vote has been {'added' if auto_upvoted else 'already recorded'}.",
+                True, db
+            )
+            # The authority that was notified about the provisional issue
+            notify_authority(
+                issue, previous_authority_id,
+                f"Issue '{issue.title}' was merged into the existing report '{duplicate_issue.title}'. No action needed.",
+                db
+            )
+            db.commit()
+            unindex_issue(issue.id)
+            return
+        
+        issue.enrichment_status = "complete"
+        if issue.authority_id != previous_authority_id:
+            notify_authority(
+                issue, previous_authority_id,
+                f"Issue '{issue.title}' was re-routed to another authority after review. No action needed.",
+                db
+            )
+            create_notification_for_authority(issue, db)
+        elif issue.priority != provisional[1]:
+            notify_authority(
+                issue, issue.authority_id,
+                f"Issue '{issue.title}' priority was changed to {issue.priority} after review.",
+                db
+            )
+        if (issue.category, issue.priority) != provisional:
+            create_notification(
+                issue, issue.user_id,
+                f"Your issue '{issue.title}' was reviewed: category '{issue.category}', priority {issue.priority}.",
+                True, db
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def check_trusted_report_in_background(issue_id: UUID):
+    """Deferred LLM spam check for an issue a trusted reporter filed without it.
+    Spam is closed and the reporter loses the trust that let it through."""
+    db = SessionLocal()
+    try:
+        issue = db.query(Issue).filter(Issue.id == issue_id).first()
+        if not issue or issue.enrichment_status != "spam_check":
+            return
+        
+        try:
+            verdict = is_spam_from_text(issue.description)
+        except Exception as e:
+            # No verdict is not a legitimate verdict: stay "spam_check" so the next startup retries
+            print(f"Deferred spam check failed for issue {issue_id}: {str(e)}")
+            return
+        
+        is_spam = "SPAM" in verdict.upper()
+        get_reputation_service().record_deferred_check(is_spam)
+        if settings.SPAM_FILTER_ENABLED:
+            get_spam_filter().learn(issue.description, is_spam)
+        if not is_spam:
+            issue.enrichment_status = "complete"
+            db.commit()
+            return
+        
+        issue.status = 3  # Closed
+        issue.enrichment_status = "spam"
+        create_notification(
+            issue, issue.user_id,
+            f"Your issue '{issue.title}' was closed because it was flagged as spam: {verdict}",
+            True, db
+        )
+        notify_authority(
+            issue, issue.authority_id,
+            f"Issue '{issue.title}' was closed as spam after review. No action needed.",
+            db
+        )
+        db.commit()
+        unindex_issue(issue.id)
+        get_reputation_service().invalidate(issue.user_id)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def requeue_deferred_spam_checks():
+    """Queue the deferred spam checks left unfinished by a previous process.
+    Started off the startup path; a database that is unreachable or not migrated yet is logged, not raised."""
+    db = SessionLocal()
+    try:
+        pending_ids = [row.id for row in db.query(Issue.id).filter(Issue.enrichment_status == "spam_check").all()]
+    except Exception as e:
+        print(f"Requeueing deferred spam checks failed: {str(e)}")
+        return 0
+    finally:
+        db.close()
+    worker = get_enrichment_worker()
+    for issue_id in pending_ids:
+        worker.submit(check_trusted_report_in_background, issue_id)
+    return len(pending_ids)
+
+def requeue_pending_enrichment():
+    """Queue background enrichment for issues left pending by a previous process"""
+    db = SessionLocal()
+    try:
+        pending_ids = [row.id for row in db.query(Issue.id).filter(Issue.enrichment_status == "pending").all()]
+    finally:
+        db.close()
+    worker = get_enrichment_worker()
+    for issue_id in pending_ids:
+        worker.submit(enrich_issue_in_background, issue_id)
+    return len(pending_ids)
+
+@router.post("/", response_model=Union[IssueCreateResponse, IssueDuplicateResponse], status_code=201)
+@traced("create_issue")
 def create_issue(
     issue_data: IssueCreateRequest,
     current_user: User = Depends(get_current_user),
@@ -415,65 +915,112 @@ def create_issue(
 ):
     """Create a new issue with AI-powered category and priority detection, and duplicate checking"""
     
+    # Obvious junk and report floods are rejected before any model or LLM call
+    spam_screen = screen_spam(issue_data.description, current_user.id)
+    if spam_screen is not None and spam_screen.decision == "rate_limited":
+        annotate(outcome="rate_limited")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many reports ({spam_screen.reason}), please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(spam_screen.retry_after)))}
+        )
+    if spam_screen is not None and spam_screen.decision == "spam":
+        get_spam_filter().record_avoided_calls(llm_calls_per_issue())
+        annotate(outcome="spam", spam_filter=spam_screen.tier)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Issue rejected as spam: {spam_screen.verdict}"
+        )
+    
+    # Copy-pasted reports match an open issue on their text alone, also before any model or LLM call
+    near_duplicate = find_near_duplicate_issue(issue_data, db)
+    if near_duplicate:
+        duplicate_issue, match = near_duplicate
+        annotate(outcome="duplicate", near_duplicate=True)
+        return create_duplicate_response(
+            duplicate_issue, current_user.id,
+            "A near-identical issue is already open nearby.",
+            match.distance_meters, match.similarity, db
+        )
+    
+    if settings.AI_ENRICHMENT_ASYNC:
+        # Respond immediately, the AI stages run after the issue is stored
+        annotate(outcome="provisional")
+        return create_provisional_issue(issue_data, current_user, db)
+    
+    # Reporters with a trusted history don't wait for the LLM spam check
+    trusted_screen = trusted_reporter_screen(current_user.id, spam_screen)
+    if trusted_screen is not None:
+        spam_screen = trusted_screen
+        annotate(trusted_reporter=True)
+    
+    # Spam check, category, priority and radius run concurrently
+    try:
+        with span("ai_stages"):
+            enrichment, ai_category, embedding = run_ai_stages(issue_data.description, spam_screen)
+    except SpamCheckUnavailableError as e:
+        annotate(outcome="spam_check_unavailable")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The spam check is unavailable, please try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
     # Check for spam first
-    spam_result = is_spam_from_text(issue_data.description)
-    if "SPAM" in spam_result.upper():
+    if enrichment.is_spam:
+        annotate(outcome="spam")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Issue rejected as spam: {spam_result}"
+            detail=f"Issue rejected as spam: {enrichment.spam_verdict}"
         )
     
     # Convert API request to internal data model with AI processing
-    internal_issue_data = create_issue_data(issue_data, current_user.id, db)
+    internal_issue_data = create_issue_data(issue_data, current_user.id, db, enrichment, ai_category)
     
-    # Check for duplicate issues within radius
-    duplicate_issue = check_duplicate_issue(
+    # Check for duplicate issues within radius (and by description similarity when enabled)
+    duplicate = find_duplicate_issue(
         category=internal_issue_data.category,
         district=internal_issue_data.district,
         location=internal_issue_data.location,
         radius=internal_issue_data.radius,
-        current_user_id=current_user.id,
-        db=db
+        db=db,
+        embedding=embedding
     )
     
-    if duplicate_issue:
-        # Load relationships for the existing issue
-        existing_issue_with_relations = db.query(Issue).options(
-            joinedload(Issue.user),
-            joinedload(Issue.authority),
-            joinedload(Issue.votes),
-            joinedload(Issue.media)
-        ).filter(Issue.id == duplicate_issue.id).first()
-        
-        # Auto-upvote the existing issue
-        auto_upvoted = auto_upvote_issue(duplicate_issue, current_user.id, db)
-        
-        # Calculate distance for response
-        try:
-            new_lat, new_lon = parse_location_coordinates(internal_issue_data.location)
-            existing_lat, existing_lon = parse_location_coordinates(duplicate_issue.location)
-            distance = calculate_distance(new_lat, new_lon, existing_lat, existing_lon)
-        except ValueError:
-            distance = 0.0
-        
-        # Return duplicate response
-        return IssueDuplicateResponse(
-            message=f"Similar issue already exists within {internal_issue_data.radius}m radius. Your vote has been {'added' if auto_upvoted else 'already recorded'}.",
-            existing_issue=create_issue_response(existing_issue_with_relations),
-            auto_upvoted=auto_upvoted,
-            distance_meters=round(distance, 2)
+    annotate(category=internal_issue_data.category, priority=internal_issue_data.priority)
+    
+    if duplicate:
+        duplicate_issue, distance, similarity = duplicate
+        annotate(outcome="duplicate")
+        return create_duplicate_response(
+            duplicate_issue, current_user.id,
+            f"Similar issue already exists within {internal_issue_data.radius}m radius.",
+            distance, similarity, db
         )
     
     # No duplicate found, create new issue
+    annotate(outcome="created")
     new_issue = Issue(**internal_issue_data.to_issue_dict())
-    
-    db.add(new_issue)
-    db.commit()
-    db.refresh(new_issue)
+    deferred_spam_check = trusted_screen is not None and settings.REPUTATION_SPAM_CHECK == "defer"
+    if deferred_spam_check:
+        new_issue.enrichment_status = "spam_check"
+    
+    with span("db.insert"):
+        db.add(new_issue)
+        db.commit()
+        db.refresh(new_issue)
+    index_issue(new_issue, internal_issue_data.district)
+    if deferred_spam_check:
+        get_enrichment_worker().submit(check_trusted_report_in_background, new_issue.id)
+    
+    # Keep the description embedding for duplicate detection and re-classification
+    with span("embedding.store"):
+        store_issue_embedding(new_issue.id, embedding, db)
     
     # Create notification for authority about new issue
-    create_notification_for_authority(new_issue, db)
-    db.commit()  # Commit the notification
+    with span("notification"):
+        create_notification_for_authority(new_issue, db)
+        db.commit()  # Commit the notification
     
     # Load relationships for response
     issue_with_relations = db.query(Issue).options(
@@ -574,6 +1121,7 @@ async def create_issue_with_files(
     db.add(new_issue)
     db.commit()
     db.refresh(new_issue)
+    index_issue(new_issue, authority.district)
     
     # Handle file uploads
     uploaded_files = []
@@ -753,6 +1301,10 @@ def update_issue(
     db.commit()
     db.refresh(issue)
     
+    # Edited text is re-indexed; resolved and closed issues leave the near-duplicate index
+    if "description" in update_data or "location" in update_data or "status" in update_data:
+        index_issue(issue, issue.authority.district)
+    
     # Create notification for user about issue update
     create_notification_for_user(issue, db)
     db.commit()  # Commit the notification
@@ -784,6 +1336,7 @@ def delete_issue(
     
     db.delete(issue)
     db.commit()
+    unindex_issue(issue_id)
     
     return
 
@@ -114,6 +114,7 @@ class IssueResponse(BaseModel):
     updated_at: datetime
     priority: int
     category: str
+    enrichment_status: str = Field("complete", description="AI enrichment state: pending, complete, merged, spam, failed or spam_check (deferred spam check of a trusted reporter)")
     
     # Related data
     user: IssueUserResponse
@@ -136,7 +137,8 @@ class IssueDuplicateResponse(BaseModel):
     message: str
     existing_issue: IssueResponse
     auto_upvoted: bool = Field(..., description="Whether the user's vote was automatically added")
-    distance_meters: float = Field(..., description="Distance from the new location to existing issue")
+    distance_meters: Optional[float] = Field(..., description="Distance from the new location to existing issue (None when a location could not be parsed)")
+    similarity: Optional[float] = Field(None, description="Cosine similarity of the descriptions when matched semantically, estimated Jaccard similarity when matched as near-identical text")
     
     class Config:
         from_attributes = True
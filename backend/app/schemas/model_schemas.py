@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+# Category model registry schemas
+class ModelVersionRequest(BaseModel):
+    """Model version to activate"""
+    version: Optional[str] = Field(None, description="Version directory name; null clears the shadow model")
@@ -0,0 +1,129 @@
+"""
+Concurrent execution of the AI stages used when creating an issue.
+
+Each stage (spam check, category, priority, radius, ...) runs in a shared
+thread pool with its own deadline. A stage that times out or raises is
+replaced by its fallback value, so end-to-end latency is bounded by the
+slowest stage instead of the sum of all of them.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.metrics import record_span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[], Any]
+    fallback: Any
+    timeout: float  # Seconds, measured from the moment all stages are submitted
+
+
+@dataclass
+class StageResult:
+    name: str
+    value: Any
+    status: str  # "ok", "timeout" or "error"
+    elapsed_ms: float
+    error: Optional[str] = None
+
+
+class PipelineStats:
+    """Per-stage timing and outcome counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, result: StageResult):
+        with self._lock:
+            stage = self._stages.setdefault(result.name, {
+                "count": 0, "ok": 0, "timeout": 0, "error": 0, "total_ms": 0.0, "max_ms": 0.0
+            })
+            stage["count"] += 1
+            stage[result.status] += 1
+            stage["total_ms"] += result.elapsed_ms
+            stage["max_ms"] = max(stage["max_ms"], result.elapsed_ms)
+
+    def average_ms(self, name: str) -> float:
+        """Mean duration of a stage so far, 0 before it has run"""
+        with self._lock:
+            stage = self._stages.get(name)
+            return stage["total_ms"] / stage["count"] if stage and stage["count"] else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "count": stage["count"],
+                    "ok": stage["ok"],
+                    "timeout": stage["timeout"],
+                    "error": stage["error"],
+                    "avg_ms": round(stage["total_ms"] / stage["count"], 2) if stage["count"] else 0.0,
+                    "max_ms": round(stage["max_ms"], 2)
+                }
+                for name, stage in self._stages.items()
+            }
+
+
+pipeline_stats = PipelineStats()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_pipeline_executor() -> ThreadPoolExecutor:
+    """Shared thread pool for AI stages"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.AI_PIPELINE_MAX_WORKERS,
+                    thread_name_prefix="ai-stage"
+                )
+    return _executor
+
+
+def run_stages(stages: List[Stage], executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, StageResult]:
+    """Run all stages concurrently and return their results keyed by stage name"""
+    executor = executor or get_pipeline_executor()
+    durations = {}
+
+    def timed(stage: Stage):
+        started = time.perf_counter()
+        try:
+            return stage.func()
+        finally:
+            durations[stage.name] = (time.perf_counter() - started) * 1000
+
+    submitted_at = time.perf_counter()
+    futures = {stage.name: executor.submit(timed, stage) for stage in stages}
+
+    results = {}
+    for stage in stages:
+        remaining = stage.timeout - (time.perf_counter() - submitted_at)
+        future = futures[stage.name]
+        try:
+            value = future.result(timeout=max(0.0, remaining))
+            result = StageResult(stage.name, value, "ok", durations.get(stage.name, 0.0))
+        except FuturesTimeoutError:
+            # The worker keeps running in the background; its late answer is discarded
+            future.cancel()
+            logger.warning(f"AI stage '{stage.name}' timed out after {stage.timeout}s, using fallback")
+            result = StageResult(stage.name, stage.fallback, "timeout", stage.timeout * 1000)
+        except Exception as e:
+            logger.warning(f"AI stage '{stage.name}' failed, using fallback: {str(e)}")
+            result = StageResult(stage.name, stage.fallback, "error", durations.get(stage.name, 0.0), str(e))
+        pipeline_stats.record(result)
+        record_span(f"stage.{stage.name}", result.elapsed_ms)
+        results[stage.name] = result
+    return results
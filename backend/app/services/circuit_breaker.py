@@ -0,0 +1,175 @@
+"""
+Circuit breakers for the LLM providers.
+
+Each provider in the LLM_PROVIDERS failover list gets a breaker that watches
+its recent calls. When the error rate or the share of slow calls over the
+last LLM_BREAKER_WINDOW calls crosses its threshold the breaker opens and the
+provider is skipped for LLM_BREAKER_OPEN_SECONDS; after that one trial call is
+let through (half-open) and its outcome closes or re-opens the breaker. With
+every provider open, LLM calls fail immediately with ProvidersUnavailableError
+so callers go straight to their local defaults instead of waiting for a
+timeout.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.llm_limiter import LLMOverloadedError
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProvidersUnavailableError(LLMOverloadedError):
+    """Every provider's breaker is open; retry after `retry_after` seconds"""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        slow_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None
+    ):
+        self.name = name
+        self.window = window or settings.LLM_BREAKER_WINDOW
+        self.min_calls = min_calls or settings.LLM_BREAKER_MIN_CALLS
+        self.error_rate = error_rate or settings.LLM_BREAKER_ERROR_RATE
+        self.slow_call_seconds = slow_call_seconds or settings.LLM_BREAKER_SLOW_CALL_SECONDS
+        self.slow_rate = slow_rate or settings.LLM_BREAKER_SLOW_RATE
+        self.open_seconds = settings.LLM_BREAKER_OPEN_SECONDS if open_seconds is None else open_seconds
+
+        self._lock = threading.Lock()
+        # (failed, slow) per recent call
+        self._outcomes = deque(maxlen=self.window)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.last_error: Optional[str] = None
+
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def _refresh(self):
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+
+    def available(self) -> bool:
+        """Whether a call would be let through now (does not claim the half-open trial)"""
+        with self._lock:
+            self._refresh()
+            return self.state == CLOSED or (self.state == HALF_OPEN and not self._trial_in_flight)
+
+    def allow(self) -> bool:
+        """Claim permission for one call; in half-open state only one trial runs at a time"""
+        with self._lock:
+            self._refresh()
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self, elapsed: float):
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            self.successes += 1
+            if self.state == HALF_OPEN:
+                if slow:
+                    self._open(f"trial call took {elapsed:.1f}s")
+                    return
+                logger.info(f"LLM provider {self.name} recovered, closing circuit")
+                self.state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append((False, slow))
+            self._check()
+
+    def record_failure(self, elapsed: float, error: str):
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN:
+                self._open(f"trial call failed: {error}")
+                return
+            self._outcomes.append((True, elapsed >= self.slow_call_seconds))
+            self._check()
+
+    def _check(self):
+        if self.state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        calls = len(self._outcomes)
+        error_rate = sum(1 for failed, _ in self._outcomes if failed) / calls
+        slow_rate = sum(1 for _, slow in self._outcomes if slow) / calls
+        if error_rate >= self.error_rate:
+            self._open(f"error rate {error_rate:.0%} over the last {calls} calls")
+        elif slow_rate >= self.slow_rate:
+            self._open(f"{slow_rate:.0%} of the last {calls} calls slower than {self.slow_call_seconds}s")
+
+    def _open(self, reason: str):
+        logger.warning(f"Opening circuit for LLM provider {self.name}: {reason}")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def status(self) -> dict:
+        with self._lock:
+            self._refresh()
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": calls,
+                "recent_error_rate": round(sum(1 for failed, _ in self._outcomes if failed) / calls, 4) if calls else 0.0,
+                "recent_slow_rate": round(sum(1 for _, slow in self._outcomes if slow) / calls, 4) if calls else 0.0,
+                "retry_after_seconds": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1) if self.state == OPEN else 0.0,
+                "successes": self.successes,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "times_opened": self.times_opened,
+                "last_error": self.last_error
+            }
+
+
+def parse_provider_list(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_provider_breaker(name: str) -> CircuitBreaker:
+    """Breaker for one provider, created on first use"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def provider_breakers_status() -> dict:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.status() for name, breaker in breakers.items()}
@@ -0,0 +1,247 @@
+"""
+Issue category classifier service.
+
+Loads the RoBERTa tokenizer/encoder and the model_new.h5 classification head
+once per process, warms them up and serves predictions to request handlers.
+torch, transformers and h5py are imported when the models are loaded, not when
+this module is imported, so processes that never classify do not pay for them.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import warnings
+from functools import partial
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Output index of the classification head -> authority category
+CATEGORIES = ["Road Authority", "Dumping/Waste Authority", "Public Amenities Authority", "Electricity Company"]
+DEFAULT_CATEGORY = "Road Authority"
+
+WARMUP_TEXT = "There is a large pothole on the main road near the bus stop."
+
+# Written by distill_classifier.py / export_onnx_classifier.py next to a model
+MODEL_INFO_FILE = "model_info.json"
+
+
+def read_model_info(model_dir: str) -> dict:
+    """Metadata (encoder name, training metrics) stored next to a model, empty if absent"""
+    path = os.path.join(model_dir, MODEL_INFO_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CategoryClassifier:
+    """RoBERTa [CLS] embeddings followed by the model_new.h5 dense head"""
+
+    backend = "keras"
+    # The head runs separately from the encoder, so stored [CLS] embeddings can be scored without re-encoding
+    supports_head_scoring = True
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        encoder_name: Optional[str] = None,
+        max_length: Optional[int] = None
+    ):
+        self.model_path = model_path or settings.CLASSIFIER_MODEL_PATH
+        self.encoder_name = encoder_name or settings.CLASSIFIER_ENCODER_NAME
+        self.max_length = max_length or settings.CLASSIFIER_MAX_LENGTH
+
+        self.tokenizer = None
+        self.encoder = None
+        self.head = None
+
+        self.ready = False
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self._load_attempted = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load tokenizer, encoder and classification head, then run a warmup inference"""
+        with self._lock:
+            if self.ready:
+                return
+            self._load_attempted = True
+            start = time.perf_counter()
+            try:
+                if not os.path.exists(self.model_path):
+                    raise FileNotFoundError(f"Model file not found at: {self.model_path}")
+
+                self._load_models()
+                self.load_seconds = time.perf_counter() - start
+
+                warmup_start = time.perf_counter()
+                self.predict([WARMUP_TEXT])
+                self.warmup_seconds = time.perf_counter() - warmup_start
+
+                self.ready = True
+                self.load_error = None
+                logger.info(
+                    f"Category classifier ({self.backend}) ready (load {self.load_seconds:.2f}s, "
+                    f"warmup {self.warmup_seconds:.2f}s)"
+                )
+            except Exception as e:
+                self.load_error = str(e)
+                logger.error(f"Failed to load category classifier: {str(e)}")
+                raise
+
+    def _load_models(self):
+        from transformers import RobertaTokenizer, RobertaModel
+        from app.services.numpy_head import NumpyDenseHead
+
+        # Suppress warnings for cleaner output
+        warnings.filterwarnings("ignore", category=UserWarning)
+
+        tokenizer = RobertaTokenizer.from_pretrained(self.encoder_name)
+        encoder = RobertaModel.from_pretrained(self.encoder_name)
+        encoder.eval()
+        # The dense head runs in NumPy, so TensorFlow is not needed to serve it
+        head = NumpyDenseHead.from_h5(self.model_path)
+
+        self.tokenizer = tokenizer
+        self.encoder = encoder
+        self.head = head
+
+    def ensure_loaded(self) -> bool:
+        """Load the classifier on first use. A failed load is not retried on every request."""
+        if self.ready:
+            return True
+        if self._load_attempted and self.load_error:
+            return False
+        try:
+            self.load()
+        except Exception:
+            return False
+        return self.ready
+
+    def start_background_load(self) -> threading.Thread:
+        """Load the classifier in a daemon thread so startup is not blocked"""
+        thread = threading.Thread(target=self.ensure_loaded, name="classifier-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Return the [CLS] token embeddings (batch, 768) for a list of texts"""
+        import torch
+
+        tokenized = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            truncation=True,
+            padding=True,
+            max_length=self.max_length
+        )
+        with torch.no_grad():
+            outputs = self.encoder(**tokenized)
+            # Use the [CLS] token embedding (first token)
+            return outputs.last_hidden_state[:, 0, :].numpy()
+
+    def predict_proba(self, embeddings: np.ndarray) -> np.ndarray:
+        """Run the classification head over a batch of embeddings.
+        Only available when supports_head_scoring is set; callers must check it first."""
+        if not self.supports_head_scoring:
+            raise TypeError(f"{type(self).__name__} has no separate classification head; check supports_head_scoring")
+        return self.head(embeddings)
+
+    def predict_with_embeddings(self, texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Classify a batch and also return the [CLS] embeddings so callers can persist them"""
+        with span("classifier.encoder"):
+            embeddings = self.embed(texts)
+        with span("classifier.head"):
+            probabilities = self.predict_proba(embeddings)
+        return [CATEGORIES[index] for index in np.argmax(probabilities, axis=1)], embeddings
+
+    def predict(self, texts: List[str]) -> List[str]:
+        """Classify a batch of descriptions into authority categories"""
+        if not texts:
+            return []
+        return self.predict_with_embeddings(texts)[0]
+
+    def close(self):
+        """Release resources held outside this process (nothing for the in-process classifier)"""
+
+    @property
+    def embedding_model(self) -> str:
+        """Identifies which encoder produced an embedding; vectors from different models are not comparable"""
+        return f"{self.encoder_name}/{self.backend}"
+
+    def status(self) -> dict:
+        """Readiness information for health checks"""
+        return {
+            "ready": self.ready,
+            "backend": self.backend,
+            "model_path": self.model_path,
+            "encoder": self.encoder_name,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "error": self.load_error
+        }
+
+
+def create_classifier(
+    backend: Optional[str] = None,
+    variant: Optional[str] = None,
+    pooled: Optional[bool] = None,
+    model_path: Optional[str] = None
+) -> CategoryClassifier:
+    """Build the classifier selected by CLASSIFIER_VARIANT (which model) and CLASSIFIER_BACKEND (which runtime).
+    With CLASSIFIER_POOL_ENABLED the model is hosted in a separate inference process pool.
+    model_path overrides the configured model file (used by the model registry)."""
+    backend = (backend or settings.CLASSIFIER_BACKEND).lower()
+    variant = (variant or settings.CLASSIFIER_VARIANT).lower()
+    pooled = settings.CLASSIFIER_POOL_ENABLED if pooled is None else pooled
+    if variant not in ("base", "distilled"):
+        raise ValueError(f"Unknown classifier variant '{variant}'. Expected 'base' or 'distilled'")
+    if pooled:
+        from app.services.inference_pool import PooledCategoryClassifier
+        # Built here only to describe the model; each worker builds and loads its own copy
+        local = create_classifier(backend, variant, False, model_path)
+        return PooledCategoryClassifier(
+            factory=partial(create_classifier, backend, variant, False, model_path),
+            model_path=local.model_path,
+            encoder_name=local.encoder_name,
+            embedding_model=local.embedding_model
+        )
+    if backend == "keras":
+        if variant == "distilled":
+            from app.services.distilled_classifier import DistilledCategoryClassifier
+            return DistilledCategoryClassifier(model_path=model_path)
+        return CategoryClassifier(model_path=model_path)
+    if backend == "onnx":
+        from app.services.onnx_classifier import OnnxCategoryClassifier
+        if variant == "distilled":
+            return OnnxCategoryClassifier(model_path=model_path or settings.CLASSIFIER_DISTILLED_ONNX_PATH)
+        return OnnxCategoryClassifier(model_path=model_path)
+    raise ValueError(f"Unknown classifier backend '{backend}'. Expected 'keras' or 'onnx'")
+
+
+# Singleton instance
+_classifier_service = None
+_classifier_service_lock = threading.Lock()
+
+def get_classifier_service() -> CategoryClassifier:
+    """Get singleton instance of the category classifier.
+    With CLASSIFIER_REGISTRY_ENABLED this is the registry's current primary version."""
+    if settings.CLASSIFIER_REGISTRY_ENABLED:
+        from app.services.model_registry import get_model_registry
+        return get_model_registry().primary
+    global _classifier_service
+    if _classifier_service is None:
+        with _classifier_service_lock:
+            if _classifier_service is None:
+                _classifier_service = create_classifier()
+    return _classifier_service
@@ -0,0 +1,253 @@
+"""
+Micro-batching front end for the category classifier.
+
+Descriptions submitted by concurrent requests are queued on a dedicated asyncio
+event loop, collected for a short window (up to max_batch_size items or
+max_wait_ms) and classified together in one padded forward pass.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.classifier import CategoryClassifier, get_classifier_service
+from app.services.model_registry import leased_classifier, record_inference, record_inference_error
+
+logger = logging.getLogger(__name__)
+
+
+class BatcherStats:
+    """Batch-size and queue-wait metrics for the batcher"""
+
+    def __init__(self, sample_size: int = 1000):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.max_batch_size = 0
+        self.batch_size_counts = {}
+        self._queue_waits_ms = deque(maxlen=sample_size)
+
+    def record_batch(self, batch_size: int, queue_waits_ms: List[float]):
+        with self._lock:
+            self.batches += 1
+            self.items += batch_size
+            self.max_batch_size = max(self.max_batch_size, batch_size)
+            self.batch_size_counts[batch_size] = self.batch_size_counts.get(batch_size, 0) + 1
+            self._queue_waits_ms.extend(queue_waits_ms)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._queue_waits_ms)
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+                "queue_wait_ms": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p50": round(_percentile(waits, 50), 3),
+                    "p99": round(_percentile(waits, 99), 3),
+                    "max": round(waits[-1], 3) if waits else 0.0
+                }
+            }
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ClassifierBatcher:
+    def __init__(
+        self,
+        classifier: Optional[CategoryClassifier] = None,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        # None follows get_classifier_service(), so a hot-swapped model version is picked up by the next batch
+        self._classifier = classifier
+        self.max_batch_size = max_batch_size or settings.CLASSIFIER_BATCH_MAX_SIZE
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else settings.CLASSIFIER_BATCH_MAX_WAIT_MS
+        self.stats = BatcherStats()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        # Model calls run off the event loop; an in-process model takes one batch at a time,
+        # a process pool one batch per worker
+        self.max_concurrency = max(1, getattr(self.classifier, "max_concurrency", 1))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="classifier-batch")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def classifier(self) -> CategoryClassifier:
+        return self._classifier or get_classifier_service()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the batching event loop in a background thread"""
+        with self._lock:
+            if not self.running:
+                self._started.clear()
+                self._thread = threading.Thread(target=self._run_loop, name="classifier-batcher", daemon=True)
+                self._thread.start()
+        # Concurrent first callers all wait until the loop exists
+        self._started.wait()
+
+    def stop(self):
+        """Stop the event loop; queued requests are cancelled"""
+        with self._lock:
+            if not self.running:
+                return
+            self._loop.call_soon_threadsafe(self._worker_task.cancel)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._worker_task = self._loop.create_task(self._batch_worker())
+        self._started.set()
+        try:
+            self._loop.run_until_complete(self._worker_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Fail anything still waiting so callers do not hang until their timeout
+            in_flight = asyncio.all_tasks(self._loop)
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                self._loop.run_until_complete(asyncio.gather(*in_flight, return_exceptions=True))
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+            self._loop.close()
+
+    async def _enqueue(self, text: str) -> Tuple[str, np.ndarray]:
+        future = self._loop.create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """Wait for the first item, then keep collecting until the batch is full or the window closes"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_worker(self):
+        while True:
+            batch = await self._collect_batch()
+            await self._slots.acquire()
+            self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        try:
+            dispatched_at = time.perf_counter()
+            texts = [text for text, _, _ in batch]
+            queue_waits_ms = [(dispatched_at - enqueued_at) * 1000 for _, _, enqueued_at in batch]
+
+            # A hot-swapped version is not closed while this batch still runs on it
+            with leased_classifier(self._classifier) as classifier:
+                try:
+                    labels, embeddings = await self._loop.run_in_executor(
+                        self._executor, classifier.predict_with_embeddings, texts
+                    )
+                except Exception as e:
+                    logger.error(f"Batched classification of {len(batch)} items failed: {str(e)}")
+                    self.stats.record_error()
+                    record_inference_error(classifier)
+                    for _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+                except asyncio.CancelledError:
+                    for _, future, _ in batch:
+                        future.cancel()
+                    raise
+
+            self.stats.record_batch(len(batch), queue_waits_ms)
+            record_inference(classifier, texts, labels, time.perf_counter() - dispatched_at)
+            for (_, future, _), label, embedding in zip(batch, labels, embeddings):
+                if not future.done():
+                    future.set_result((label, embedding))
+        finally:
+            self._slots.release()
+
+    def classify_with_embedding_sync(self, text: str, timeout: Optional[float] = None) -> Tuple[str, np.ndarray]:
+        """Classify one description from a worker thread, sharing a batch with concurrent callers.
+        Returns the category and the description's [CLS] embedding."""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(text), self._loop)
+        return future.result(timeout if timeout is not None else settings.CLASSIFIER_BATCH_TIMEOUT_SECONDS)
+
+    def classify_sync(self, text: str, timeout: Optional[float] = None) -> str:
+        """Classify one description from a worker thread, sharing a batch with concurrent callers"""
+        return self.classify_with_embedding_sync(text, timeout)[0]
+
+    async def classify(self, text: str) -> str:
+        """Classify one description from any event loop"""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(text), self._loop)
+        label, _ = await asyncio.wait_for(asyncio.wrap_future(future), settings.CLASSIFIER_BATCH_TIMEOUT_SECONDS)
+        return label
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_concurrency": self.max_concurrency,
+            **self.stats.snapshot()
+        }
+
+
+# Singleton instance
+_classifier_batcher = None
+_classifier_batcher_lock = threading.Lock()
+
+def get_classifier_batcher() -> ClassifierBatcher:
+    """Get singleton instance of the classifier batcher"""
+    global _classifier_batcher
+    if _classifier_batcher is None:
+        with _classifier_batcher_lock:
+            if _classifier_batcher is None:
+                _classifier_batcher = ClassifierBatcher()
+    return _classifier_batcher
+
+def existing_classifier_batcher() -> Optional[ClassifierBatcher]:
+    """The batcher if something has used it, without creating it (and the classifier behind it)"""
+    return _classifier_batcher
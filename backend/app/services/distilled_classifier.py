@@ -0,0 +1,64 @@
+"""
+Serving path for the distilled issue category model.
+
+Loads the small encoder + classification layer written by
+distill_classifier.py (a Hugging Face sequence classification checkpoint)
+and serves it through the same interface as the RoBERTa-base pipeline.
+"""
+
+import warnings
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.metrics import span
+from app.services.classifier import CategoryClassifier, CATEGORIES, read_model_info
+
+
+class DistilledCategoryClassifier(CategoryClassifier):
+    """Fine-tuned small encoder with its own classification layer"""
+
+    backend = "distilled"
+    supports_head_scoring = False  # The fine-tuned model has its own classification layer
+
+    def __init__(self, model_path: Optional[str] = None, **kwargs):
+        super().__init__(model_path=model_path or settings.CLASSIFIER_DISTILLED_PATH, **kwargs)
+        self.model = None
+
+    def _load_models(self):
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        warnings.filterwarnings("ignore", category=UserWarning)
+
+        # Tag embeddings with the student encoder instead of roberta-base
+        self.encoder_name = read_model_info(self.model_path).get("encoder", "distilled")
+
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
+        model.eval()
+        labels = [model.config.id2label[index] for index in range(model.config.num_labels)]
+        if labels != CATEGORIES:
+            raise ValueError(f"Distilled model labels {labels} do not match {CATEGORIES}")
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        self.model = model
+
+    def predict_with_embeddings(self, texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        import torch
+
+        tokenized = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            truncation=True,
+            padding=True,
+            max_length=self.max_length
+        )
+        with torch.no_grad(), span("classifier.distilled"):
+            outputs = self.model(**tokenized, output_hidden_states=True)
+        # [CLS] token of the last encoder layer, as in the RoBERTa-base pipeline
+        embeddings = outputs.hidden_states[-1][:, 0, :].numpy()
+        indices = outputs.logits.argmax(dim=-1).tolist()
+        return [CATEGORIES[index] for index in indices], embeddings
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.predict_with_embeddings(texts)[1]
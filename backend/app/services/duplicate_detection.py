@@ -0,0 +1,104 @@
+"""
+Duplicate issue matching on geography and description embeddings.
+
+Candidates are the open issues of a district. The geo window keeps those
+within the larger of the two issues' radii (haversine, vectorized over the
+candidate set). When semantic matching is enabled and the new issue has an
+embedding, candidates inside the window are scored by cosine similarity of
+their stored description embeddings: a candidate in the same category must
+reach SEMANTIC_DUPLICATE_THRESHOLD, one in another category the stricter
+SEMANTIC_DUPLICATE_CROSS_CATEGORY_THRESHOLD. Candidates without a stored
+embedding fall back to the plain rule (same category inside the window).
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+EARTH_RADIUS_METERS = 6371000
+
+
+@dataclass
+class DuplicateMatch:
+    index: int  # Position in the candidate list
+    distance_meters: float
+    similarity: Optional[float] = None  # Cosine similarity, None when matched on geography alone
+
+
+def haversine_distances(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distances in meters from one point to many (same formula as calculate_distance)"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def cosine_similarities(vector: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of one vector against each row of a matrix"""
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    return (matrix @ vector) / np.maximum(norms, 1e-12)
+
+
+def select_duplicate(
+    category: str,
+    lat: float,
+    lon: float,
+    radius: int,
+    candidate_categories: List[str],
+    candidate_lats: np.ndarray,
+    candidate_lons: np.ndarray,
+    candidate_radii: np.ndarray,
+    embedding: Optional[np.ndarray] = None,
+    candidate_embeddings: Optional[np.ndarray] = None,
+    has_embedding: Optional[np.ndarray] = None,
+    threshold: Optional[float] = None,
+    cross_category_threshold: Optional[float] = None
+) -> Optional[DuplicateMatch]:
+    """Pick the best duplicate among the candidates, or None.
+
+    candidate_embeddings has one row per candidate; rows where has_embedding is
+    False are ignored. Without an embedding for the new issue only the plain
+    geo + category rule is applied.
+    """
+    if not candidate_categories:
+        return None
+    threshold = settings.SEMANTIC_DUPLICATE_THRESHOLD if threshold is None else threshold
+    cross_category_threshold = (
+        settings.SEMANTIC_DUPLICATE_CROSS_CATEGORY_THRESHOLD
+        if cross_category_threshold is None else cross_category_threshold
+    )
+
+    distances = haversine_distances(lat, lon, candidate_lats, candidate_lons)
+    in_window = distances <= np.maximum(radius, candidate_radii)
+    same_category = np.array([c == category for c in candidate_categories])
+
+    if embedding is None or candidate_embeddings is None:
+        geo_matches = np.flatnonzero(in_window & same_category)
+        if len(geo_matches) == 0:
+            return None
+        best = int(geo_matches[np.argmin(distances[geo_matches])])
+        return DuplicateMatch(best, float(distances[best]))
+
+    has_embedding = np.ones(len(candidate_categories), dtype=bool) if has_embedding is None else has_embedding
+    similarities = np.full(len(candidate_categories), -1.0, dtype=np.float32)
+    scored = in_window & has_embedding
+    if scored.any():
+        similarities[scored] = cosine_similarities(embedding, candidate_embeddings[scored])
+
+    required = np.where(same_category, threshold, cross_category_threshold)
+    semantic_matches = np.flatnonzero(scored & (similarities >= required))
+    if len(semantic_matches):
+        best = int(semantic_matches[np.argmax(similarities[semantic_matches])])
+        return DuplicateMatch(best, float(distances[best]), float(similarities[best]))
+
+    # Older issues without a stored embedding keep the geo + category rule
+    geo_matches = np.flatnonzero(in_window & same_category & ~has_embedding)
+    if len(geo_matches) == 0:
+        return None
+    best = int(geo_matches[np.argmin(distances[geo_matches])])
+    return DuplicateMatch(best, float(distances[best]))
@@ -0,0 +1,79 @@
+"""
+Persisted description embeddings per issue.
+
+The [CLS] embedding computed while classifying an issue is stored as a
+float32 blob in the issue_embeddings table, keyed by Issue.id and tagged with
+the encoder that produced it. Duplicate detection, semantic search and
+re-classification can load the vectors instead of re-running the encoder.
+Rows are removed together with their issue (ON DELETE CASCADE).
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models import IssueEmbedding
+
+logger = logging.getLogger(__name__)
+
+# Stored byte order is fixed so vectors stay readable across machines
+VECTOR_DTYPE = np.dtype("<f4")
+
+
+def vector_to_bytes(vector) -> bytes:
+    return np.asarray(vector, dtype=VECTOR_DTYPE).reshape(-1).tobytes()
+
+
+def bytes_to_vector(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=VECTOR_DTYPE)
+
+
+def save_issue_embedding(db: Session, issue_id: UUID, vector, model: str, commit: bool = True):
+    """Insert or replace the embedding of one issue"""
+    data = vector_to_bytes(vector)
+    db.merge(IssueEmbedding(
+        issue_id=issue_id,
+        model=model,
+        dim=len(data) // VECTOR_DTYPE.itemsize,
+        vector=data
+    ))
+    if commit:
+        db.commit()
+
+
+def save_issue_embeddings(db: Session, items: Iterable[Tuple[UUID, np.ndarray]], model: str):
+    """Store a batch of embeddings in one transaction (used by the backfill)"""
+    for issue_id, vector in items:
+        save_issue_embedding(db, issue_id, vector, model, commit=False)
+    db.commit()
+
+
+def get_issue_embedding(db: Session, issue_id: UUID, model: Optional[str] = None) -> Optional[np.ndarray]:
+    query = db.query(IssueEmbedding).filter(IssueEmbedding.issue_id == issue_id)
+    if model is not None:
+        query = query.filter(IssueEmbedding.model == model)
+    entry = query.first()
+    return bytes_to_vector(entry.vector) if entry else None
+
+
+def get_issue_embeddings(db: Session, issue_ids: List[UUID], model: Optional[str] = None) -> Dict[UUID, np.ndarray]:
+    """Embeddings for the given issues; issues without a stored vector are missing from the result"""
+    if not issue_ids:
+        return {}
+    query = db.query(IssueEmbedding.issue_id, IssueEmbedding.vector).filter(IssueEmbedding.issue_id.in_(issue_ids))
+    if model is not None:
+        query = query.filter(IssueEmbedding.model == model)
+    return {issue_id: bytes_to_vector(vector) for issue_id, vector in query.all()}
+
+
+def get_embedding_matrix(db: Session, issue_ids: List[UUID], model: Optional[str] = None) -> Tuple[List[UUID], np.ndarray]:
+    """Stack the stored embeddings of the given issues into a (n, dim) float32 matrix.
+    Returns the ids in row order; issues without a vector are skipped."""
+    vectors = get_issue_embeddings(db, issue_ids, model)
+    ids = [issue_id for issue_id in issue_ids if issue_id in vectors]
+    if not ids:
+        return [], np.empty((0, 0), dtype=np.float32)
+    return ids, np.stack([vectors[issue_id] for issue_id in ids]).astype(np.float32, copy=False)
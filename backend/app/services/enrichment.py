@@ -0,0 +1,160 @@
+"""
+Combined LLM enrichment for new issues.
+
+Asks for the spam verdict, priority and duplicate radius of a description in a
+single get_query_response call (system_prompt5.txt) and strictly validates the
+JSON answer field by field. Fields that are missing or invalid are left as
+None so the caller can fall back to the dedicated per-field prompt.
+"""
+
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.config import settings
+from app.util import get_query_response
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_PROMPT = "system_prompt5.txt"
+
+ALLOWED_AI_PRIORITIES = {0, 1, 2}
+ALLOWED_RADII = {5, 20, 50, 100}
+
+# Same bounds the single-prompt radius path applies
+MIN_RADIUS = 50
+MAX_RADIUS = 5000
+
+
+def map_ai_priority(level: int) -> int:
+    """Map AI priority (0=normal, 1=urgent, 2=severe) to our scale (1-3)"""
+    return {0: 1, 1: 2, 2: 3}.get(level, 1)
+
+
+def clamp_radius(radius: int) -> int:
+    """Ensure radius is within reasonable bounds"""
+    return max(MIN_RADIUS, min(MAX_RADIUS, radius))
+
+
+@dataclass
+class EnrichmentResult:
+    is_spam: Optional[bool] = None
+    reason: Optional[str] = None
+    priority: Optional[int] = None  # Already mapped to our 1-3 scale
+    radius: Optional[int] = None  # Already clamped to MIN_RADIUS..MAX_RADIUS
+    verdict: Optional[str] = None  # Raw system_prompt4.txt answer when the spam check ran on its own
+    errors: list = field(default_factory=list)
+
+    @property
+    def spam_verdict(self) -> Optional[str]:
+        """Verdict string in the same shape as the system_prompt4.txt answer"""
+        if self.verdict is not None:
+            return self.verdict
+        if self.is_spam is None:
+            return None
+        label = "SPAM" if self.is_spam else "LEGITIMATE"
+        return f"{label} - {self.reason}" if self.reason else label
+
+    @property
+    def missing_fields(self) -> list:
+        return [name for name in ("is_spam", "priority", "radius") if getattr(self, name) is None]
+
+
+def _extract_json_object(text: str) -> dict:
+    """Pull the JSON object out of the answer, tolerating code fences around it"""
+    cleaned = re.sub(r"^```(?:json)?|```$", "", text.strip(), flags=re.MULTILINE).strip()
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object in enrichment response")
+    parsed = json.loads(cleaned[start:end + 1])
+    if not isinstance(parsed, dict):
+        raise ValueError("Enrichment response is not a JSON object")
+    return parsed
+
+
+def _is_strict_int(value) -> bool:
+    # bool is a subclass of int, but true/false is never a valid priority or radius
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_enrichment_response(text: str) -> EnrichmentResult:
+    """Validate each field of the combined answer independently"""
+    result = EnrichmentResult()
+    try:
+        payload = _extract_json_object(text)
+    except (ValueError, json.JSONDecodeError) as e:
+        result.errors.append(f"response: {str(e)}")
+        return result
+
+    spam = payload.get("spam")
+    if isinstance(spam, bool):
+        result.is_spam = spam
+    else:
+        result.errors.append(f"spam: expected true/false, got {spam!r}")
+
+    reason = payload.get("reason")
+    if isinstance(reason, str) and reason.strip():
+        result.reason = reason.strip()
+
+    priority = payload.get("priority")
+    if _is_strict_int(priority) and priority in ALLOWED_AI_PRIORITIES:
+        result.priority = map_ai_priority(priority)
+    else:
+        result.errors.append(f"priority: expected one of {sorted(ALLOWED_AI_PRIORITIES)}, got {priority!r}")
+
+    radius = payload.get("radius")
+    if _is_strict_int(radius) and radius in ALLOWED_RADII:
+        result.radius = clamp_radius(radius)
+    else:
+        result.errors.append(f"radius: expected one of {sorted(ALLOWED_RADII)}, got {radius!r}")
+
+    return result
+
+
+class EnrichmentStats:
+    """Counters for comparing the combined call with the three-call path"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failed_calls = 0
+        self.field_fallbacks = {"is_spam": 0, "priority": 0, "radius": 0}
+
+    def record(self, result: EnrichmentResult, call_failed: bool):
+        with self._lock:
+            self.calls += 1
+            if call_failed:
+                self.failed_calls += 1
+            for name in result.missing_fields:
+                self.field_fallbacks[name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "failed_calls": self.failed_calls,
+                "field_fallbacks": dict(self.field_fallbacks)
+            }
+
+
+enrichment_stats = EnrichmentStats()
+
+
+def request_enrichment(description: str) -> EnrichmentResult:
+    """One LLM round trip for spam, priority and radius"""
+    try:
+        response = get_query_response(description, ENRICHMENT_PROMPT, max_queue_wait=settings.LLM_DEGRADABLE_QUEUE_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"Combined enrichment call failed: {str(e)}")
+        result = EnrichmentResult(errors=[f"call: {str(e)}"])
+        enrichment_stats.record(result, call_failed=True)
+        return result
+
+    result = parse_enrichment_response(response)
+    if result.errors:
+        logger.warning(f"Combined enrichment response partially invalid: {'; '.join(result.errors)}")
+    enrichment_stats.record(result, call_failed=False)
+    return result
@@ -0,0 +1,86 @@
+"""
+Background worker for post-create issue enrichment.
+
+When AI_ENRICHMENT_ASYNC is enabled, POST /api/issues stores a provisional
+record and hands the issue id to this worker. Jobs run on a small thread pool
+so slow LLM and classifier calls never hold up the request that created the
+issue.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from uuid import UUID
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentWorker:
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.AI_ENRICHMENT_WORKERS
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="issue-enrichment"
+                )
+            return self._executor
+
+    def submit(self, job: Callable[[UUID], None], issue_id: UUID):
+        """Queue the enrichment job for one issue"""
+        with self._lock:
+            self.submitted += 1
+        return self._get_executor().submit(self._run, job, issue_id)
+
+    def _run(self, job: Callable[[UUID], None], issue_id: UUID):
+        try:
+            job(issue_id)
+        except Exception as e:
+            logger.exception(f"Background enrichment failed for issue {issue_id}: {str(e)}")
+            with self._lock:
+                self.failed += 1
+            return
+        with self._lock:
+            self.completed += 1
+
+    def stop(self, wait: bool = False):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.AI_ENRICHMENT_ASYNC,
+                "workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.submitted - self.completed - self.failed
+            }
+
+
+# Singleton instance
+_enrichment_worker = None
+_enrichment_worker_lock = threading.Lock()
+
+def get_enrichment_worker() -> EnrichmentWorker:
+    """Get singleton instance of the background enrichment worker"""
+    global _enrichment_worker
+    if _enrichment_worker is None:
+        with _enrichment_worker_lock:
+            if _enrichment_worker is None:
+                _enrichment_worker = EnrichmentWorker()
+    return _enrichment_worker
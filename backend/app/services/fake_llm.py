@@ -0,0 +1,212 @@
+"""
+Local stand-in for the g4f provider.
+
+With LLM_FAKE_ENABLED the LLM helpers in app.util answer from this module
+instead of calling out to the network (it can also be listed as "fake" in
+LLM_PROVIDERS), so the chatbot and issue creation can be load-tested and run
+in CI offline.
+
+Answers are canned per system prompt: the spam, priority, radius and combined
+enrichment prompts get well-formed answers derived from keywords in the
+description, and any other prompt (the chatbot) gets a fixed reply. Individual
+answers can be overridden with a JSON file (LLM_FAKE_RESPONSES_FILE). Each call
+waits for a latency drawn from the configured distribution and fails with
+probability LLM_FAKE_ERROR_RATE; the random sequence is seeded, so a run is
+reproducible. Streams are emitted word by word with a fixed delay per token.
+"""
+
+import json
+import logging
+import math
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.services.prompt_store import get_prompt_store
+
+logger = logging.getLogger(__name__)
+
+# System prompt file -> kind of canned answer
+PROMPT_KINDS = {
+    "system_prompt1.txt": "priority",
+    "system_prompt3.txt": "radius",
+    "system_prompt4.txt": "spam",
+    "system_prompt5.txt": "enrichment"
+}
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+SPAM_KEYWORDS = ("buy", "discount", "offer", "click", "subscribe", "lottery", "whatsapp", "http://", "https://")
+SEVERE_KEYWORDS = ("fire", "accident", "electrocut", "live wire", "gas leak", "collapse", "flood", "injur", "sewage overflow")
+URGENT_KEYWORDS = ("broken", "leak", "overflow", "blocked", "outage", "power cut", "not working", "signal")
+# Radius in meters, first match wins
+RADIUS_KEYWORDS = (
+    (100, ("construction", "road closed", "widespread", "entire area")),
+    (50, ("outage", "power cut", "supply", "park", "society")),
+    (20, ("signal", "intersection", "leak", "drain", "bus stop"))
+)
+DEFAULT_RADIUS = 5
+
+
+class FakeLLMError(Exception):
+    """Simulated provider failure"""
+
+
+def _contains(text: str, keywords) -> bool:
+    return any(keyword in text for keyword in keywords)
+
+
+def canned_answer(kind: str, query: str) -> str:
+    """Deterministic answer in the format the given prompt asks for"""
+    text = query.lower()
+    spam = _contains(text, SPAM_KEYWORDS)
+    priority = 2 if _contains(text, SEVERE_KEYWORDS) else 1 if _contains(text, URGENT_KEYWORDS) else 0
+    radius = next((meters for meters, keywords in RADIUS_KEYWORDS if _contains(text, keywords)), DEFAULT_RADIUS)
+
+    if kind == "spam":
+        return "SPAM - promotional content" if spam else "LEGITIMATE - civic issue"
+    if kind == "priority":
+        return str(priority)
+    if kind == "radius":
+        return f"{radius}m"
+    if kind == "enrichment":
+        return json.dumps({
+            "spam": spam,
+            "reason": "promotional content" if spam else "civic issue",
+            "priority": priority,
+            "radius": radius
+        })
+    return f"This is a simulated answer to: {query.strip()}"
+
+
+class FakeLLM:
+    """Deterministic chat completions with configurable latency, error rate and per-token delay"""
+
+    def __init__(
+        self,
+        token_delay_ms: Optional[float] = None,
+        latency_distribution: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        latency_spread_ms: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        seed: Optional[int] = None,
+        responses: Optional[Dict[str, str]] = None
+    ):
+        self.token_delay_ms = settings.LLM_FAKE_TOKEN_DELAY_MS if token_delay_ms is None else token_delay_ms
+        self.latency_distribution = latency_distribution or settings.LLM_FAKE_LATENCY_DISTRIBUTION
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{self.latency_distribution}', expected one of {LATENCY_DISTRIBUTIONS}")
+        self.latency_ms = settings.LLM_FAKE_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_spread_ms = settings.LLM_FAKE_LATENCY_SPREAD_MS if latency_spread_ms is None else latency_spread_ms
+        self.error_rate = settings.LLM_FAKE_ERROR_RATE if error_rate is None else error_rate
+        self.responses = responses if responses is not None else self._load_responses(settings.LLM_FAKE_RESPONSES_FILE)
+
+        self._rng = random.Random(settings.LLM_FAKE_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.open_streams = 0
+        self.calls_by_kind: Dict[str, int] = {}
+
+    @staticmethod
+    def _load_responses(path: str) -> Dict[str, str]:
+        """{"spam"|"priority"|"radius"|"enrichment"|"chat": answer}; "{query}" is replaced by the user message"""
+        if not path:
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def prompt_kind(self, system_msg: str) -> str:
+        store = get_prompt_store()
+        for name, kind in PROMPT_KINDS.items():
+            try:
+                if store.get(name).text == system_msg:
+                    return kind
+            except OSError:
+                continue
+        return "chat"
+
+    def respond(self, messages: List[dict]) -> str:
+        system_msg = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        query = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        kind = self.prompt_kind(system_msg)
+        with self._lock:
+            self.calls_by_kind[kind] = self.calls_by_kind.get(kind, 0) + 1
+        if kind in self.responses:
+            return self.responses[kind].replace("{query}", query.strip())
+        return canned_answer(kind, query)
+
+    def sample_latency_ms(self) -> float:
+        mean, spread = self.latency_ms, self.latency_spread_ms
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                value = self._rng.uniform(mean - spread, mean + spread)
+            elif self.latency_distribution == "normal":
+                value = self._rng.gauss(mean, spread)
+            elif self.latency_distribution == "lognormal" and mean > 0:
+                # Parameters chosen so the samples have the configured mean and standard deviation
+                sigma = math.sqrt(math.log(1 + (spread / mean) ** 2))
+                value = self._rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+            else:
+                value = mean
+        return max(0.0, value)
+
+    def _begin_call(self):
+        """Count the call, wait the sampled latency and maybe fail"""
+        with self._lock:
+            self.calls += 1
+            failed = self.error_rate > 0 and self._rng.random() < self.error_rate
+        latency_ms = self.sample_latency_ms()
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        if failed:
+            with self._lock:
+                self.errors += 1
+            raise FakeLLMError("Simulated provider error")
+
+    def complete(self, messages: List[dict]) -> str:
+        self._begin_call()
+        return self.respond(messages)
+
+    def stream(self, messages: List[dict]) -> Iterator[str]:
+        """Yield the answer in word-sized deltas; closing the iterator stops generation"""
+        with self._lock:
+            self.open_streams += 1
+        try:
+            # The sampled latency is the time to the first token
+            self._begin_call()
+            words = self.respond(messages).split(" ")
+            for index, word in enumerate(words):
+                if self.token_delay_ms and index:
+                    time.sleep(self.token_delay_ms / 1000)
+                yield word if index == 0 else " " + word
+        finally:
+            with self._lock:
+                self.open_streams -= 1
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "calls_by_kind": dict(self.calls_by_kind),
+                "open_streams": self.open_streams,
+                "latency_distribution": self.latency_distribution,
+                "latency_ms": self.latency_ms,
+                "latency_spread_ms": self.latency_spread_ms,
+                "error_rate": self.error_rate
+            }
+
+
+_fake_llm = None
+_fake_llm_lock = threading.Lock()
+
+def get_fake_llm() -> FakeLLM:
+    global _fake_llm
+    if _fake_llm is None:
+        with _fake_llm_lock:
+            if _fake_llm is None:
+                _fake_llm = FakeLLM()
+    return _fake_llm
@@ -0,0 +1,340 @@
+"""
+Category classifier hosted in a dedicated process pool.
+
+Each worker process loads its own copy of the classifier with pinned thread
+counts (torch intra/inter-op threads, ONNX Runtime intra-op threads, OpenMP/MKL
+env) so inference never competes with request handlers for the GIL. Texts and
+results travel through per-worker shared-memory buffers; the pipe only carries
+small control messages. A worker that crashes or hangs is killed and restarted
+in the background while the failed call raises InferenceWorkerError.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.classifier import CategoryClassifier, CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds used to size the shared-memory buffers
+MAX_EMBEDDING_DIM = 1024
+MAX_TEXT_BYTES = 8192  # Per description; the tokenizer truncates far earlier (CLASSIFIER_MAX_LENGTH tokens)
+
+
+class InferenceWorkerError(RuntimeError):
+    """A pool worker crashed, hung or reported an error"""
+
+
+def _buffer_sizes(max_batch: int, input_bytes: int) -> Tuple[int, int]:
+    input_size = max_batch * 4 + input_bytes  # int32 text lengths + utf-8 text bytes
+    output_size = max_batch * 4 + max_batch * MAX_EMBEDDING_DIM * 4  # int32 labels + float32 embeddings
+    return input_size, output_size
+
+
+def _pin_threads(threads: int):
+    """Limit native thread pools before the worker builds its classifier"""
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+
+def _worker_main(conn, input_name: str, output_name: str, max_batch: int, threads: int, factory: Callable):
+    """Entry point of a pool worker process. factory must be picklable (spawn start method)."""
+    _pin_threads(threads)
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    try:
+        lengths = np.ndarray((max_batch,), dtype=np.int32, buffer=input_shm.buf)
+        text_bytes = input_shm.buf[max_batch * 4:]
+        labels_out = np.ndarray((max_batch,), dtype=np.int32, buffer=output_shm.buf)
+
+        try:
+            classifier = factory()
+            if hasattr(classifier, "num_threads"):
+                classifier.num_threads = threads  # ONNX Runtime intra-op threads
+            classifier.load()
+        except Exception as e:
+            conn.send(("error", f"Classifier failed to load in worker: {str(e)}"))
+            return
+        conn.send(("ready", classifier.embedding_model))
+
+        while True:
+            message = conn.recv()
+            if message[0] == "stop":
+                return
+            count = message[1]
+            texts, offset = [], 0
+            for length in lengths[:count]:
+                texts.append(bytes(text_bytes[offset:offset + length]).decode("utf-8", errors="ignore"))
+                offset += int(length)
+            try:
+                labels, embeddings = classifier.predict_with_embeddings(texts)
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+                dim = embeddings.shape[1]
+                labels_out[:count] = [CATEGORIES.index(label) for label in labels]
+                np.ndarray((count, dim), dtype=np.float32, buffer=output_shm.buf, offset=max_batch * 4)[:] = embeddings
+                conn.send(("ok", count, dim))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        input_shm.close()
+        output_shm.close()
+
+
+class _Worker:
+    """Parent-side handle of one worker process and its shared-memory buffers"""
+
+    def __init__(self, index: int, max_batch: int, input_bytes: int):
+        self.index = index
+        input_size, output_size = _buffer_sizes(max_batch, input_bytes)
+        self.input_shm = shared_memory.SharedMemory(create=True, size=input_size)
+        self.output_shm = shared_memory.SharedMemory(create=True, size=output_size)
+        self.lengths = np.ndarray((max_batch,), dtype=np.int32, buffer=self.input_shm.buf)
+        self.labels = np.ndarray((max_batch,), dtype=np.int32, buffer=self.output_shm.buf)
+        self.process = None
+        self.conn = None
+        self.embedding_model = None
+
+    def close(self):
+        self.lengths = self.labels = None
+        for shm in (self.input_shm, self.output_shm):
+            shm.close()
+            shm.unlink()
+
+
+class PooledCategoryClassifier(CategoryClassifier):
+    """Category classifier client that delegates inference to a process pool"""
+
+    supports_head_scoring = False  # The workers serve whole descriptions
+
+    def __init__(
+        self,
+        factory: Callable[[], CategoryClassifier],
+        workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        input_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+        start_timeout: Optional[float] = None,
+        embedding_model: Optional[str] = None,
+        **kwargs
+    ):
+        # model_path / encoder_name describe the model the workers load, for status() and embedding tags
+        super().__init__(**kwargs)
+
+        self.factory = factory
+        self.num_workers = workers or settings.CLASSIFIER_POOL_WORKERS
+        self.threads_per_worker = threads_per_worker or settings.CLASSIFIER_POOL_THREADS_PER_WORKER
+        self.max_batch = max_batch or settings.CLASSIFIER_POOL_MAX_BATCH
+        self.input_bytes = input_bytes or self.max_batch * MAX_TEXT_BYTES
+        self.timeout = timeout or settings.CLASSIFIER_POOL_TIMEOUT_SECONDS
+        self.start_timeout = start_timeout or settings.CLASSIFIER_POOL_START_TIMEOUT_SECONDS
+        self.backend = "pool"
+
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        # Reported again by each worker once its classifier is loaded
+        self._embedding_model = embedding_model
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.restarts = 0
+        self.failures = 0
+
+    # Lets the batcher keep one batch in flight per worker
+    @property
+    def max_concurrency(self) -> int:
+        return self.num_workers
+
+    @property
+    def embedding_model(self) -> str:
+        # Same tag as the in-process classifier, so stored embeddings stay comparable
+        return self._embedding_model or super().embedding_model
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, worker.input_shm.name, worker.output_shm.name,
+                  self.max_batch, self.threads_per_worker, self.factory),
+            name=f"classifier-worker-{worker.index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker.process, worker.conn = process, parent_conn
+
+        if not parent_conn.poll(self.start_timeout):
+            self._kill(worker)
+            raise InferenceWorkerError(f"Classifier worker {worker.index} did not start within {self.start_timeout}s")
+        try:
+            status, detail = parent_conn.recv()
+        except EOFError:
+            self._kill(worker)
+            raise InferenceWorkerError(f"Classifier worker {worker.index} exited during startup")
+        if status != "ready":
+            self._kill(worker)
+            raise InferenceWorkerError(detail)
+        worker.embedding_model = detail
+        self._embedding_model = detail
+
+    def _kill(self, worker: _Worker):
+        if worker.process is not None and worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=5)
+        if worker.conn is not None:
+            worker.conn.close()
+        worker.process, worker.conn = None, None
+
+    def _load_models(self):
+        """Start every worker; each one loads and warms up its own classifier"""
+        self._closed = False
+        try:
+            for index in range(self.num_workers):
+                worker = _Worker(index, self.max_batch, self.input_bytes)
+                self._workers.append(worker)
+                self._spawn(worker)
+                self._idle.put(worker)
+        except Exception:
+            self.close()
+            raise
+        logger.info(
+            f"Classifier process pool ready: {self.num_workers} workers x {self.threads_per_worker} threads "
+            f"({self._embedding_model})"
+        )
+
+    def _restart_in_background(self, worker: _Worker):
+        """Replace a crashed or hung worker without blocking the caller"""
+        self._kill(worker)
+        with self._stats_lock:
+            self.restarts += 1
+
+        def restart():
+            delay = 1.0
+            while not self._closed:
+                try:
+                    self._spawn(worker)
+                    logger.warning(f"Classifier worker {worker.index} restarted")
+                    self._idle.put(worker)
+                    return
+                except Exception as e:
+                    logger.error(f"Restarting classifier worker {worker.index} failed: {str(e)}")
+                    time.sleep(delay)
+                    delay = min(delay * 2, 60.0)
+
+        threading.Thread(target=restart, name=f"classifier-worker-restart-{worker.index}", daemon=True).start()
+
+    def _run_chunk(self, worker: _Worker, encoded: List[bytes]) -> Tuple[List[str], np.ndarray]:
+        offset = 0
+        for row, data in enumerate(encoded):
+            worker.lengths[row] = len(data)
+            worker.input_shm.buf[self.max_batch * 4 + offset:self.max_batch * 4 + offset + len(data)] = data
+            offset += len(data)
+        worker.conn.send(("run", len(encoded)))
+
+        deadline = time.monotonic() + self.timeout
+        while not worker.conn.poll(0.1):
+            if not worker.process.is_alive():
+                raise InferenceWorkerError(f"Classifier worker {worker.index} crashed (exit code {worker.process.exitcode})")
+            if time.monotonic() > deadline:
+                raise InferenceWorkerError(f"Classifier worker {worker.index} timed out after {self.timeout}s")
+        try:
+            reply = worker.conn.recv()
+        except EOFError:
+            raise InferenceWorkerError(f"Classifier worker {worker.index} crashed")
+        if reply[0] != "ok":
+            raise ValueError(reply[1])
+
+        _, count, dim = reply
+        labels = [CATEGORIES[index] for index in worker.labels[:count]]
+        embeddings = np.ndarray((count, dim), dtype=np.float32, buffer=worker.output_shm.buf, offset=self.max_batch * 4).copy()
+        return labels, embeddings
+
+    def _chunks(self, texts: List[str]):
+        """Split texts so each chunk fits the worker's batch size and input buffer"""
+        chunk, size = [], 0
+        for text in texts:
+            data = text.encode("utf-8")[:MAX_TEXT_BYTES]
+            if chunk and (len(chunk) == self.max_batch or size + len(data) > self.input_bytes):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(data)
+            size += len(data)
+        if chunk:
+            yield chunk
+
+    def predict_with_embeddings(self, texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        if not texts:
+            return [], np.empty((0, 0), dtype=np.float32)
+        labels, embeddings = [], []
+        for chunk in self._chunks(texts):
+            try:
+                worker = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise InferenceWorkerError(f"No classifier worker available within {self.timeout}s")
+            try:
+                chunk_labels, chunk_embeddings = self._run_chunk(worker, chunk)
+            except InferenceWorkerError:
+                with self._stats_lock:
+                    self.failures += 1
+                self._restart_in_background(worker)
+                raise
+            except BaseException:
+                self._idle.put(worker)
+                raise
+            self._idle.put(worker)
+            labels.extend(chunk_labels)
+            embeddings.append(chunk_embeddings)
+        with self._stats_lock:
+            self.calls += 1
+        return labels, np.concatenate(embeddings)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.predict_with_embeddings(texts)[1]
+
+    def close(self):
+        """Stop the workers and release the shared-memory buffers"""
+        self._closed = True
+        for worker in self._workers:
+            if worker.conn is not None:
+                try:
+                    worker.conn.send(("stop",))
+                except (OSError, BrokenPipeError):
+                    pass
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+            self._kill(worker)
+            worker.close()
+        self._workers = []
+        self._idle = queue.Queue()
+        self.ready = False
+
+    def status(self) -> dict:
+        with self._stats_lock:
+            pool = {
+                "workers": self.num_workers,
+                "alive": sum(1 for worker in self._workers if worker.process is not None and worker.process.is_alive()),
+                "idle": self._idle.qsize(),
+                "threads_per_worker": self.threads_per_worker,
+                "calls": self.calls,
+                "failures": self.failures,
+                "restarts": self.restarts
+            }
+        return {**super().status(), "embedding_model": self.embedding_model, "pool": pool}
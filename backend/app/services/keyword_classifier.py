@@ -0,0 +1,51 @@
+"""
+Cheap keyword-based category guess.
+
+Used for provisional issue records when the full AI enrichment runs in the
+background. The keyword lists come from the words most specific to each label
+in model/dataset_cleaned.csv; the guess is only meant to route the issue to a
+plausible authority until the classifier has run.
+"""
+
+import re
+from typing import Dict, List
+
+from app.services.classifier import CATEGORIES, DEFAULT_CATEGORY
+
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "Road Authority": [
+        "road", "pothole", "potholes", "traffic", "pavement", "asphalt", "lane", "highway", "bridge",
+        "footpath", "divider", "speed breaker", "signal", "vehicles", "carriageway", "crack", "flyover"
+    ],
+    "Dumping/Waste Authority": [
+        "garbage", "waste", "trash", "dump", "dumped", "dumping", "litter", "smell", "odor", "plastic",
+        "bins", "overflowing", "sewage", "debris", "flies", "burning", "collection", "rubbish"
+    ],
+    "Public Amenities Authority": [
+        "park", "toilet", "toilets", "bench", "benches", "garden", "playground", "swings", "drinking water",
+        "bus stop", "shelter", "library", "hall", "facility", "facilities", "jogging", "community centre"
+    ],
+    "Electricity Company": [
+        "electricity", "power", "voltage", "transformer", "outage", "outages", "blackout", "wire", "wires",
+        "electric", "meter", "streetlight", "street light", "pole", "sparking", "power cut", "feeder"
+    ]
+}
+
+_PATTERNS = {
+    category: re.compile(r"\b(" + "|".join(re.escape(word) for word in words) + r")\b")
+    for category, words in CATEGORY_KEYWORDS.items()
+}
+
+
+def guess_category(description: str) -> str:
+    """Category with the most keyword hits, DEFAULT_CATEGORY when nothing matches"""
+    text = description.lower()
+    scores = {category: len(_PATTERNS[category].findall(text)) for category in CATEGORIES}
+    best = max(CATEGORIES, key=lambda category: scores[category])
+    return best if scores[best] > 0 else DEFAULT_CATEGORY
+
+
+def keyword_hits(description: str) -> int:
+    """Number of civic keywords of any category in the description"""
+    text = description.lower()
+    return sum(len(pattern.findall(text)) for pattern in _PATTERNS.values())
@@ -0,0 +1,198 @@
+"""
+Content-addressed cache for LLM answers.
+
+Answers are keyed by the system prompt file, a hash of that file's contents
+and a hash of the normalized query. The first tier is an in-process LRU with
+TTL, the second a persistent llm_cache table shared by all workers. Editing a
+system prompt changes its hash, so stale answers stop matching immediately
+and are purged from the table the first time the new prompt is seen.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from cachetools import TTLCache
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial edits hit the same entry"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(prompt_name: str, prompt_hash: str, query: str) -> str:
+    return hash_text(f"{prompt_name}\0{prompt_hash}\0{normalize_query(query)}")
+
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        memory_ttl_seconds: Optional[int] = None,
+        db_ttl_seconds: Optional[int] = None,
+        use_db: Optional[bool] = None,
+        session_factory=SessionLocal
+    ):
+        self.memory_ttl_seconds = memory_ttl_seconds or settings.LLM_CACHE_MEMORY_TTL_SECONDS
+        self.db_ttl_seconds = db_ttl_seconds or settings.LLM_CACHE_DB_TTL_SECONDS
+        self.use_db = settings.LLM_CACHE_DB_ENABLED if use_db is None else use_db
+        self.session_factory = session_factory
+
+        self._memory = TTLCache(maxsize=max_entries or settings.LLM_CACHE_MAX_ENTRIES, ttl=self.memory_ttl_seconds)
+        self._lock = threading.Lock()
+        # Last prompt hash seen per prompt file, used to detect prompt edits
+        self._prompt_hashes = {}
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def _check_prompt_version(self, prompt_name: str, prompt_hash: str):
+        """Purge entries of an edited prompt file the first time its new hash is seen"""
+        with self._lock:
+            previous = self._prompt_hashes.get(prompt_name)
+            self._prompt_hashes[prompt_name] = prompt_hash
+            if previous is None or previous == prompt_hash:
+                return
+            self.invalidations += 1
+        logger.info(f"System prompt {prompt_name} changed, invalidating cached answers")
+        self._purge_prompt(prompt_name, keep_hash=prompt_hash)
+
+    def _purge_prompt(self, prompt_name: str, keep_hash: str):
+        if not self.use_db:
+            return
+        db = self.session_factory()
+        try:
+            db.query(LLMCacheEntry).filter(
+                LLMCacheEntry.prompt_name == prompt_name,
+                LLMCacheEntry.prompt_hash != keep_hash
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._record_error(f"Failed to purge cached answers for {prompt_name}: {str(e)}")
+        finally:
+            db.close()
+
+    def _record_error(self, message: str):
+        with self._lock:
+            self.errors += 1
+        logger.warning(message)
+
+    def get(self, prompt_name: str, prompt_text: str, query: str, prompt_hash: Optional[str] = None) -> Optional[str]:
+        prompt_hash = prompt_hash or hash_text(prompt_text)
+        self._check_prompt_version(prompt_name, prompt_hash)
+        key = make_cache_key(prompt_name, prompt_hash, query)
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self.memory_hits += 1
+                return cached
+
+        cached = self._get_from_db(key)
+        with self._lock:
+            if cached is not None:
+                self.db_hits += 1
+                self._memory[key] = cached
+            else:
+                self.misses += 1
+        return cached
+
+    def _get_from_db(self, key: str) -> Optional[str]:
+        if not self.use_db:
+            return None
+        db = self.session_factory()
+        try:
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at < datetime.now():
+                db.delete(entry)
+                db.commit()
+                return None
+            entry.hit_count = (entry.hit_count or 0) + 1
+            db.commit()
+            return entry.response
+        except Exception as e:
+            db.rollback()
+            self._record_error(f"LLM cache lookup failed: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def set(self, prompt_name: str, prompt_text: str, query: str, response: str, prompt_hash: Optional[str] = None):
+        prompt_hash = prompt_hash or hash_text(prompt_text)
+        key = make_cache_key(prompt_name, prompt_hash, query)
+        with self._lock:
+            self._memory[key] = response
+            self.stores += 1
+
+        if not self.use_db:
+            return
+        db = self.session_factory()
+        try:
+            db.merge(LLMCacheEntry(
+                key=key,
+                prompt_name=prompt_name,
+                prompt_hash=prompt_hash,
+                response=response,
+                hit_count=0,
+                created_at=datetime.now(),
+                expires_at=datetime.now() + timedelta(seconds=self.db_ttl_seconds)
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._record_error(f"LLM cache store failed: {str(e)}")
+        finally:
+            db.close()
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+                "memory_entries": len(self._memory)
+            }
+
+
+# Singleton instance
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get singleton instance of the LLM response cache"""
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,126 @@
+"""
+Bound on simultaneous outbound LLM provider calls.
+
+Every upstream completion (and every open stream) holds one of
+LLM_MAX_CONCURRENT_CALLS slots. Callers beyond that wait in a FIFO queue of
+at most LLM_MAX_QUEUED_CALLS for up to their queue timeout. When the queue is
+full or the wait runs out the call fails fast with LLMOverloadedError: the API
+answers 503 with Retry-After, and AI stages that have a default (priority,
+radius) fall back to it. Queue time is observed as the
+"llm.queue_wait" latency histogram.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from app.config import settings
+from app.services.metrics import record_span
+
+logger = logging.getLogger(__name__)
+
+
+class LLMOverloadedError(Exception):
+    """No provider slot became available; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMConcurrencyLimiter:
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        retry_after: Optional[int] = None
+    ):
+        self.max_concurrent = max_concurrent or settings.LLM_MAX_CONCURRENT_CALLS
+        self.max_queue = settings.LLM_MAX_QUEUED_CALLS if max_queue is None else max_queue
+        self.queue_timeout = settings.LLM_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        self.retry_after = retry_after or settings.LLM_RETRY_AFTER_SECONDS
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_waiting = 0
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Take a slot, waiting at most `timeout` seconds (default: the configured queue timeout)"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        with self._cond:
+            # Newcomers queue behind existing waiters instead of overtaking them
+            if self.active >= self.max_concurrent or self.waiting:
+                if self.waiting >= self.max_queue:
+                    self.rejected_queue_full += 1
+                    raise LLMOverloadedError("Too many pending LLM requests", self.retry_after)
+                self.waiting += 1
+                self.queued += 1
+                self.max_waiting = max(self.max_waiting, self.waiting)
+                try:
+                    deadline = started + timeout
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self.rejected_timeout += 1
+                            raise LLMOverloadedError(f"No LLM slot became free within {timeout}s", self.retry_after)
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+        record_span("llm.queue_wait", (time.perf_counter() - started) * 1000)
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def queue_full(self) -> bool:
+        """Whether a new call would be rejected right now without waiting"""
+        with self._cond:
+            return self.active >= self.max_concurrent and self.waiting >= self.max_queue
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout
+            }
+
+
+# Singleton instance
+_llm_limiter = None
+_llm_limiter_lock = threading.Lock()
+
+def get_llm_limiter() -> LLMConcurrencyLimiter:
+    """Get singleton instance of the outbound LLM call limiter"""
+    global _llm_limiter
+    if _llm_limiter is None:
+        with _llm_limiter_lock:
+            if _llm_limiter is None:
+                _llm_limiter = LLMConcurrencyLimiter()
+    return _llm_limiter
@@ -0,0 +1,234 @@
+"""
+Latency histograms and per-request timing spans.
+
+Code paths wrap their stages in span("name"). Each span is observed into a
+process-wide histogram of the same name (exported by /metrics, and in the
+Prometheus text format by /metrics/prometheus) and, when it runs inside a
+traced request, added to that request's trace. A traced endpoint writes one
+JSON log line per request with its outcome and the time spent in every span.
+
+Spans in worker threads (the classifier batcher, AI stage pool) only feed the
+histograms; run_stages reports the stage durations to the request's trace
+from the calling thread.
+"""
+
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds; the last bucket is open-ended
+DEFAULT_BUCKETS_MS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.buckets = list(buckets or DEFAULT_BUCKETS_MS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+            self.count += 1
+            self.sum += value_ms
+            self.max = max(self.max, value_ms)
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets (linear interpolation inside the bucket)"""
+        with self._lock:
+            counts, count, maximum = list(self.counts), self.count, self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else maximum
+                return min(maximum, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return maximum
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, count, total, maximum = list(self.counts), self.count, self.sum, self.max
+        return {
+            "count": count,
+            "avg_ms": round(total / count, 3) if count else 0.0,
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "max_ms": round(maximum, 3),
+            "buckets": {
+                **{f"le_{bound:g}": bucket_count for bound, bucket_count in zip(self.buckets, counts)},
+                "le_inf": counts[-1]
+            }
+        }
+
+
+class LatencyMetrics:
+    """Named histograms, created on first observation"""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name: str, value_ms: float):
+        self.histogram(name).observe(value_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {name: histogram.snapshot() for name, histogram in sorted(histograms.items())}
+
+    def render_prometheus(self, metric: str = "app_latency_ms") -> str:
+        """Prometheus text exposition: one histogram family, the span name as a label"""
+        with self._lock:
+            histograms = dict(self._histograms)
+        lines = [f"# HELP {metric} Latency of request stages in milliseconds", f"# TYPE {metric} histogram"]
+        for name, histogram in sorted(histograms.items()):
+            with histogram._lock:
+                counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(f'{metric}_bucket{{span="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {total:.3f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+latency_metrics = LatencyMetrics()
+
+
+class RequestTrace:
+    def __init__(self, name: str):
+        self.name = name
+        self.request_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.fields = {}
+
+    def add(self, name: str, elapsed_ms: float):
+        # A span entered several times in one request is summed
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed_ms
+
+    def log_line(self, outcome: str, total_ms: float) -> str:
+        return json.dumps({
+            "event": self.name,
+            "request_id": self.request_id,
+            "outcome": outcome,
+            "total_ms": round(total_ms, 2),
+            "spans_ms": {name: round(elapsed, 2) for name, elapsed in self.spans.items()},
+            **self.fields
+        }, default=str)
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def record_span(name: str, elapsed_ms: float):
+    """Observe a duration measured elsewhere (e.g. in a worker thread)"""
+    latency_metrics.observe(name, elapsed_ms)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, elapsed_ms)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the histogram `name` and the current request's trace"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, (time.perf_counter() - started) * 1000)
+
+
+def annotate(**fields):
+    """Add fields (e.g. outcome details) to the current request's log line"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.fields.update(fields)
+
+
+_request_logger = None
+_request_logger_lock = threading.Lock()
+
+def get_request_logger() -> logging.Logger:
+    """Logger for the per-request lines; prints them as-is unless logging is configured for it"""
+    global _request_logger
+    if _request_logger is None:
+        with _request_logger_lock:
+            if _request_logger is None:
+                request_logger = logging.getLogger("app.requests")
+                if not request_logger.handlers:
+                    handler = logging.StreamHandler()
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    request_logger.addHandler(handler)
+                    request_logger.setLevel(logging.INFO)
+                    request_logger.propagate = False
+                _request_logger = request_logger
+    return _request_logger
+
+
+def traced(name: str):
+    """Decorator for sync endpoints: trace the request, observe its total and log one line.
+    The outcome is "ok", "http_<status>" for an HTTPException or "error" for any other exception;
+    annotate(outcome=...) overrides the first two."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = RequestTrace(name)
+            token = _current_trace.set(trace)
+            outcome = "ok"
+            try:
+                return func(*args, **kwargs)
+            except HTTPException as e:
+                outcome = f"http_{e.status_code}"
+                raise
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                _current_trace.reset(token)
+                total_ms = (time.perf_counter() - trace.started) * 1000
+                # An outcome set by the endpoint (e.g. "spam" before raising a 400) wins over the default
+                annotated = trace.fields.pop("outcome", None)
+                if annotated and outcome != "error":
+                    outcome = annotated
+                latency_metrics.observe(f"request.{name}", total_ms)
+                if settings.REQUEST_LOG_ENABLED:
+                    get_request_logger().info(trace.log_line(outcome, total_ms))
+        return wrapper
+    return decorator
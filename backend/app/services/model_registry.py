@@ -0,0 +1,423 @@
+"""
+Versioned category models with hot reload and shadow scoring.
+
+Each model version is a directory under CLASSIFIER_REGISTRY_DIR holding the
+model files and an optional model_info.json ("variant", "backend", "model").
+registry.json in the same directory names the primary version and an optional
+shadow version:
+
+    {"primary": "2024-06-01", "shadow": "2024-07-15"}
+
+The file is polled every CLASSIFIER_REGISTRY_POLL_SECONDS. A new version is
+loaded and warmed up in the watcher thread and then swapped in atomically;
+requests keep using the previous version until the swap. The shadow version
+classifies the same batches as the primary on its own thread, off the request
+path, and its agreement rate and latency are logged and reported per version.
+
+Inference calls lease the version they use; a replaced version is closed when
+its last lease is released, however long its in-flight calls take.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from app.config import settings
+from app.services.classifier import CategoryClassifier, create_classifier, get_classifier_service, read_model_info
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE = "registry.json"
+DEFAULT_VERSION = "default"  # Classifier from the CLASSIFIER_* settings, used until a version is activated
+
+# Model file inside a version directory when model_info.json has no "model" entry
+DEFAULT_MODEL_FILES = {
+    ("base", "keras"): "model_new.h5",
+    ("base", "onnx"): "classifier.int8.onnx",
+    ("distilled", "keras"): "",
+    ("distilled", "onnx"): "classifier.int8.onnx",
+}
+
+
+class VersionStats:
+    """Traffic, latency and (for a shadow) agreement with the primary for one model version"""
+
+    def __init__(self, sample_size: int = 1000):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.compared = 0
+        self.agreed = 0
+        self._latencies_ms = deque(maxlen=sample_size)
+
+    def record(self, items: int, seconds: float, agreed: Optional[int] = None):
+        with self._lock:
+            self.batches += 1
+            self.items += items
+            self._latencies_ms.append(seconds * 1000)
+            if agreed is not None:
+                self.compared += items
+                self.agreed += agreed
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def latency_ms(self, percent: float) -> float:
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(round(percent / 100 * (len(latencies) - 1))))]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = {
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+            }
+            if self.compared:
+                snapshot["compared"] = self.compared
+                snapshot["agreement_rate"] = round(self.agreed / self.compared, 4)
+        snapshot["latency_ms"] = {"p50": round(self.latency_ms(50), 3), "p99": round(self.latency_ms(99), 3)}
+        return snapshot
+
+
+class ModelVersion:
+    def __init__(self, version: str, classifier: CategoryClassifier):
+        self.version = version
+        self.classifier = classifier
+        self.activated_at: Optional[datetime] = None
+        self.stats = VersionStats()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.retired = False
+        self._close_when_idle = False
+
+    def acquire(self) -> bool:
+        """Lease the version for one inference call; False once it has been retired"""
+        with self._lock:
+            if self.retired:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            close = self._close_when_idle and self.in_flight == 0
+        if close:
+            self.classifier.close()
+
+    def retire(self, close_classifier: bool):
+        """Refuse new leases and close the classifier (if asked) once the last lease is released"""
+        with self._lock:
+            self.retired = True
+            self._close_when_idle = close_classifier
+            close = close_classifier and self.in_flight == 0
+        if close:
+            self.classifier.close()
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "activated_at": self.activated_at.isoformat() if self.activated_at else None,
+            "in_flight": self.in_flight,
+            "classifier": self.classifier.status(),
+            **self.stats.snapshot()
+        }
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        models_dir: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        factory: Optional[Callable[[str, dict], CategoryClassifier]] = None,
+        shadow_queue_size: Optional[int] = None,
+        log_every: Optional[int] = None
+    ):
+        self.models_dir = models_dir or settings.CLASSIFIER_REGISTRY_DIR
+        self.poll_interval = settings.CLASSIFIER_REGISTRY_POLL_SECONDS if poll_interval is None else poll_interval
+        self.log_every = log_every or settings.CLASSIFIER_SHADOW_LOG_EVERY
+        self.factory = factory or build_version_classifier
+
+        self._primary = ModelVersion(DEFAULT_VERSION, create_classifier())
+        self._shadow: Optional[ModelVersion] = None
+        self._registry_mtime_ns: Optional[int] = None
+        self._lock = threading.Lock()  # Serializes reloads; request threads never take it
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+        self._shadow_queue = queue.Queue(maxsize=shadow_queue_size or settings.CLASSIFIER_SHADOW_QUEUE_SIZE)
+        self._shadow_thread: Optional[threading.Thread] = None
+        self.shadow_dropped = 0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def primary(self) -> CategoryClassifier:
+        return self._primary.classifier
+
+    @property
+    def primary_version(self) -> str:
+        return self._primary.version
+
+    @property
+    def shadow_version(self) -> Optional[str]:
+        shadow = self._shadow
+        return shadow.version if shadow else None
+
+    def versions(self) -> List[str]:
+        """Version directories available on disk"""
+        if not os.path.isdir(self.models_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.models_dir)
+            if os.path.isdir(os.path.join(self.models_dir, name)) and not name.startswith(".")
+        )
+
+    def read_registry(self) -> dict:
+        path = os.path.join(self.models_dir, REGISTRY_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_registry(self, primary: Optional[str] = None, shadow: Optional[str] = None):
+        """Point the registry at new versions (atomic rename) and apply it to this process.
+        Other processes pick the change up on their next poll."""
+        for version in (primary, shadow):
+            if version is not None and version not in self.versions():
+                raise ValueError(f"Unknown model version '{version}'")
+        os.makedirs(self.models_dir, exist_ok=True)
+        path = os.path.join(self.models_dir, REGISTRY_FILE)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"primary": primary, "shadow": shadow}, f, indent=2)
+        os.replace(temp_path, path)
+        self.reload(force=True)
+
+    def _load_version(self, version: str) -> ModelVersion:
+        """Build and warm up a version; raises if it cannot be loaded"""
+        shadow = self._shadow
+        if shadow is not None and shadow.version == version:
+            # Promoting the shadow: its classifier is already loaded and warm
+            model_version = ModelVersion(version, shadow.classifier)
+            model_version.activated_at = datetime.utcnow()
+            return model_version
+        version_dir = os.path.join(self.models_dir, version)
+        if not os.path.isdir(version_dir):
+            raise FileNotFoundError(f"Model version directory not found: {version_dir}")
+        classifier = self.factory(version_dir, read_model_info(version_dir))
+        classifier.load()
+        model_version = ModelVersion(version, classifier)
+        model_version.activated_at = datetime.utcnow()
+        return model_version
+
+    def _retire(self, model_version: Optional[ModelVersion]):
+        """Release a replaced version once the calls that already lease it have finished"""
+        if model_version is None:
+            return
+        logger.info(f"Category model {model_version.version} retired: {model_version.stats.snapshot()}")
+        in_use = [current.classifier for current in (self._primary, self._shadow) if current is not None]
+        model_version.retire(close_classifier=not any(model_version.classifier is classifier for classifier in in_use))
+
+    @contextmanager
+    def lease(self, shadow: bool = False):
+        """The current primary (or shadow, None without one) version, kept open until the block exits"""
+        while True:
+            model_version = self._shadow if shadow else self._primary
+            # A version retired between the read and the acquire has already been replaced
+            if model_version is None or model_version.acquire():
+                break
+        try:
+            yield model_version
+        finally:
+            if model_version is not None:
+                model_version.release()
+
+    def reload(self, force: bool = False) -> bool:
+        """Apply registry.json if it changed. Returns True when a version was swapped."""
+        path = os.path.join(self.models_dir, REGISTRY_FILE)
+        with self._lock:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+                if not force and mtime_ns == self._registry_mtime_ns:
+                    return False
+                self._registry_mtime_ns = mtime_ns
+                wanted = self.read_registry()
+                primary, shadow = wanted.get("primary"), wanted.get("shadow")
+
+                swapped = False
+                if primary and primary != self._primary.version:
+                    new_primary = self._load_version(primary)
+                    old_primary, self._primary = self._primary, new_primary  # Atomic for request threads
+                    self._retire(old_primary)
+                    logger.info(f"Category model {primary} is now primary (was {old_primary.version})")
+                    swapped = True
+
+                if shadow != self.shadow_version:
+                    new_shadow = self._load_version(shadow) if shadow and shadow != primary else None
+                    old_shadow, self._shadow = self._shadow, new_shadow
+                    if new_shadow is not None:
+                        self._start_shadow_thread()
+                        logger.info(f"Category model {shadow} is shadowing {self._primary.version}")
+                    self._retire(old_shadow)
+                    swapped = True
+
+                if swapped:
+                    self.reloads += 1
+                self.last_error = None
+                return swapped
+            except Exception as e:
+                # Keep serving the current versions; the next change to registry.json retries
+                self.reload_errors += 1
+                self.last_error = str(e)
+                logger.error(f"Category model reload failed: {str(e)}")
+                return False
+
+    def _watch(self, preload: bool):
+        self.reload()
+        if preload:
+            # No-op for a version loaded by reload(); warms up the default classifier otherwise
+            self.primary.ensure_loaded()
+        while not self._stop.wait(self.poll_interval):
+            self.reload()
+
+    def start_watching(self, preload: bool = False):
+        """Apply registry.json and keep polling it in a daemon thread, so startup is not blocked by model loads"""
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(preload,), name="model-registry-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+        self._shadow_queue.put(None)
+        self._primary.classifier.close()
+        if self._shadow is not None and self._shadow.classifier is not self._primary.classifier:
+            self._shadow.classifier.close()
+
+    def _start_shadow_thread(self):
+        if self._shadow_thread is None or not self._shadow_thread.is_alive():
+            self._shadow_thread = threading.Thread(target=self._shadow_worker, name="model-shadow", daemon=True)
+            self._shadow_thread.start()
+
+    def record(self, classifier: CategoryClassifier, texts: List[str], labels: List[str], seconds: float):
+        """Account a primary classification and hand the batch to the shadow model (never blocks)"""
+        primary = self._primary
+        if classifier is not primary.classifier:
+            return
+        primary.stats.record(len(texts), seconds)
+        if self._shadow is None:
+            return
+        try:
+            self._shadow_queue.put_nowait((primary.version, list(texts), list(labels)))
+        except queue.Full:
+            self.shadow_dropped += 1
+
+    def record_error(self, classifier: CategoryClassifier):
+        if classifier is self._primary.classifier:
+            self._primary.stats.record_error()
+
+    def _shadow_worker(self):
+        while True:
+            item = self._shadow_queue.get()
+            if item is None:
+                return
+            primary_version, texts, primary_labels = item
+            with self.lease(shadow=True) as shadow:
+                if shadow is None:
+                    continue
+                try:
+                    start = time.perf_counter()
+                    shadow_labels = shadow.classifier.predict(texts)
+                    seconds = time.perf_counter() - start
+                except Exception as e:
+                    shadow.stats.record_error()
+                    logger.error(f"Shadow model {shadow.version} failed: {str(e)}")
+                    continue
+            agreed = sum(1 for a, b in zip(primary_labels, shadow_labels) if a == b)
+            shadow.stats.record(len(texts), seconds, agreed=agreed)
+
+            if shadow.stats.compared // self.log_every != (shadow.stats.compared - len(texts)) // self.log_every:
+                primary = self._primary
+                logger.info(
+                    f"Shadow model {shadow.version} vs {primary_version}: agreement "
+                    f"{shadow.stats.agreed / shadow.stats.compared:.1%} over {shadow.stats.compared} items, "
+                    f"p50 {shadow.stats.latency_ms(50):.1f}ms vs {primary.stats.latency_ms(50):.1f}ms"
+                )
+
+    def status(self) -> dict:
+        shadow = self._shadow
+        return {
+            "models_dir": self.models_dir,
+            "available": self.versions(),
+            "primary": self._primary.status(),
+            "shadow": shadow.status() if shadow else None,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+            "shadow_queue": self._shadow_queue.qsize(),
+            "shadow_dropped": self.shadow_dropped
+        }
+
+
+def build_version_classifier(version_dir: str, info: dict) -> CategoryClassifier:
+    """Classifier for a version directory, following its model_info.json"""
+    variant = info.get("variant", "base")
+    backend = info.get("backend", settings.CLASSIFIER_BACKEND)
+    model_file = info.get("model", DEFAULT_MODEL_FILES.get((variant, backend), ""))
+    return create_classifier(backend, variant, model_path=os.path.join(version_dir, model_file).rstrip(os.sep))
+
+
+@contextmanager
+def leased_classifier(classifier: Optional[CategoryClassifier] = None):
+    """Classifier for one inference call: the given one, or the current primary.
+    With the registry enabled the primary version stays open until the block exits."""
+    if classifier is not None or not settings.CLASSIFIER_REGISTRY_ENABLED:
+        yield classifier or get_classifier_service()
+        return
+    with get_model_registry().lease() as model_version:
+        yield model_version.classifier
+
+
+def record_inference(classifier: CategoryClassifier, texts: List[str], labels: List[str], seconds: float):
+    """Hook for the classification paths; a no-op unless the registry is enabled"""
+    if settings.CLASSIFIER_REGISTRY_ENABLED:
+        get_model_registry().record(classifier, texts, labels, seconds)
+
+
+def record_inference_error(classifier: CategoryClassifier):
+    if settings.CLASSIFIER_REGISTRY_ENABLED:
+        get_model_registry().record_error(classifier)
+
+
+# Singleton instance
+_model_registry = None
+_model_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Get singleton instance of the model registry"""
+    global _model_registry
+    if _model_registry is None:
+        with _model_registry_lock:
+            if _model_registry is None:
+                _model_registry = ModelRegistry()
+    return _model_registry
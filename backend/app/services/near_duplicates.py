@@ -0,0 +1,310 @@
+"""
+Near-identical description index for copy-paste report floods.
+
+Each open issue's description is reduced to a MinHash signature over word
+3-gram shingles (descriptions of fewer words use their word set) and stored
+in a banded LSH table: a new description only has to be compared against the
+issues sharing at least one band bucket with it, so a lookup costs a few
+dictionary probes instead of a scan of the district. Candidates must be in
+the same district, within NEAR_DUPLICATE_MAX_DISTANCE_M of the new location
+and reach NEAR_DUPLICATE_THRESHOLD estimated Jaccard similarity.
+
+The index lives in process memory. It is built from the open issues of the
+last NEAR_DUPLICATE_WINDOW_DAYS on first use (outside the index lock, so
+lookups during the build see what is indexed so far) and then maintained by
+the issue router as issues are created, edited, closed and deleted. Other workers'
+issues are picked up when this process next rebuilds, so a match is always
+re-checked against the database before it is used.
+"""
+
+import logging
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Set
+from uuid import UUID
+
+import numpy as np
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Authority, Issue
+from app.services.duplicate_detection import haversine_distances
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+SHINGLE_WORDS = 3
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def words(text: str) -> list:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def shingles(tokens: list) -> Set[str]:
+    """Word 3-grams, or the word set when there are too few words for one"""
+    if len(tokens) < SHINGLE_WORDS:
+        return set(tokens)
+    return {" ".join(tokens[i:i + SHINGLE_WORDS]) for i in range(len(tokens) - SHINGLE_WORDS + 1)}
+
+
+def parse_coordinates(location: Optional[str]) -> Optional[tuple]:
+    try:
+        lat, lon = (float(part) for part in location.split(","))
+        return lat, lon
+    except (AttributeError, ValueError):
+        return None
+
+
+@dataclass
+class IndexedIssue:
+    issue_id: UUID
+    signature: np.ndarray
+    district: str
+    coordinates: Optional[tuple]
+    created_at: datetime
+
+
+@dataclass
+class NearDuplicateMatch:
+    issue_id: UUID
+    similarity: float  # Estimated Jaccard similarity of the shingle sets
+    distance_meters: Optional[float]  # None when either location could not be parsed
+
+
+class NearDuplicateIndex:
+    """MinHash LSH over the descriptions of recent open issues"""
+
+    def __init__(
+        self,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        threshold: Optional[float] = None,
+        min_words: Optional[int] = None,
+        max_distance_m: Optional[float] = None,
+        window_days: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        seed: int = 1,
+        session_factory=SessionLocal
+    ):
+        self.num_perm = num_perm or settings.NEAR_DUPLICATE_NUM_PERM
+        self.bands = bands or settings.NEAR_DUPLICATE_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError(f"NEAR_DUPLICATE_NUM_PERM ({self.num_perm}) must be a multiple of NEAR_DUPLICATE_BANDS ({self.bands})")
+        self.rows = self.num_perm // self.bands
+        self.threshold = threshold or settings.NEAR_DUPLICATE_THRESHOLD
+        self.min_words = min_words or settings.NEAR_DUPLICATE_MIN_WORDS
+        self.max_distance_m = settings.NEAR_DUPLICATE_MAX_DISTANCE_M if max_distance_m is None else max_distance_m
+        self.window_days = window_days or settings.NEAR_DUPLICATE_WINDOW_DAYS
+        self.max_entries = max_entries or settings.NEAR_DUPLICATE_MAX_ENTRIES
+        self.session_factory = session_factory
+
+        # Universal hash family h(x) = (a * x + b) mod p, truncated to 32 bits
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._entries: "OrderedDict[UUID, IndexedIssue]" = OrderedDict()  # Oldest first (by indexing time)
+        self._buckets = [dict() for _ in range(self.bands)]  # Band key -> set of issue ids
+        self._removed_during_build: Optional[Set[UUID]] = None
+        self.built = False
+        self.build_seconds = None
+        self.lookups = 0
+        self.matches = 0
+        self.lookup_seconds = 0.0
+        self.max_lookup_seconds = 0.0
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the description, None when it is too short to match safely"""
+        tokens = words(text)
+        if len(tokens) < self.min_words:
+            return None
+        hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(tokens)], dtype=np.uint64)
+        # uint64 products wrap around, which keeps the family deterministic across processes
+        values = (np.outer(hashes, self._a) + self._b) % np.uint64(MERSENNE_PRIME) & np.uint64(MAX_HASH)
+        return values.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, issue_id: UUID, text: str, district: str, location: Optional[str], created_at: Optional[datetime] = None) -> bool:
+        """Index (or re-index) an open issue; returns False when the description is too short"""
+        signature = self.signature(text)
+        with self._lock:
+            self._remove(issue_id)
+            if signature is None:
+                return False
+            self._insert(IndexedIssue(issue_id, signature, district, parse_coordinates(location), created_at or datetime.now()))
+            self._evict()
+        return True
+
+    def _insert(self, entry: IndexedIssue):
+        self._entries[entry.issue_id] = entry
+        for band, key in self._band_keys(entry.signature):
+            self._buckets[band].setdefault(key, set()).add(entry.issue_id)
+
+    def remove(self, issue_id: UUID):
+        with self._lock:
+            self._remove(issue_id)
+
+    def _remove(self, issue_id: UUID):
+        if self._removed_during_build is not None:
+            # Keeps a build that loaded the issue before it was closed from bringing it back
+            self._removed_during_build.add(issue_id)
+        entry = self._entries.pop(issue_id, None)
+        if entry is None:
+            return
+        for band, key in self._band_keys(entry.signature):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(issue_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def _evict(self):
+        """Drop issues older than the window and the oldest beyond max_entries.
+        A re-indexed (edited) issue moves to the back with its original created_at, so
+        query() also checks the age of every candidate."""
+        cutoff = datetime.now() - timedelta(days=self.window_days)
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if len(self._entries) <= self.max_entries and oldest.created_at >= cutoff:
+                break
+            self._remove(oldest.issue_id)
+
+    def query(self, text: str, district: str, location: Optional[str], exclude_issue_id: Optional[UUID] = None) -> Optional[NearDuplicateMatch]:
+        """Most similar indexed issue in the district that passes the threshold and distance, or None"""
+        start = time.perf_counter()
+        signature = self.signature(text)
+        match = None
+        if signature is not None:
+            coordinates = parse_coordinates(location)
+            cutoff = datetime.now() - timedelta(days=self.window_days)
+            with self._lock:
+                candidates = set()
+                for band, key in self._band_keys(signature):
+                    candidates.update(self._buckets[band].get(key, ()))
+                candidates.discard(exclude_issue_id)
+                entries = [
+                    self._entries[issue_id] for issue_id in candidates
+                    if self._entries[issue_id].district == district and self._entries[issue_id].created_at >= cutoff
+                ]
+            for entry in entries:
+                similarity = float(np.mean(entry.signature == signature))
+                if similarity < self.threshold or (match is not None and similarity <= match.similarity):
+                    continue
+                distance = None
+                if coordinates is not None and entry.coordinates is not None:
+                    distance = float(haversine_distances(coordinates[0], coordinates[1], np.array([entry.coordinates[0]]), np.array([entry.coordinates[1]]))[0])
+                if self.max_distance_m and (distance is None or distance > self.max_distance_m):
+                    continue
+                match = NearDuplicateMatch(entry.issue_id, similarity, distance)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.lookups += 1
+            self.matches += match is not None
+            self.lookup_seconds += elapsed
+            self.max_lookup_seconds = max(self.max_lookup_seconds, elapsed)
+        return match
+
+    def ensure_built(self):
+        """Load the recent open issues once; later changes arrive through add/remove.
+        Returns at once while another thread is building."""
+        if self.built or not self._build_lock.acquire(blocking=False):
+            return
+        try:
+            if self.built:
+                return
+            start = time.perf_counter()
+            try:
+                self._build()
+            except Exception as e:
+                # Serve from whatever gets added from now on instead of failing issue creation
+                logger.warning(f"Near-duplicate index build failed: {str(e)}")
+                with self._lock:
+                    self._removed_during_build = None
+            self.built = True
+            self.build_seconds = round(time.perf_counter() - start, 3)
+            logger.info(f"Near-duplicate index built with {len(self._entries)} issues in {self.build_seconds}s")
+        finally:
+            self._build_lock.release()
+
+    def start_background_build(self) -> threading.Thread:
+        """Build the index in a daemon thread so startup is not blocked"""
+        thread = threading.Thread(target=self.ensure_built, name="near-duplicate-index", daemon=True)
+        thread.start()
+        return thread
+
+    def _build(self):
+        """Query and hash the issues without the index lock, then swap them in under it"""
+        with self._lock:
+            self._removed_during_build = set()
+        db = self.session_factory()
+        try:
+            cutoff = datetime.now() - timedelta(days=self.window_days)
+            rows = db.query(Issue.id, Issue.description, Issue.location, Issue.created_at, Authority.district).join(Authority).filter(
+                Issue.status.in_([0, 1]),
+                Issue.created_at >= cutoff
+            ).order_by(Issue.created_at.desc()).limit(self.max_entries).all()
+        finally:
+            db.close()
+        loaded = []
+        for row in reversed(rows):
+            signature = self.signature(row.description)
+            if signature is not None:
+                loaded.append(IndexedIssue(row.id, signature, row.district, parse_coordinates(row.location), row.created_at))
+
+        with self._lock:
+            # Issues added or removed while the rows were loading are newer than the rows
+            skip = self._removed_during_build | set(self._entries)
+            live = list(self._entries.values())
+            self._removed_during_build = None
+            self._entries = OrderedDict()
+            self._buckets = [dict() for _ in range(self.bands)]
+            for entry in loaded:
+                if entry.issue_id not in skip:
+                    self._insert(entry)
+            for entry in live:
+                self._insert(entry)
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "built": self.built,
+                "build_seconds": self.build_seconds,
+                "entries": len(self._entries),
+                "buckets": sum(len(buckets) for buckets in self._buckets),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "match_rate": round(self.matches / self.lookups, 4) if self.lookups else 0.0,
+                "avg_lookup_ms": round(self.lookup_seconds / self.lookups * 1000, 4) if self.lookups else 0.0,
+                "max_lookup_ms": round(self.max_lookup_seconds * 1000, 4),
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "rows_per_band": self.rows
+            }
+
+
+# Singleton instance
+_near_duplicate_index = None
+_near_duplicate_index_lock = threading.Lock()
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """Get singleton instance of the near-duplicate index (built from the database on first use)"""
+    global _near_duplicate_index
+    if _near_duplicate_index is None:
+        with _near_duplicate_index_lock:
+            if _near_duplicate_index is None:
+                _near_duplicate_index = NearDuplicateIndex()
+    return _near_duplicate_index
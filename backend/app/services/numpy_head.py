@@ -0,0 +1,118 @@
+"""
+Pure-NumPy inference of the model_new.h5 classification head.
+
+Reads the layer configuration and Dense weights of a Keras HDF5 model through
+h5py and runs the head as vectorized matmuls, so the serving process does not
+need to import TensorFlow for a few dense layers over a 768-dim vector.
+"""
+
+import json
+from typing import List, Tuple
+
+import h5py
+import numpy as np
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    shifted = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return shifted / np.sum(shifted, axis=-1, keepdims=True)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "softmax": _softmax,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh
+}
+
+# Layers that are identity functions at inference time
+PASSTHROUGH_LAYERS = {"InputLayer", "Dropout"}
+
+
+class NumpyDenseHead:
+    """Stack of Dense layers evaluated with NumPy"""
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray, str]]):
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation in classification head: {activation}")
+        self.layers = layers
+
+    @classmethod
+    def from_h5(cls, path: str) -> "NumpyDenseHead":
+        """Load a Sequential Keras model saved with model.save('*.h5')"""
+        with h5py.File(path, "r") as f:
+            model_config = f.attrs["model_config"]
+            if isinstance(model_config, bytes):
+                model_config = model_config.decode("utf-8")
+            config = json.loads(model_config)
+
+            weights_group = f["model_weights"] if "model_weights" in f else f
+            layers = []
+            for layer in config["config"]["layers"]:
+                class_name = layer["class_name"]
+                if class_name in PASSTHROUGH_LAYERS:
+                    continue
+                if class_name != "Dense":
+                    raise ValueError(f"Unsupported layer type in classification head: {class_name}")
+
+                layer_config = layer["config"]
+                kernel, bias = _read_dense_weights(weights_group[layer_config["name"]])
+                if not layer_config.get("use_bias", True):
+                    bias = np.zeros(kernel.shape[1], dtype=np.float32)
+                layers.append((kernel, bias, layer_config.get("activation", "linear")))
+        return cls(layers)
+
+    @property
+    def input_dim(self) -> int:
+        return self.layers[0][0].shape[0]
+
+    @property
+    def output_dim(self) -> int:
+        return self.layers[-1][0].shape[1]
+
+    def __call__(self, embeddings: np.ndarray, training: bool = False) -> np.ndarray:
+        """Same call signature as a Keras model so it can replace one directly"""
+        x = np.asarray(embeddings, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+        return x
+
+    def predict(self, embeddings: np.ndarray, **kwargs) -> np.ndarray:
+        return self(embeddings)
+
+
+def _read_dense_weights(layer_group: h5py.Group) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the kernel and bias datasets of a Dense layer group"""
+    weight_names = [
+        name.decode("utf-8") if isinstance(name, bytes) else name
+        for name in layer_group.attrs.get("weight_names", [])
+    ]
+    if not weight_names:
+        # Fall back to walking the group for files that do not record weight_names
+        layer_group.visititems(
+            lambda name, obj: weight_names.append(name) if isinstance(obj, h5py.Dataset) else None
+        )
+
+    kernel = bias = None
+    for name in weight_names:
+        leaf = name.split("/")[-1].split(":")[0]
+        if leaf == "kernel":
+            kernel = np.asarray(layer_group[name], dtype=np.float32)
+        elif leaf == "bias":
+            bias = np.asarray(layer_group[name], dtype=np.float32)
+
+    if kernel is None:
+        raise ValueError(f"No kernel found for layer '{layer_group.name}'")
+    if bias is None:
+        bias = np.zeros(kernel.shape[1], dtype=np.float32)
+    return kernel, bias
@@ -0,0 +1,71 @@
+"""
+ONNX Runtime serving path for the issue category classifier.
+
+Serves categories from the single graph produced by export_onnx_classifier.py
+(RoBERTa encoder + model_new.h5 dense head, optionally int8 quantized) on CPU,
+without PyTorch or TensorFlow in the request path.
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.metrics import span
+from app.services.classifier import CategoryClassifier, CATEGORIES, read_model_info
+
+
+class OnnxCategoryClassifier(CategoryClassifier):
+    """Category classifier backed by an exported ONNX graph"""
+
+    backend = "onnx"
+    supports_head_scoring = False  # The graph fuses encoder and head
+
+    def __init__(self, model_path: Optional[str] = None, num_threads: Optional[int] = None, **kwargs):
+        super().__init__(model_path=model_path or settings.CLASSIFIER_ONNX_PATH, **kwargs)
+        self.num_threads = settings.CLASSIFIER_ONNX_THREADS if num_threads is None else num_threads
+        self.session = None
+
+    def _load_models(self):
+        # Imported here so the web process only pays for ONNX Runtime when this backend is selected
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+
+        # The exporter saves the tokenizer files (and, for the distilled model, its encoder name) next to the graph
+        model_dir = os.path.dirname(self.model_path)
+        self.encoder_name = read_model_info(model_dir).get("encoder", self.encoder_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+
+    def run(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ([CLS] embeddings, class probabilities) for a batch of texts"""
+        tokenized = self.tokenizer(
+            texts,
+            return_tensors="np",
+            truncation=True,
+            padding=True,
+            max_length=self.max_length
+        )
+        with span("classifier.onnx"):
+            embeddings, probabilities = self.session.run(
+                ["embeddings", "probabilities"],
+                {
+                    "input_ids": tokenized["input_ids"].astype(np.int64),
+                    "attention_mask": tokenized["attention_mask"].astype(np.int64)
+                }
+            )
+        return embeddings, probabilities
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.run(texts)[0]
+
+    def predict_with_embeddings(self, texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        embeddings, probabilities = self.run(texts)
+        return [CATEGORIES[index] for index in np.argmax(probabilities, axis=1)], embeddings
+
@@ -0,0 +1,107 @@
+"""
+In-process store for the system prompt files.
+
+Prompts are read once and kept in memory together with their sha256 hash.
+A file is re-read only when its mtime or size changes, and the stat itself is
+throttled to PROMPT_RELOAD_INTERVAL_SECONDS, so editing a prompt on disk still
+takes effect without a restart.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prompt paths are relative to the app/ directory, as in get_query_response
+PROMPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Prompt:
+    name: str
+    text: str
+    hash: str
+    mtime_ns: int
+    size: int
+    checked_at: float
+
+
+class PromptStore:
+    def __init__(self, base_dir: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.base_dir = base_dir or PROMPT_DIR
+        self.reload_interval = settings.PROMPT_RELOAD_INTERVAL_SECONDS if reload_interval is None else reload_interval
+        self._prompts = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+
+    def _read(self, name: str, stat: os.stat_result) -> Prompt:
+        with open(os.path.join(self.base_dir, name), "r", encoding="utf-8") as f:
+            text = f.read()
+        return Prompt(
+            name=name,
+            text=text,
+            hash=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            checked_at=time.monotonic()
+        )
+
+    def get(self, name: str) -> Prompt:
+        """Return the prompt, re-reading it if the file changed since the last check"""
+        now = time.monotonic()
+        with self._lock:
+            prompt = self._prompts.get(name)
+            if prompt is not None and now - prompt.checked_at < self.reload_interval:
+                self.hits += 1
+                return prompt
+
+        stat = os.stat(os.path.join(self.base_dir, name))
+        with self._lock:
+            prompt = self._prompts.get(name)
+            if prompt is not None and prompt.mtime_ns == stat.st_mtime_ns and prompt.size == stat.st_size:
+                prompt.checked_at = now
+                self.hits += 1
+                return prompt
+
+        fresh = self._read(name, stat)
+        with self._lock:
+            if name in self._prompts:
+                self.reloads += 1
+                logger.info(f"System prompt {name} changed on disk, reloaded")
+            else:
+                self.loads += 1
+            self._prompts[name] = fresh
+        return fresh
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "prompts": len(self._prompts),
+                "hits": self.hits,
+                "loads": self.loads,
+                "reloads": self.reloads
+            }
+
+
+# Singleton instance
+_prompt_store = None
+_prompt_store_lock = threading.Lock()
+
+def get_prompt_store() -> PromptStore:
+    """Get singleton instance of the prompt store"""
+    global _prompt_store
+    if _prompt_store is None:
+        with _prompt_store_lock:
+            if _prompt_store is None:
+                _prompt_store = PromptStore()
+    return _prompt_store
@@ -0,0 +1,237 @@
+"""
+Reporter reputation for skipping the LLM spam check.
+
+A user's reputation comes from the outcome of their past reports: issues in
+progress or resolved count as accepted, closed ones as rejected (except
+duplicates merged into another report) and open ones do not count yet. Votes
+from other users on accepted reports add a little weight, up to one per
+accepted report. The score is the smoothed acceptance rate
+
+    (accepted + endorsements + 1) / (accepted + endorsements + rejected + 2)
+
+and a user is trusted with at least REPUTATION_MIN_REPORTS decided reports,
+a score of REPUTATION_TRUST_THRESHOLD or more and no report ever closed as
+spam.
+
+Reputations are cached for REPUTATION_CACHE_TTL_SECONDS. A background thread
+recomputes the reputations read since its last pass every
+REPUTATION_REFRESH_SECONDS, so active reporters are never looked up on the
+request path while idle ones expire. Counters show how many spam checks
+trusted reporters skipped and an estimate of the latency that saved.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+from sqlalchemy import func
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Issue, Vote
+
+logger = logging.getLogger(__name__)
+
+REFRESH_CHUNK_SIZE = 500
+
+
+@dataclass
+class Reputation:
+    accepted: int = 0
+    rejected: int = 0
+    spam: int = 0
+    open: int = 0
+    votes_received: int = 0
+    score: float = 0.5
+    trusted: bool = False
+
+
+def reputation_score(accepted: int, rejected: int, votes_received: int, vote_weight: float) -> float:
+    endorsements = vote_weight * min(votes_received, accepted)
+    return (accepted + endorsements + 1) / (accepted + endorsements + rejected + 2)
+
+
+class ReputationService:
+    def __init__(
+        self,
+        min_reports: Optional[int] = None,
+        trust_threshold: Optional[float] = None,
+        vote_weight: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        refresh_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        session_factory=SessionLocal
+    ):
+        self.min_reports = min_reports or settings.REPUTATION_MIN_REPORTS
+        self.trust_threshold = trust_threshold or settings.REPUTATION_TRUST_THRESHOLD
+        self.vote_weight = settings.REPUTATION_VOTE_WEIGHT if vote_weight is None else vote_weight
+        self.refresh_seconds = refresh_seconds or settings.REPUTATION_REFRESH_SECONDS
+        self.session_factory = session_factory
+
+        self._cache = TTLCache(maxsize=max_entries or settings.REPUTATION_CACHE_MAX_ENTRIES, ttl=ttl_seconds or settings.REPUTATION_CACHE_TTL_SECONDS)
+        self._recently_used = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.refreshes = 0
+        self.trusted_lookups = 0
+        self.spam_checks_skipped = 0
+        self.latency_saved_ms = 0.0
+        self.deferred_checks = 0
+        self.deferred_spam = 0
+
+    def compute(self, user_ids: Iterable[UUID]) -> Dict[UUID, Reputation]:
+        """Reputations of the given users from their issue history, two grouped queries"""
+        user_ids = list(user_ids)
+        reputations = {user_id: Reputation() for user_id in user_ids}
+        db = self.session_factory()
+        try:
+            outcomes = db.query(Issue.user_id, Issue.status, Issue.enrichment_status, func.count(Issue.id)).filter(
+                Issue.user_id.in_(user_ids)
+            ).group_by(Issue.user_id, Issue.status, Issue.enrichment_status).all()
+            votes = db.query(Issue.user_id, func.count(Vote.id)).join(Vote, Vote.issue_id == Issue.id).filter(
+                Issue.user_id.in_(user_ids),
+                Issue.status.in_([1, 2]),
+                Vote.user_id != Issue.user_id
+            ).group_by(Issue.user_id).all()
+        finally:
+            db.close()
+
+        for user_id, issue_status, enrichment_status, count in outcomes:
+            reputation = reputations[user_id]
+            if enrichment_status == "spam":
+                reputation.spam += count
+            if issue_status in (1, 2):
+                reputation.accepted += count
+            elif issue_status == 3 and enrichment_status != "merged":
+                reputation.rejected += count
+            elif issue_status == 0:
+                reputation.open += count
+        for user_id, count in votes:
+            reputations[user_id].votes_received = count
+
+        for reputation in reputations.values():
+            reputation.score = reputation_score(reputation.accepted, reputation.rejected, reputation.votes_received, self.vote_weight)
+            reputation.trusted = (
+                reputation.spam == 0
+                and reputation.accepted + reputation.rejected >= self.min_reports
+                and reputation.score >= self.trust_threshold
+            )
+        return reputations
+
+    def get(self, user_id: UUID) -> Reputation:
+        with self._lock:
+            reputation = self._cache.get(user_id)
+            self._recently_used.add(user_id)
+            if reputation is not None:
+                self.hits += 1
+                return reputation
+            self.misses += 1
+        reputation = self.compute([user_id])[user_id]
+        with self._lock:
+            self._cache[user_id] = reputation
+        return reputation
+
+    def is_trusted(self, user_id: UUID) -> bool:
+        """Whether the reporter may skip the LLM spam check; False when the history cannot be read"""
+        try:
+            trusted = self.get(user_id).trusted
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"Reputation lookup failed for user {user_id}: {str(e)}")
+            return False
+        if trusted:
+            with self._lock:
+                self.trusted_lookups += 1
+        return trusted
+
+    def invalidate(self, user_id: UUID):
+        """Forget a cached reputation, e.g. after one of the user's reports was closed as spam"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def refresh(self):
+        """Recompute the cached reputations read since the last refresh"""
+        with self._lock:
+            user_ids = [user_id for user_id in self._recently_used if user_id in self._cache]
+            self._recently_used = set()
+        for start in range(0, len(user_ids), REFRESH_CHUNK_SIZE):
+            reputations = self.compute(user_ids[start:start + REFRESH_CHUNK_SIZE])
+            with self._lock:
+                self._cache.update(reputations)
+        with self._lock:
+            self.refreshes += 1
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.warning(f"Reputation refresh failed: {str(e)}")
+
+    def start_refreshing(self):
+        """Keep the cached reputations of active reporters fresh in a daemon thread"""
+        if self._refresher is None or not self._refresher.is_alive():
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="reputation-refresher", daemon=True)
+            self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def record_skipped_check(self, saved_ms: float):
+        """A trusted reporter's issue was created without waiting for the LLM spam check"""
+        with self._lock:
+            self.spam_checks_skipped += 1
+            self.latency_saved_ms += saved_ms
+
+    def record_deferred_check(self, is_spam: bool):
+        with self._lock:
+            self.deferred_checks += 1
+            self.deferred_spam += is_spam
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "trusted_lookups": self.trusted_lookups,
+                "spam_checks_skipped": self.spam_checks_skipped,
+                "latency_saved_ms": round(self.latency_saved_ms, 2),
+                "avg_latency_saved_ms": round(self.latency_saved_ms / self.spam_checks_skipped, 2) if self.spam_checks_skipped else 0.0,
+                "deferred_checks": self.deferred_checks,
+                "deferred_spam": self.deferred_spam
+            }
+
+
+# Singleton instance
+_reputation_service = None
+_reputation_service_lock = threading.Lock()
+
+def get_reputation_service() -> ReputationService:
+    """Get singleton instance of the reporter reputation service"""
+    global _reputation_service
+    if _reputation_service is None:
+        with _reputation_service_lock:
+            if _reputation_service is None:
+                _reputation_service = ReputationService()
+    return _reputation_service
@@ -0,0 +1,101 @@
+"""
+Request coalescing for identical concurrent LLM calls.
+
+When several requests ask the same question against the same system prompt
+at the same moment, the first becomes the leader and makes the upstream call;
+the others wait for it and share its answer (or its exception) instead of
+each calling the provider. Calls are keyed like the LLM cache (prompt file,
+prompt hash, normalized query), so the flight covers exactly the window
+before the leader's answer lands in the cache.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """At most one in-flight call per key; concurrent callers with the same key share its outcome"""
+
+    def __init__(self, wait_timeout: Optional[float] = None):
+        # A follower waiting longer than this makes its own call instead
+        self.wait_timeout = wait_timeout if wait_timeout is not None else settings.LLM_SINGLEFLIGHT_WAIT_SECONDS
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+        self.leaders = 0
+        self.shared = 0
+        self.errors = 0
+        self.wait_timeouts = 0
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            if call.done.wait(self.wait_timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            with self._lock:
+                self.wait_timeouts += 1
+            logger.warning(f"Coalesced call still running after {self.wait_timeout}s, calling upstream directly")
+            return func()
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.leaders + self.shared
+            return {
+                "upstream_calls": self.leaders,
+                "coalesced": self.shared,
+                "coalesce_rate": round(self.shared / calls, 4) if calls else 0.0,
+                "errors": self.errors,
+                "wait_timeouts": self.wait_timeouts,
+                "in_flight": len(self._calls)
+            }
+
+
+# Singleton instance
+_singleflight = None
+_singleflight_lock = threading.Lock()
+
+def get_llm_singleflight() -> SingleFlight:
+    """Get singleton instance of the LLM call coalescer"""
+    global _singleflight
+    if _singleflight is None:
+        with _singleflight_lock:
+            if _singleflight is None:
+                _singleflight = SingleFlight()
+    return _singleflight
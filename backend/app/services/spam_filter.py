@@ -0,0 +1,308 @@
+"""
+Local spam pre-filter run before the LLM spam check.
+
+Every description is screened by cheap local signals first:
+
+1. Heuristics on the text itself: several links, long runs of one character,
+   mostly symbols/digits, unreadable letter mixes (keyboard mashing), very
+   low character entropy and one word repeated over and over. The letter-mix
+   and entropy checks only apply to ASCII text.
+2. The reporter's submission rate over a sliding window. A reporter over the
+   limit is not judged as spam but told when to retry; rejected submissions
+   do not count towards the limit.
+3. A multinomial naive Bayes model over words, seeded with the civic
+   complaints of model/dataset_cleaned.csv as ham and a small built-in spam
+   set, and updated online with the verdicts of the LLM check. With 25 spam
+   seeds against thousands of complaints its probabilities lean towards ham,
+   so adverts that mention a road or a pothole score as civic. Confident "ham"
+   therefore only skips the LLM check when SPAM_FILTER_LOCAL_HAM is set, and
+   then only for descriptions that also mention a civic keyword.
+
+Clear-cut spam is rejected locally; anything else is escalated to the LLM.
+Counters show how many descriptions were decided by each tier and how many
+LLM calls that avoided.
+"""
+
+import csv
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from app.config import settings
+from app.services.keyword_classifier import keyword_hits
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HAM_DATASET = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "model", "dataset_cleaned.csv"
+)
+
+# The kinds of content system_prompt4.txt rejects
+SPAM_SEED_TEXTS = [
+    "Buy cheap smartphones online, huge discount offer, click the link and order now",
+    "Best deals on gold loans, call now for instant approval and low interest",
+    "Earn money from home, join our investment scheme and double your income",
+    "Subscribe to my youtube channel and follow me on instagram for giveaways",
+    "Limited time offer on home loans and credit cards, contact our agent today",
+    "Win a free lottery prize, send your bank details to claim the reward",
+    "Vote for our party in the upcoming election, our candidate will change everything",
+    "The ruling government is corrupt and the opposition leader is a liar",
+    "My neighbour is always fighting with me and insulting my family, please punish him",
+    "My husband does not listen to me and we argue every night, what should I do",
+    "My girlfriend broke up with me and I feel lonely, please help me get her back",
+    "I have a headache and fever since yesterday, which medicine should I take",
+    "Please tell me how to file a divorce case and which lawyer to hire for court",
+    "I need legal advice about my property dispute with my brother",
+    "Can someone lend me money for my wedding, I will return it next month",
+    "Please do my college assignment and send it to my email before tomorrow",
+    "Who will win the cricket match today, share your predictions",
+    "Happy birthday to my best friend, love you so much",
+    "hello hi test test testing this app",
+    "I hate you all, you are useless idiots and I will teach you a lesson",
+    "Looking for a part time job, please hire me, I can work any shift",
+    "Sell your old car for the best price, free pickup, call us",
+    "Join our dating site and meet singles in your city tonight",
+    "Recommend a good movie to watch this weekend with friends",
+    "Get followers and likes for your social media page at low cost"
+]
+
+URL_PATTERN = re.compile(r"(https?://|www\.)\S+", re.IGNORECASE)
+REPEATED_CHAR_PATTERN = re.compile(r"(\S)\1{6,}")
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']+")
+VOWELS = set("aeiou")
+
+
+@dataclass
+class SpamScreen:
+    decision: Optional[str]  # "spam", "ham", "rate_limited" or None (escalate to the LLM)
+    reason: str
+    tier: Optional[str] = None  # "heuristic", "rate" or "model"
+    spam_probability: Optional[float] = None
+    retry_after: Optional[float] = None  # Seconds until a rate-limited user may submit again
+
+    @property
+    def verdict(self) -> Optional[str]:
+        """Verdict in the LLM's "SPAM - ..." / "LEGITIMATE - ..." format, None when escalated"""
+        if self.decision == "spam":
+            return f"SPAM - {self.reason} (local filter)"
+        if self.decision == "ham":
+            return f"LEGITIMATE - {self.reason} (local filter)"
+        return None
+
+
+def tokenize(text: str) -> list:
+    # Links are judged by the heuristics, their fragments would only add noise
+    return TOKEN_PATTERN.findall(URL_PATTERN.sub(" ", text.lower()))
+
+
+def char_entropy(text: str) -> float:
+    """Shannon entropy in bits per character"""
+    counts = Counter(text)
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in counts.values())
+
+
+def heuristic_reason(text: str) -> Optional[str]:
+    """Reason the text is obviously not a complaint, or None"""
+    if len(URL_PATTERN.findall(text)) >= 2:
+        return "multiple links"
+    if REPEATED_CHAR_PATTERN.search(text):
+        return "long run of a repeated character"
+
+    visible = [c for c in text if not c.isspace()]
+    # Vowel signs of Indic scripts are combining marks, not alphabetic characters
+    letters = [c for c in text.lower() if unicodedata.category(c)[0] in "LM"]
+    if visible and len(letters) / len(visible) < 0.5:
+        return "mostly symbols or digits"
+    # Vowel ratio and entropy thresholds are tuned for English; other scripts are left to the LLM
+    if len(letters) >= 20 and all(c.isascii() for c in letters):
+        vowel_ratio = sum(1 for c in letters if c in VOWELS) / len(letters)
+        if vowel_ratio < 0.15 or vowel_ratio > 0.7:
+            return "unreadable text"
+        if char_entropy("".join(letters)) < 2.5:
+            return "low-entropy text"
+
+    words = text.lower().split()
+    if len(words) >= 6 and len(set(words)) / len(words) < 0.3:
+        return "repeated words"
+    return None
+
+
+class NaiveBayesSpamModel:
+    """Multinomial naive Bayes over words with Laplace smoothing and equal class priors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.word_counts = {"spam": Counter(), "ham": Counter()}
+        self.totals = {"spam": 0, "ham": 0}
+        self.documents = {"spam": 0, "ham": 0}
+        self.vocabulary = set()
+
+    def learn(self, text: str, is_spam: bool):
+        label = "spam" if is_spam else "ham"
+        tokens = tokenize(text)
+        with self._lock:
+            self.word_counts[label].update(tokens)
+            self.totals[label] += len(tokens)
+            self.documents[label] += 1
+            self.vocabulary.update(tokens)
+
+    def learn_many(self, texts: Iterable[str], is_spam: bool):
+        for text in texts:
+            self.learn(text, is_spam)
+
+    def spam_probability(self, tokens: list) -> float:
+        with self._lock:
+            vocabulary = len(self.vocabulary) or 1
+            log_ratio = 0.0
+            for token in tokens:
+                p_spam = (self.word_counts["spam"][token] + 1) / (self.totals["spam"] + vocabulary)
+                p_ham = (self.word_counts["ham"][token] + 1) / (self.totals["ham"] + vocabulary)
+                log_ratio += math.log(p_spam) - math.log(p_ham)
+        # Clamp to keep exp() in range for long descriptions
+        return 1 / (1 + math.exp(-max(-50.0, min(50.0, log_ratio))))
+
+
+class SpamFilter:
+    def __init__(
+        self,
+        model: Optional[NaiveBayesSpamModel] = None,
+        ham_dataset: Optional[str] = None,
+        spam_threshold: Optional[float] = None,
+        ham_threshold: Optional[float] = None,
+        local_ham: Optional[bool] = None,
+        min_tokens: Optional[int] = None,
+        user_max_reports: Optional[int] = None,
+        user_window_seconds: Optional[float] = None
+    ):
+        self.spam_threshold = spam_threshold or settings.SPAM_FILTER_SPAM_THRESHOLD
+        self.ham_threshold = ham_threshold or settings.SPAM_FILTER_HAM_THRESHOLD
+        self.local_ham = settings.SPAM_FILTER_LOCAL_HAM if local_ham is None else local_ham
+        self.min_tokens = min_tokens or settings.SPAM_FILTER_MIN_TOKENS
+        self.user_max_reports = user_max_reports or settings.SPAM_FILTER_USER_MAX_REPORTS
+        self.user_window_seconds = user_window_seconds or settings.SPAM_FILTER_USER_WINDOW_SECONDS
+
+        if model is None:
+            model = NaiveBayesSpamModel()
+            model.learn_many(SPAM_SEED_TEXTS, is_spam=True)
+            model.learn_many(self._load_ham(ham_dataset or settings.SPAM_FILTER_HAM_DATASET or DEFAULT_HAM_DATASET), is_spam=False)
+        self.model = model
+
+        self._lock = threading.Lock()
+        self._submissions: Dict[str, deque] = {}
+        self.screened = 0
+        self.decided = Counter()  # "<decision>.<tier>" -> count
+        self.escalated = 0
+        self.llm_calls_avoided = 0
+        self.learned = 0
+
+    @staticmethod
+    def _load_ham(path: str) -> list:
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                return [row["text"] for row in csv.DictReader(f) if row.get("text")]
+        except OSError as e:
+            logger.warning(f"Spam filter ham dataset not available ({str(e)}), using the built-in seed only")
+            return []
+
+    def _retry_after(self, user_id) -> Optional[float]:
+        """Seconds until the user is back under the limit, None when they may submit now"""
+        now = time.monotonic()
+        with self._lock:
+            window = self._submissions.get(str(user_id))
+            if window is None:
+                return None
+            while window and now - window[0] > self.user_window_seconds:
+                window.popleft()
+            if len(window) < self.user_max_reports:
+                return None
+            return window[len(window) - self.user_max_reports] + self.user_window_seconds - now
+
+    def _record_submission(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._submissions.setdefault(str(user_id), deque()).append(now)
+            # Forget idle users so the map stays small
+            if len(self._submissions) > 10000:
+                for key in [key for key, times in self._submissions.items() if not times or now - times[-1] > self.user_window_seconds]:
+                    del self._submissions[key]
+
+    def screen(self, text: str, user_id=None) -> SpamScreen:
+        """Decide clear-cut cases locally; decision None means ask the LLM.
+        Passing user_id counts the submission towards that user's rate unless it is rejected."""
+        result = self._screen(text, user_id)
+        if user_id is not None and result.decision in ("ham", None):
+            self._record_submission(user_id)
+        with self._lock:
+            self.screened += 1
+            if result.decision is None:
+                self.escalated += 1
+            else:
+                self.decided[f"{result.decision}.{result.tier}"] += 1
+        return result
+
+    def _screen(self, text: str, user_id) -> SpamScreen:
+        reason = heuristic_reason(text)
+        if reason:
+            return SpamScreen("spam", reason, "heuristic")
+        retry_after = self._retry_after(user_id) if user_id is not None else None
+        if retry_after is not None:
+            return SpamScreen(
+                "rate_limited", f"more than {self.user_max_reports} reports in {self.user_window_seconds:g}s", "rate",
+                retry_after=retry_after
+            )
+
+        tokens = tokenize(text)
+        if len(tokens) < self.min_tokens:
+            return SpamScreen(None, "too short to judge locally")
+        probability = self.model.spam_probability(tokens)
+        if probability >= self.spam_threshold:
+            return SpamScreen("spam", "not a civic complaint", "model", probability)
+        # Waved through only when it also names a civic problem; links always go to the LLM
+        if self.local_ham and probability <= self.ham_threshold and keyword_hits(text) and not URL_PATTERN.search(text):
+            return SpamScreen("ham", "civic complaint", "model", probability)
+        return SpamScreen(None, "ambiguous", spam_probability=probability)
+
+    def record_avoided_calls(self, count: int = 1):
+        with self._lock:
+            self.llm_calls_avoided += count
+
+    def learn(self, text: str, is_spam: bool):
+        """Feed back a verdict from the LLM check"""
+        self.model.learn(text, is_spam)
+        with self._lock:
+            self.learned += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "screened": self.screened,
+                "decided": dict(self.decided),
+                "escalated": self.escalated,
+                "local_decision_rate": round((self.screened - self.escalated) / self.screened, 4) if self.screened else 0.0,
+                "llm_calls_avoided": self.llm_calls_avoided,
+                "learned_from_llm": self.learned,
+                "model_documents": dict(self.model.documents)
+            }
+
+
+# Singleton instance
+_spam_filter = None
+_spam_filter_lock = threading.Lock()
+
+def get_spam_filter() -> SpamFilter:
+    """Get singleton instance of the spam pre-filter (seeded on first use)"""
+    global _spam_filter
+    if _spam_filter is None:
+        with _spam_filter_lock:
+            if _spam_filter is None:
+                _spam_filter = SpamFilter()
+    return _spam_filter
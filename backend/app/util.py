@@ -1,22 +1,197 @@
-from g4f.client import Client
-import g4f
-import g4f.Provider
 import sys
 import os
+import math
+import threading
+import time
+from app.config import settings
+from app.services.circuit_breaker import ProvidersUnavailableError, get_provider_breaker, parse_provider_list
+from app.services.llm_cache import get_llm_cache, make_cache_key
+from app.services.llm_limiter import get_llm_limiter
+from app.services.prompt_store import get_prompt_store
+from app.services.singleflight import get_llm_singleflight
 
-def get_query_response(query, systempromptpath = "system_prompt.txt"):
-    client = Client()
-    test_model = "gpt-4o"
-    test_prompt = query
-    base_dir = os.path.dirname(__file__)  # this will be 'app/' directory
-    prompt_path = os.path.join(base_dir, systempromptpath)
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        system_msg = f.read()
-    test_provider = g4f.Provider.Blackbox
-    response = client.chat.completions.create(
-        model=test_model,
-        messages=[{ "role":"system", "content" : system_msg},{"role": "user", "content": test_prompt}],
+LLM_MODEL = "gpt-4o"
+FAKE_PROVIDER_NAME = "fake"  # Stands for app.services.fake_llm in the provider list
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_llm_providers():
+    """Provider names in failover order (attributes of g4f.Provider); only the local fake when LLM_FAKE_ENABLED"""
+    if settings.LLM_FAKE_ENABLED:
+        return [FAKE_PROVIDER_NAME]
+    return parse_provider_list(settings.LLM_PROVIDERS)
+
+def get_llm_provider(name = None):
+    """g4f provider class; g4f is imported on the first LLM call, not at app startup"""
+    import g4f.Provider
+    return getattr(g4f.Provider, name or parse_provider_list(settings.LLM_PROVIDERS)[0])
+
+def get_llm_client():
+    """Shared g4f client, created once per process instead of once per call"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from g4f.client import Client
+                _client = Client(provider=get_llm_provider())
+    return _client
+
+def _provider_complete(name, messages):
+    if name == FAKE_PROVIDER_NAME:
+        from app.services.fake_llm import get_fake_llm
+        return get_fake_llm().complete(messages)
+    response = get_llm_client().chat.completions.create(
+        model=LLM_MODEL,
+        messages=messages,
         web_search=False,
-        provider=test_provider
+        provider=get_llm_provider(name)
     )
-    return response.choices[0].message.content
\ No newline at end of file
+    return response.choices[0].message.content
+
+def _provider_stream(name, messages):
+    if name == FAKE_PROVIDER_NAME:
+        from app.services.fake_llm import get_fake_llm
+        yield from get_fake_llm().stream(messages)
+        return
+    chunks = get_llm_client().chat.completions.create(
+        model=LLM_MODEL,
+        messages=messages,
+        web_search=False,
+        provider=get_llm_provider(name),
+        stream=True
+    )
+    try:
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Stops the provider's own generator (and its HTTP response) when the caller gives up
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+def _available_providers():
+    """Providers whose circuit lets calls through; fails fast (before queuing for a slot) when there are none"""
+    providers = get_llm_providers()
+    available = [name for name in providers if get_provider_breaker(name).available()]
+    if not available:
+        retry_after = min(get_provider_breaker(name).retry_after() for name in providers)
+        raise ProvidersUnavailableError("All LLM providers are unavailable", max(1, math.ceil(retry_after)))
+    return available
+
+def _all_providers_skipped():
+    return ProvidersUnavailableError("All LLM providers are unavailable", settings.LLM_RETRY_AFTER_SECONDS)
+
+def complete_chat(messages, max_queue_wait = None):
+    """One chat completion, trying the providers in failover order and skipping those whose circuit is open.
+    Holds an outbound slot for the duration of the call; raises LLMOverloadedError if none frees
+    up within max_queue_wait seconds (default LLM_QUEUE_TIMEOUT_SECONDS)."""
+    providers = _available_providers()
+    with get_llm_limiter().slot(max_queue_wait):
+        last_error = None
+        for name in providers:
+            breaker = get_provider_breaker(name)
+            if not breaker.allow():
+                continue
+            started = time.perf_counter()
+            try:
+                result = _provider_complete(name, messages)
+            except Exception as e:
+                breaker.record_failure(time.perf_counter() - started, str(e))
+                print(f"LLM provider {name} failed: {str(e)}")
+                last_error = e
+                continue
+            breaker.record_success(time.perf_counter() - started)
+            return result
+        raise last_error or _all_providers_skipped()
+
+def stream_chat(messages, max_queue_wait = None):
+    """Iterator of text deltas as the provider produces them; close() it to stop generation.
+    Fails over to the next provider only until the first delta has been yielded.
+    The outbound slot is held until the stream ends or is closed."""
+    providers = _available_providers()
+    with get_llm_limiter().slot(max_queue_wait):
+        last_error = None
+        for name in providers:
+            breaker = get_provider_breaker(name)
+            if not breaker.allow():
+                continue
+            started = time.perf_counter()
+            first_delta_at = None
+            deltas = _provider_stream(name, messages)
+            try:
+                for delta in deltas:
+                    if first_delta_at is None:
+                        first_delta_at = time.perf_counter()
+                    yield delta
+            except GeneratorExit:
+                # Closed by the consumer: the provider was working, so this is not a failure
+                breaker.record_success((first_delta_at or time.perf_counter()) - started)
+                raise
+            except Exception as e:
+                breaker.record_failure(time.perf_counter() - started, str(e))
+                if first_delta_at is not None:
+                    raise  # Part of the answer is already out
+                print(f"LLM provider {name} failed: {str(e)}")
+                last_error = e
+                continue
+            finally:
+                deltas.close()
+            # Latency of a stream is judged by its time to first delta
+            breaker.record_success((first_delta_at or time.perf_counter()) - started)
+            return
+        raise last_error or _all_providers_skipped()
+
+def get_query_response(query, systempromptpath = "system_prompt.txt", use_cache = True, max_queue_wait = None):
+    # Prompt files are read once and re-read only when they change on disk (paths are relative to app/)
+    prompt = get_prompt_store().get(systempromptpath)
+    system_msg = prompt.text
+
+    # Identical (normalized) queries against the same prompt version reuse the cached answer
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    if use_cache:
+        cached = get_llm_cache().get(systempromptpath, system_msg, query, prompt_hash=prompt.hash)
+        if cached is not None:
+            return cached
+
+    def call_upstream():
+        result = complete_chat([{ "role":"system", "content" : system_msg},{"role": "user", "content": query}], max_queue_wait)
+        # Cached before the flight ends, so callers arriving after it hit the cache instead
+        if use_cache and result:
+            get_llm_cache().set(systempromptpath, system_msg, query, result, prompt_hash=prompt.hash)
+        return result
+
+    # Concurrent callers with the same prompt and normalized query wait for one upstream call
+    if settings.LLM_SINGLEFLIGHT_ENABLED:
+        key = make_cache_key(systempromptpath, prompt.hash, query)
+        return get_llm_singleflight().do(key, call_upstream)
+    return call_upstream()
+
+def stream_query_response(query, systempromptpath = "system_prompt.txt", use_cache = True, cancelled = None):
+    """Streaming variant of get_query_response: yields the answer in pieces as they arrive.
+    A cached answer is yielded whole. Setting the `cancelled` event (or closing the generator)
+    stops reading from the provider; only a completed answer is written to the cache."""
+    prompt = get_prompt_store().get(systempromptpath)
+    system_msg = prompt.text
+
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    if use_cache:
+        cached = get_llm_cache().get(systempromptpath, system_msg, query, prompt_hash=prompt.hash)
+        if cached is not None:
+            yield cached
+            return
+
+    deltas = stream_chat([{ "role":"system", "content" : system_msg},{"role": "user", "content": query}])
+    parts = []
+    try:
+        for delta in deltas:
+            if cancelled is not None and cancelled.is_set():
+                return
+            parts.append(delta)
+            yield delta
+    finally:
+        deltas.close()
+
+    result = "".join(parts)
+    if use_cache and result:
+        get_llm_cache().set(systempromptpath, system_msg, query, result, prompt_hash=prompt.hash)
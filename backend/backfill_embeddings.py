@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Backfill description embeddings for issues created before embeddings were stored.
+
+Walks the issues table in id order (keyset pagination), embeds descriptions in
+batches with the configured classifier backend and writes the vectors to the
+issue_embeddings table. Issues that already have a vector from the current
+encoder are skipped unless --recompute is given.
+
+Usage:
+    python backfill_embeddings.py
+    python backfill_embeddings.py --batch-size 64 --limit 1000 --recompute
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_
+
+from app.database import SessionLocal
+from app.models import Issue, IssueEmbedding
+from app.services.classifier import get_classifier_service
+from app.services.embedding_store import save_issue_embeddings
+
+
+def fetch_batch(db, after_id, batch_size: int, model: str, recompute: bool):
+    """Next batch of (id, description) after after_id that still needs an embedding"""
+    query = db.query(Issue.id, Issue.description)
+    if not recompute:
+        query = query.outerjoin(
+            IssueEmbedding,
+            and_(IssueEmbedding.issue_id == Issue.id, IssueEmbedding.model == model)
+        ).filter(IssueEmbedding.issue_id.is_(None))
+    if after_id is not None:
+        query = query.filter(Issue.id > after_id)
+    return query.order_by(Issue.id).limit(batch_size).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store description embeddings for existing issues")
+    parser.add_argument("--batch-size", type=int, default=32, help="Descriptions per forward pass")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many issues (0 = all)")
+    parser.add_argument("--recompute", action="store_true", help="Re-embed issues that already have a vector")
+    args = parser.parse_args()
+
+    classifier = get_classifier_service()
+    print(f"🔄 Loading classifier ({classifier.backend})...")
+    if not classifier.ensure_loaded():
+        print(f"❌ Classifier unavailable: {classifier.load_error}")
+        sys.exit(1)
+    model = classifier.embedding_model
+
+    db = SessionLocal()
+    processed = 0
+    after_id = None
+    start = time.perf_counter()
+    try:
+        while not args.limit or processed < args.limit:
+            batch_size = args.batch_size if not args.limit else min(args.batch_size, args.limit - processed)
+            rows = fetch_batch(db, after_id, batch_size, model, args.recompute)
+            if not rows:
+                break
+
+            _, embeddings = classifier.predict_with_embeddings([description for _, description in rows])
+            save_issue_embeddings(db, [(issue_id, vector) for (issue_id, _), vector in zip(rows, embeddings)], model)
+
+            processed += len(rows)
+            after_id = rows[-1][0]
+            elapsed = time.perf_counter() - start
+            print(f"   {processed} issues embedded ({processed / elapsed:.1f} issues/s)")
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Backfilled {processed} embeddings with {model} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark the category classifier serving paths on the notebook dataset.
+
+Each backend runs in its own process so load time and peak memory are not
+polluted by the others. Reports load time, peak RSS, batch-size-1 latency
+(p50/p99), accuracy against the dataset labels and label agreement with the
+first backend (the current Keras path by default).
+
+Usage:
+    python benchmark_classifier.py
+    python benchmark_classifier.py --backends keras onnx onnx-fp32 --samples 300
+    python benchmark_classifier.py --backends keras distilled distilled-onnx --split test --samples 0
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model", "dataset_cleaned.csv")
+ONNX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "routers", "onnx")
+DISTILLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "routers", "distilled")
+
+
+def read_rows(path: str) -> list:
+    """(text, label) rows of the notebook dataset, cleaned the same way as in the notebook"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["text"].strip().strip('"').strip("'").strip(), int(row["label"])) for row in csv.DictReader(f)]
+
+
+def stratified_split(rows: list, test_fraction: float = 0.2, seed: int = 42) -> tuple:
+    """Deterministic per-label train/test split (same proportions as the notebook's 80/20 split)"""
+    rng = random.Random(seed)
+    train, test = [], []
+    for label in sorted({label for _, label in rows}):
+        group = [row for row in rows if row[1] == label]
+        rng.shuffle(group)
+        cut = int(round(len(group) * test_fraction))
+        test.extend(group[:cut])
+        train.extend(group[cut:])
+    rng.shuffle(train)
+    rng.shuffle(test)
+    return train, test
+
+
+def load_dataset(path: str, samples: int, seed: int, split: str = "all") -> tuple:
+    """Return (texts, labels) sampled from the notebook dataset ("all" rows or only the held-out "test" split)"""
+    rows = read_rows(path)
+    if split == "test":
+        rows = stratified_split(rows)[1]
+    random.Random(seed).shuffle(rows)
+    rows = rows[:samples] if samples else rows
+    return [text for text, _ in rows], [label for _, label in rows]
+
+
+def build_classifier(backend: str):
+    """Map a benchmark backend name to a classifier instance"""
+    if backend == "keras":
+        from app.services.classifier import CategoryClassifier
+        return CategoryClassifier()
+    if backend == "onnx":
+        from app.services.onnx_classifier import OnnxCategoryClassifier
+        return OnnxCategoryClassifier(model_path=os.path.join(ONNX_DIR, "classifier.int8.onnx"))
+    if backend == "onnx-fp32":
+        from app.services.onnx_classifier import OnnxCategoryClassifier
+        return OnnxCategoryClassifier(model_path=os.path.join(ONNX_DIR, "classifier.onnx"))
+    if backend == "distilled":
+        from app.services.distilled_classifier import DistilledCategoryClassifier
+        return DistilledCategoryClassifier(model_path=DISTILLED_DIR)
+    if backend == "distilled-onnx":
+        from app.services.onnx_classifier import OnnxCategoryClassifier
+        return OnnxCategoryClassifier(model_path=os.path.join(DISTILLED_DIR, "onnx", "classifier.int8.onnx"))
+    raise ValueError(f"Unknown backend '{backend}'")
+
+
+def peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(backend: str, texts: list, warmup: int, queue):
+    """Child process: load one backend and classify every text with batch size 1"""
+    try:
+        start = time.perf_counter()
+        classifier = build_classifier(backend)
+        classifier.load()
+        load_seconds = time.perf_counter() - start
+
+        for text in texts[:warmup]:
+            classifier.predict([text])
+
+        labels, latencies_ms = [], []
+        for text in texts:
+            started = time.perf_counter()
+            labels.append(classifier.predict([text])[0])
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+
+        queue.put({
+            "backend": backend,
+            "load_seconds": load_seconds,
+            "peak_rss_mb": peak_rss_mb(),
+            "labels": labels,
+            "latencies_ms": latencies_ms
+        })
+    except Exception as e:
+        queue.put({"backend": backend, "error": str(e)})
+
+
+def percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark category classifier backends")
+    parser.add_argument("--backends", nargs="+", default=["keras", "onnx"],
+                        help="keras, onnx (int8), onnx-fp32, distilled, distilled-onnx (int8)")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="CSV with text,label columns")
+    parser.add_argument("--split", choices=["all", "test"], default="all",
+                        help="'test' uses only the held-out rows distill_classifier.py did not train on")
+    parser.add_argument("--samples", type=int, default=200, help="Number of dataset rows to classify (0 = all)")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed warmup predictions per backend")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.services.classifier import CATEGORIES
+
+    texts, expected = load_dataset(args.dataset, args.samples, args.seed, args.split)
+    print(f"📊 Benchmarking {', '.join(args.backends)} on {len(texts)} samples ({args.split} split) from {args.dataset}")
+    print("=" * 100)
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in args.backends:
+        queue = context.Queue()
+        process = context.Process(target=run_backend, args=(backend, texts, args.warmup, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        if "error" in result:
+            print(f"❌ {backend}: {result['error']}")
+            continue
+        results.append(result)
+
+    if not results:
+        return
+
+    baseline = results[0]
+    print(f"{'backend':<16}{'load s':>9}{'peak RSS MB':>13}{'p50 ms':>9}{'p99 ms':>9}{'accuracy':>10}{'agreement':>11}")
+    for result in results:
+        predicted = [CATEGORIES.index(label) for label in result["labels"]]
+        accuracy = sum(p == e for p, e in zip(predicted, expected)) / len(expected)
+        agreement = sum(a == b for a, b in zip(result["labels"], baseline["labels"])) / len(expected)
+        print(
+            f"{result['backend']:<16}"
+            f"{result['load_seconds']:>9.2f}"
+            f"{result['peak_rss_mb']:>13.0f}"
+            f"{percentile(result['latencies_ms'], 50):>9.2f}"
+            f"{percentile(result['latencies_ms'], 99):>9.2f}"
+            f"{accuracy:>10.1%}"
+            f"{agreement:>11.1%}"
+        )
+    print("=" * 100)
+    print(f"Agreement is measured against '{baseline['backend']}'.")
+
+
+if __name__ == "__main__":
+    main()
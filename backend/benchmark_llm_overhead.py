@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local per-call overhead of get_query_response.
+
+Compares the previous implementation (read the system prompt from disk and
+build a new g4f Client on every call) with the current one (prompt store +
+shared client). The provider round trip is replaced by a canned answer and
+the LLM cache is bypassed, so the numbers only contain the work done in this
+process before the request leaves it.
+
+Usage:
+    python benchmark_llm_overhead.py
+    python benchmark_llm_overhead.py --calls 20000 --prompt system_prompt4.txt
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import g4f
+import g4f.client
+from g4f.client import Client
+
+from app import util
+from app.services.prompt_store import get_prompt_store
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+QUERY = "There is a large pothole on the main road near the bus stop."
+
+
+class CannedMessage:
+    content = "LEGITIMATE - civic issue"
+
+
+class CannedChoice:
+    message = CannedMessage()
+
+
+class CannedCompletion:
+    choices = [CannedChoice()]
+
+
+def canned_create(self, messages, model="", provider=None, **kwargs):
+    """Stands in for the provider round trip"""
+    return CannedCompletion()
+
+
+def legacy_get_query_response(query, systempromptpath="system_prompt.txt"):
+    """get_query_response before the prompt store and shared client"""
+    prompt_path = os.path.join(APP_DIR, systempromptpath)
+    with open(prompt_path, "r", encoding="utf-8") as f:
+        system_msg = f.read()
+    client = Client()
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[{"role": "system", "content": system_msg}, {"role": "user", "content": query}],
+        web_search=False,
+        provider=g4f.Provider.Blackbox
+    )
+    return response.choices[0].message.content
+
+
+def current_get_query_response(query, systempromptpath="system_prompt.txt"):
+    return util.get_query_response(query, systempromptpath, use_cache=False)
+
+
+def measure(func, prompt: str, calls: int) -> list:
+    for _ in range(min(100, calls)):
+        func(QUERY, prompt)
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func(QUERY, prompt)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-call overhead of get_query_response")
+    parser.add_argument("--calls", type=int, default=5000, help="Calls per implementation")
+    parser.add_argument("--prompt", default="system_prompt4.txt", help="System prompt file under app/")
+    args = parser.parse_args()
+
+    g4f.client.Completions.create = canned_create
+
+    print(f"📊 {args.calls} calls per implementation, prompt {args.prompt}, provider call stubbed out\n")
+    print(f"{'implementation':<12} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    results = {}
+    for name, func in [("legacy", legacy_get_query_response), ("current", current_get_query_response)]:
+        timings = measure(func, args.prompt, args.calls)
+        results[name] = statistics.mean(timings)
+        print(f"{name:<12} {results[name]:>10.1f} {percentile(timings, 50):>10.1f} {percentile(timings, 99):>10.1f}")
+
+    print(f"\n✅ Overhead per call: {results['legacy']:.1f}us -> {results['current']:.1f}us "
+          f"({results['legacy'] / results['current']:.1f}x)")
+    print(f"   Prompt store: {get_prompt_store().stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for the LLM-backed paths.
+
+Drives the spam/priority/radius stages of issue creation and chatbot queries
+concurrently against the local fake provider (app/services/fake_llm.py), so
+the limiter, circuit breakers and AI stage pool are exercised under load
+without calling an external provider. Latency and error rate of the fake are
+configurable; the LLM cache is bypassed so every request reaches the provider.
+
+Usage:
+    python benchmark_llm_throughput.py
+    python benchmark_llm_throughput.py --requests 500 --concurrency 32 --latency-ms 800 --spread-ms 400 --distribution lognormal --error-rate 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.services import fake_llm as fake_llm_module
+from app.services.fake_llm import LATENCY_DISTRIBUTIONS, FakeLLM
+
+DESCRIPTIONS = [
+    "Large pothole on the main road near the bus stop",
+    "Garbage bin overflowing outside the market for three days",
+    "Streetlight not working on 5th avenue, very dark at night",
+    "Live wire hanging from the electricity pole after the storm",
+    "Water supply outage in our society since morning"
+]
+CHAT_QUERY = "How do I report a broken streetlight?"
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run(name: str, func, requests: int, concurrency: int):
+    def timed(index: int):
+        start = time.perf_counter()
+        try:
+            func(index)
+            ok = True
+        except Exception:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    timings = [timing for timing, _ in results]
+    failed = sum(1 for _, ok in results if not ok)
+    print(f"{name:<10} {requests / elapsed:>10.1f} {statistics.mean(timings):>10.1f} "
+          f"{percentile(timings, 50):>10.1f} {percentile(timings, 99):>10.1f} {failed:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure LLM path throughput against the local fake provider")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="normal", help="Fake provider latency distribution")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean provider latency")
+    parser.add_argument("--spread-ms", type=float, default=100.0, help="Latency spread (half-width or standard deviation)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of provider calls that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings.LLM_FAKE_ENABLED = True
+    settings.LLM_CACHE_ENABLED = False
+    fake_llm_module._fake_llm = FakeLLM(
+        token_delay_ms=0,
+        latency_distribution=args.distribution,
+        latency_ms=args.latency_ms,
+        latency_spread_ms=args.spread_ms,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+
+    from app import util
+    from app.routers.issues import get_priority_from_text, get_radius_from_text, is_spam_from_text
+    from app.services.ai_pipeline import Stage, run_stages
+    from app.services.circuit_breaker import provider_breakers_status
+    from app.services.llm_limiter import get_llm_limiter
+
+    def llm_stages(index: int):
+        # A distinct suffix per request so identical descriptions are not coalesced
+        description = f"{DESCRIPTIONS[index % len(DESCRIPTIONS)]} (report {index})"
+        run_stages([
+            Stage("spam", lambda: is_spam_from_text(description), None, settings.AI_STAGE_TIMEOUT_SPAM),
+            Stage("priority", lambda: get_priority_from_text(description), 1, settings.AI_STAGE_TIMEOUT_PRIORITY),
+            Stage("radius", lambda: get_radius_from_text(description), 500, settings.AI_STAGE_TIMEOUT_RADIUS)
+        ])
+
+    def chatbot(index: int):
+        util.get_query_response(f"{CHAT_QUERY} ({index})")
+
+    print(f"📊 {args.requests} requests x {args.concurrency} clients, provider latency {args.distribution} "
+          f"{args.latency_ms:.0f}±{args.spread_ms:.0f}ms, error rate {args.error_rate:.0%}\n")
+    print(f"{'scenario':<10} {'req/s':>10} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'failed':>8}")
+    run("issues", llm_stages, args.requests, args.concurrency)
+    run("chatbot", chatbot, args.requests, args.concurrency)
+
+    print(f"\n✅ Fake provider: {fake_llm_module.get_fake_llm().status()}")
+    print(f"   Limiter: {get_llm_limiter().status()}")
+    print(f"   Breakers: {provider_breakers_status()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark the import time and memory of the API process at startup.
+
+Each run imports the app (app.main by default) in a fresh interpreter and
+records the wall time of the import, the peak RSS before and after it (VmHWM
+where /proc is available), and which heavy ML/LLM modules ended up in
+sys.modules. Those modules must only be loaded by the classifier service and
+the LLM client on first use; the budgets below are enforced by
+test_startup_imports.py.
+
+Usage:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 --top 15
+    python benchmark_startup.py --budget-seconds 3 --budget-rss-mb 250
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Must not be imported just by starting the app
+HEAVY_MODULES = ["torch", "tensorflow", "keras", "transformers", "onnxruntime", "h5py", "g4f"]
+
+IMPORT_TIME_BUDGET_SECONDS = 5.0
+IMPORT_RSS_BUDGET_MB = 400.0
+
+# Runs in the child interpreter; prints one JSON line
+MEASURE_SNIPPET = """
+import importlib, json, sys, time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss_mb():
+    # VmHWM belongs to this process image; ru_maxrss on Linux also carries the parent's
+    # peak across fork/exec, so it would include whatever the test runner loaded before
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+rss_before = peak_rss_mb()
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - started
+print(json.dumps({
+    "seconds": seconds,
+    "rss_before_mb": rss_before,
+    "rss_mb": peak_rss_mb(),
+    "heavy_modules": [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+    "modules": len(sys.modules)
+}))
+"""
+
+
+def measure_import(module: str = "app.main") -> dict:
+    """Import module in a fresh interpreter and return its import time, RSS and heavy modules"""
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SNIPPET, module, json.dumps(HEAVY_MODULES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def top_imports(module: str, count: int) -> list:
+    """Slowest imports by cumulative time, from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative) / 1e6, name))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import time and RSS")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (0 to skip)")
+    parser.add_argument("--budget-seconds", type=float, default=IMPORT_TIME_BUDGET_SECONDS)
+    parser.add_argument("--budget-rss-mb", type=float, default=IMPORT_RSS_BUDGET_MB)
+    args = parser.parse_args()
+
+    print(f"🔄 Importing {args.module} in {args.runs} fresh interpreters...")
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    seconds = sorted(run["seconds"] for run in runs)
+    median_seconds = statistics.median(seconds)
+    rss = [run["rss_mb"] for run in runs if run["rss_mb"] is not None]
+    median_rss = statistics.median(rss) if rss else None
+    heavy = sorted({name for run in runs for name in run["heavy_modules"]})
+
+    print(f"📊 Import time: median {median_seconds:.3f}s, min {seconds[0]:.3f}s, max {seconds[-1]:.3f}s")
+    if median_rss is not None:
+        interpreter = statistics.median(run["rss_before_mb"] for run in runs)
+        print(f"📊 Peak RSS: median {median_rss:.1f} MB (interpreter alone {interpreter:.1f} MB)")
+    print(f"📊 Modules loaded: {runs[0]['modules']}")
+
+    if args.top:
+        print(f"\n🐢 Slowest imports (cumulative):")
+        for cumulative, name in top_imports(args.module, args.top):
+            print(f"   {cumulative:7.3f}s  {name}")
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if median_seconds > args.budget_seconds:
+        failures.append(f"import time {median_seconds:.3f}s exceeds {args.budget_seconds}s")
+    if median_rss is not None and median_rss > args.budget_rss_mb:
+        failures.append(f"peak RSS {median_rss:.1f} MB exceeds {args.budget_rss_mb} MB")
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print(f"✅ Within budget ({args.budget_seconds}s, {args.budget_rss_mb} MB) and no heavy modules at startup")
+
+
+if __name__ == "__main__":
+    main()
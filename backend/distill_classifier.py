@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Distill the RoBERTa-base + model_new.h5 category classifier into a smaller encoder.
+
+The teacher is the serving pipeline (RoBERTa-base [CLS] embedding followed by
+the model_new.h5 head). The student is a small Hugging Face encoder with a
+sequence classification layer, fine-tuned on the notebook dataset
+(model/dataset_cleaned.csv) with a mix of the hard labels and the teacher's
+temperature-softened probabilities. The best epoch on the held-out split is
+saved together with its tokenizer and a model_info.json, ready to be served
+with CLASSIFIER_VARIANT=distilled.
+
+Usage:
+    python distill_classifier.py
+    python distill_classifier.py --student distilroberta-base --epochs 4 --temperature 2.0
+    python export_onnx_classifier.py --variant distilled
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, get_linear_schedule_with_warmup
+
+from app.services.classifier import CategoryClassifier, CATEGORIES, MODEL_INFO_FILE
+from benchmark_classifier import DATASET_PATH, DISTILLED_DIR, read_rows, stratified_split
+
+
+def teacher_probabilities(teacher: CategoryClassifier, texts: list, batch_size: int) -> np.ndarray:
+    """Class probabilities of the current serving pipeline"""
+    outputs = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        outputs.append(teacher.predict_proba(teacher.embed(batch)))
+    return np.concatenate(outputs).astype(np.float32)
+
+
+def soften(probabilities: torch.Tensor, temperature: float) -> torch.Tensor:
+    """Teacher head outputs softmax probabilities; p^(1/T) renormalized equals softmax(logits / T)"""
+    softened = probabilities.clamp_min(1e-8) ** (1.0 / temperature)
+    return softened / softened.sum(dim=-1, keepdim=True)
+
+
+def evaluate(model, tokenizer, texts: list, labels: list, batch_size: int, max_length: int) -> float:
+    model.eval()
+    correct = 0
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            tokenized = tokenizer(
+                texts[start:start + batch_size], return_tensors="pt",
+                truncation=True, padding=True, max_length=max_length
+            )
+            predicted = model(**tokenized).logits.argmax(dim=-1)
+            correct += int((predicted == torch.tensor(labels[start:start + batch_size])).sum())
+    return correct / len(texts)
+
+
+def distill(args):
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    torch.manual_seed(args.seed)
+
+    train_rows, test_rows = stratified_split(read_rows(args.dataset), args.test_fraction, args.seed)
+    train_texts, train_labels = [text for text, _ in train_rows], [label for _, label in train_rows]
+    test_texts, test_labels = [text for text, _ in test_rows], [label for _, label in test_rows]
+    print(f"📊 {len(train_texts)} training and {len(test_texts)} held-out descriptions from {args.dataset}")
+
+    print("🔄 Scoring the training set with the RoBERTa-base + model_new.h5 teacher...")
+    teacher = CategoryClassifier()
+    teacher.load()
+    soft_targets = torch.from_numpy(teacher_probabilities(teacher, train_texts, args.batch_size))
+    teacher_test = teacher_probabilities(teacher, test_texts, args.batch_size)
+    teacher_accuracy = float(np.mean(np.argmax(teacher_test, axis=1) == np.array(test_labels)))
+    print(f"   Teacher held-out accuracy: {teacher_accuracy:.1%}")
+    del teacher
+
+    print(f"🔄 Fine-tuning student '{args.student}'")
+    tokenizer = AutoTokenizer.from_pretrained(args.student)
+    model = AutoModelForSequenceClassification.from_pretrained(
+        args.student,
+        num_labels=len(CATEGORIES),
+        id2label=dict(enumerate(CATEGORIES)),
+        label2id={label: index for index, label in enumerate(CATEGORIES)}
+    )
+
+    steps_per_epoch = (len(train_texts) + args.batch_size - 1) // args.batch_size
+    optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=0.01)
+    scheduler = get_linear_schedule_with_warmup(
+        optimizer, int(0.1 * steps_per_epoch * args.epochs), steps_per_epoch * args.epochs
+    )
+    hard_targets = torch.tensor(train_labels)
+
+    best_accuracy, best_epoch = -1.0, 0
+    for epoch in range(1, args.epochs + 1):
+        model.train()
+        order = torch.randperm(len(train_texts)).tolist()
+        total_loss, started = 0.0, time.perf_counter()
+        for start in range(0, len(order), args.batch_size):
+            index = order[start:start + args.batch_size]
+            tokenized = tokenizer(
+                [train_texts[i] for i in index], return_tensors="pt",
+                truncation=True, padding=True, max_length=args.max_length
+            )
+            logits = model(**tokenized).logits
+            hard_loss = F.cross_entropy(logits, hard_targets[index])
+            soft_loss = F.kl_div(
+                F.log_softmax(logits / args.temperature, dim=-1),
+                soften(soft_targets[index], args.temperature),
+                reduction="batchmean"
+            ) * args.temperature ** 2
+            loss = args.alpha * hard_loss + (1 - args.alpha) * soft_loss
+
+            optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            total_loss += float(loss) * len(index)
+
+        accuracy = evaluate(model, tokenizer, test_texts, test_labels, args.batch_size, args.max_length)
+        print(f"   epoch {epoch}: loss {total_loss / len(order):.4f}, held-out accuracy {accuracy:.1%} "
+              f"({time.perf_counter() - started:.0f}s)")
+        if accuracy > best_accuracy:
+            best_accuracy, best_epoch = accuracy, epoch
+            os.makedirs(args.output_dir, exist_ok=True)
+            model.save_pretrained(args.output_dir)
+            tokenizer.save_pretrained(args.output_dir)
+
+    info = {
+        "encoder": args.student,
+        "teacher": "roberta-base + model_new.h5",
+        "epoch": best_epoch,
+        "held_out_accuracy": round(best_accuracy, 4),
+        "teacher_held_out_accuracy": round(teacher_accuracy, 4),
+        "temperature": args.temperature,
+        "alpha": args.alpha,
+        "max_length": args.max_length
+    }
+    with open(os.path.join(args.output_dir, MODEL_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    print(f"✅ Saved epoch {best_epoch} ({best_accuracy:.1%} held-out, teacher {teacher_accuracy:.1%}) to {args.output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the category classifier into a smaller encoder")
+    parser.add_argument("--student", default="distilroberta-base", help="Hugging Face encoder to fine-tune")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="CSV with text,label columns")
+    parser.add_argument("--output-dir", default=DISTILLED_DIR, help="Where the checkpoint and tokenizer are saved")
+    parser.add_argument("--epochs", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=5e-5)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--temperature", type=float, default=2.0, help="Softening applied to teacher probabilities")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight of the hard-label loss (rest is distillation)")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    distill(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Export the RoBERTa encoder and the model_new.h5 dense head as one ONNX graph.
+
+The graph takes input_ids/attention_mask and returns both the [CLS] embeddings
+and the class probabilities. An int8 dynamically quantized copy is written
+next to the fp32 graph, together with the tokenizer files used at serving time.
+With --variant distilled the checkpoint written by distill_classifier.py is
+exported instead, with the same inputs and outputs.
+
+Usage:
+    python export_onnx_classifier.py
+    python export_onnx_classifier.py --output-dir app/routers/onnx --no-quantize
+    python export_onnx_classifier.py --variant distilled
+"""
+import argparse
+import os
+import shutil
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, RobertaTokenizerFast, RobertaModel
+
+from app.services.classifier import MODEL_INFO_FILE
+from app.services.numpy_head import NumpyDenseHead
+
+DEFAULT_HEAD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "routers", "model_new.h5")
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "routers", "onnx")
+DISTILLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "routers", "distilled")
+
+
+class EncoderWithHead(torch.nn.Module):
+    """RoBERTa [CLS] embedding followed by a PyTorch copy of the Keras dense head"""
+
+    def __init__(self, encoder: RobertaModel, dense_layers: list):
+        super().__init__()
+        self.encoder = encoder
+        layers = []
+        for kernel, bias, activation in dense_layers:
+            linear = torch.nn.Linear(kernel.shape[0], kernel.shape[1])
+            with torch.no_grad():
+                # Keras stores kernels as (in, out), torch as (out, in)
+                linear.weight.copy_(torch.from_numpy(kernel.T.copy()))
+                linear.bias.copy_(torch.from_numpy(bias.copy()))
+            layers.append(linear)
+            if activation == "relu":
+                layers.append(torch.nn.ReLU())
+            elif activation == "softmax":
+                layers.append(torch.nn.Softmax(dim=-1))
+            elif activation == "sigmoid":
+                layers.append(torch.nn.Sigmoid())
+            elif activation == "tanh":
+                layers.append(torch.nn.Tanh())
+            elif activation != "linear":
+                raise ValueError(f"Unsupported activation in classification head: {activation}")
+        self.head = torch.nn.Sequential(*layers)
+
+    def forward(self, input_ids, attention_mask):
+        outputs = self.encoder(input_ids=input_ids, attention_mask=attention_mask)
+        embeddings = outputs.last_hidden_state[:, 0, :]
+        return embeddings, self.head(embeddings)
+
+
+class DistilledWithProbabilities(torch.nn.Module):
+    """Distilled sequence classifier returning the same (embeddings, probabilities) pair"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True)
+        return outputs.hidden_states[-1][:, 0, :], torch.softmax(outputs.logits, dim=-1)
+
+
+def read_keras_dense_layers(head_path: str) -> list:
+    """Return [(kernel, bias, activation)] for each Dense layer of the Keras head (Dropout is a no-op at inference)"""
+    return NumpyDenseHead.from_h5(head_path).layers
+
+
+def load_base_model(head_path: str, encoder_name: str):
+    print(f"📦 Loading encoder '{encoder_name}' and head '{head_path}'")
+    tokenizer = RobertaTokenizerFast.from_pretrained(encoder_name)
+    encoder = RobertaModel.from_pretrained(encoder_name)
+    return EncoderWithHead(encoder, read_keras_dense_layers(head_path)).eval(), tokenizer
+
+
+def load_distilled_model(model_dir: str):
+    print(f"📦 Loading distilled checkpoint '{model_dir}'")
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    return DistilledWithProbabilities(model.eval()).eval(), tokenizer
+
+
+def export(model: torch.nn.Module, tokenizer, output_dir: str, quantize: bool, opset: int, model_info_dir: str = None):
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "classifier.onnx")
+    int8_path = os.path.join(output_dir, "classifier.int8.onnx")
+
+    sample = tokenizer(["Garbage has not been collected in our street for a week"], return_tensors="pt")
+    print(f"🔧 Exporting fp32 graph to {fp32_path}")
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["embeddings", "probabilities"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "embeddings": {0: "batch"},
+            "probabilities": {0: "batch"}
+        },
+        opset_version=opset,
+        do_constant_folding=True
+    )
+    tokenizer.save_pretrained(output_dir)
+    if model_info_dir and os.path.exists(os.path.join(model_info_dir, MODEL_INFO_FILE)):
+        # Lets the ONNX serving path tag embeddings with the distilled encoder
+        shutil.copy(os.path.join(model_info_dir, MODEL_INFO_FILE), os.path.join(output_dir, MODEL_INFO_FILE))
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(f"🔧 Writing int8 dynamically quantized graph to {int8_path}")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    verify(model, tokenizer, [fp32_path] + ([int8_path] if quantize else []))
+
+
+def verify(model: torch.nn.Module, tokenizer, graph_paths: list):
+    """Compare exported graphs against the PyTorch reference on a few sentences"""
+    import onnxruntime as ort
+
+    texts = [
+        "Huge pothole near the bus stop on MG Road",
+        "Garbage dump overflowing next to the school",
+        "Street light pole is sparking after the rain",
+        "The public toilet in the park has no water"
+    ]
+    tokenized = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=128)
+    with torch.no_grad():
+        _, reference = model(tokenized["input_ids"], tokenized["attention_mask"])
+    reference = reference.numpy()
+
+    for path in graph_paths:
+        session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        _, probabilities = session.run(None, {
+            "input_ids": tokenized["input_ids"].numpy(),
+            "attention_mask": tokenized["attention_mask"].numpy()
+        })
+        agreement = float(np.mean(np.argmax(probabilities, axis=1) == np.argmax(reference, axis=1)))
+        max_diff = float(np.max(np.abs(probabilities - reference)))
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"✅ {os.path.basename(path)}: {size_mb:.1f} MB, label agreement {agreement:.0%}, max prob diff {max_diff:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the issue category classifier to ONNX")
+    parser.add_argument("--variant", choices=["base", "distilled"], default="base",
+                        help="base: roberta-base + model_new.h5, distilled: distill_classifier.py checkpoint")
+    parser.add_argument("--head", default=DEFAULT_HEAD_PATH, help="Path to the Keras model_new.h5 head")
+    parser.add_argument("--distilled-dir", default=DISTILLED_DIR, help="Checkpoint written by distill_classifier.py")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory for the ONNX graphs and tokenizer (default: app/routers/onnx or <distilled-dir>/onnx)")
+    parser.add_argument("--encoder", default="roberta-base", help="Hugging Face encoder name")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 dynamic quantization step")
+    args = parser.parse_args()
+
+    if args.variant == "distilled":
+        model, tokenizer = load_distilled_model(args.distilled_dir)
+        output_dir = args.output_dir or os.path.join(args.distilled_dir, "onnx")
+        export(model, tokenizer, output_dir, quantize=not args.no_quantize, opset=args.opset,
+               model_info_dir=args.distilled_dir)
+    else:
+        model, tokenizer = load_base_model(args.head, args.encoder)
+        export(model, tokenizer, args.output_dir or DEFAULT_OUTPUT_DIR, quantize=not args.no_quantize, opset=args.opset)
+
+
+if __name__ == "__main__":
+    main()
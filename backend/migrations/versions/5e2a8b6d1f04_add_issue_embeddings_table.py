@@ -0,0 +1,38 @@
+"""add_issue_embeddings_table
+
+Revision ID: 5e2a8b6d1f04
+Revises: 9c1d4e7f2a3b
+Create Date: 2026-10-17 13:41:09.227365
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a8b6d1f04'
+down_revision: Union[str, Sequence[str], None] = '9c1d4e7f2a3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('issue_embeddings',
+    sa.Column('issue_id', sa.UUID(), nullable=False),
+    sa.Column('model', sa.String(length=255), nullable=False),
+    sa.Column('dim', sa.Integer(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['issue_id'], ['issues.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('issue_id')
+    )
+    op.create_index(op.f('ix_issue_embeddings_model'), 'issue_embeddings', ['model'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_issue_embeddings_model'), table_name='issue_embeddings')
+    op.drop_table('issue_embeddings')
@@ -0,0 +1,29 @@
+"""add_issue_enrichment_status
+
+Revision ID: 9c1d4e7f2a3b
+Revises: 4b8e2f1c9a7d
+Create Date: 2026-10-17 11:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1d4e7f2a3b'
+down_revision: Union[str, Sequence[str], None] = '4b8e2f1c9a7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing issues were enriched synchronously when they were created
+    op.add_column('issues', sa.Column('enrichment_status', sa.String(length=20), server_default='complete', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('issues', 'enrichment_status')
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Re-classify existing issues after the category model has been retrained.
+
+Walks the issues table in id order (keyset pagination, one chunk in memory at
+a time), classifies descriptions in batches with the configured classifier and
+bulk-updates the category of every issue whose label changed. With
+--update-authority the issue is also re-routed to the authority of the new
+category in its current district.
+
+When the classifier exposes its head (the RoBERTa-base + model_new.h5
+pipeline), issues that already have an embedding from the same encoder in
+issue_embeddings are scored with the head alone; only the others go through
+the encoder, and their new embeddings are stored.
+
+Progress is written to a checkpoint file after every committed chunk, so an
+interrupted run resumes where it stopped. A checkpoint written with a
+different model file is rejected unless --restart is given.
+
+Usage:
+    python reclassify_issues.py --dry-run
+    python reclassify_issues.py --update-authority
+    python reclassify_issues.py --batch-size 64 --checkpoint /tmp/reclassify.json --restart
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from uuid import UUID
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import update
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Authority, Issue
+from app.services.classifier import CATEGORIES, get_classifier_service
+from app.services.embedding_store import get_issue_embeddings, save_issue_embeddings
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reclassify_checkpoint.json")
+
+
+def model_signature(classifier) -> dict:
+    """Identifies the model a run was made with, so a resume does not mix two models"""
+    signature = {"embedding_model": classifier.embedding_model, "model_path": classifier.model_path}
+    if classifier.model_path and os.path.exists(classifier.model_path):
+        signature["model_mtime_ns"] = os.stat(classifier.model_path).st_mtime_ns
+    return signature
+
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """Write atomically so a crash never leaves a truncated checkpoint"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def load_authority_map(db) -> dict:
+    """(category, district) -> authority id, same lookup as get_authority in the issues router"""
+    authorities = {}
+    for authority_id, category, district in db.query(Authority.id, Authority.category, Authority.district).order_by(Authority.id):
+        authorities.setdefault((category, district), authority_id)
+    return authorities
+
+
+def fetch_chunk(db, after_id, chunk_size: int, open_only: bool):
+    """Next chunk of (id, description, category, authority_id, district) after after_id"""
+    query = db.query(
+        Issue.id, Issue.description, Issue.category, Issue.authority_id, Authority.district
+    ).join(Authority, Issue.authority_id == Authority.id)
+    if open_only:
+        query = query.filter(Issue.status.in_([0, 1]))
+    if after_id is not None:
+        query = query.filter(Issue.id > after_id)
+    return query.order_by(Issue.id).limit(chunk_size).all()
+
+
+def classify_chunk(classifier, db, rows, use_stored_embeddings: bool, store_embeddings: bool) -> tuple:
+    """Labels for a chunk of rows. Returns (labels, number scored from stored embeddings)"""
+    labels = [None] * len(rows)
+    stored = {}
+    if use_stored_embeddings:
+        stored = get_issue_embeddings(db, [row.id for row in rows], model=classifier.embedding_model)
+
+    # Fused backends (ONNX, distilled, process pool) only classify whole texts
+    reused = []
+    if classifier.supports_head_scoring:
+        reused = [index for index, row in enumerate(rows) if row.id in stored]
+    if reused:
+        probabilities = classifier.predict_proba(np.stack([stored[rows[index].id] for index in reused]))
+        for index, category_index in zip(reused, np.argmax(probabilities, axis=1)):
+            labels[index] = CATEGORIES[category_index]
+
+    pending = [index for index, label in enumerate(labels) if label is None]
+    if pending:
+        new_labels, embeddings = classifier.predict_with_embeddings([rows[index].description for index in pending])
+        for index, label in zip(pending, new_labels):
+            labels[index] = label
+        if store_embeddings:
+            save_issue_embeddings(db, [(rows[index].id, vector) for index, vector in zip(pending, embeddings)], classifier.embedding_model)
+    return labels, len(reused)
+
+
+def reclassify(
+    db,
+    classifier,
+    batch_size: int = 32,
+    limit: int = 0,
+    update_authority: bool = False,
+    open_only: bool = False,
+    dry_run: bool = False,
+    use_stored_embeddings: bool = True,
+    checkpoint_path: str = None,
+    checkpoint: dict = None,
+    progress=print
+) -> dict:
+    """Re-classify issues chunk by chunk; returns the run totals (also the checkpoint contents)"""
+    checkpoint = dict(checkpoint or {})
+    totals = {
+        "after_id": checkpoint.get("after_id"),
+        "processed": checkpoint.get("processed", 0),
+        "changed": checkpoint.get("changed", 0),
+        "rerouted": checkpoint.get("rerouted", 0),
+        "no_authority": checkpoint.get("no_authority", 0),
+        "from_stored_embeddings": checkpoint.get("from_stored_embeddings", 0),
+        "transitions": Counter(checkpoint.get("transitions", {})),
+        **model_signature(classifier)
+    }
+    authorities = load_authority_map(db) if update_authority else {}
+    store_embeddings = settings.EMBEDDINGS_ENABLED and not dry_run
+
+    processed_this_run = 0
+    start = time.perf_counter()
+    while not limit or processed_this_run < limit:
+        chunk_size = batch_size if not limit else min(batch_size, limit - processed_this_run)
+        after_id = totals["after_id"]
+        rows = fetch_chunk(db, None if after_id is None else UUID(after_id), chunk_size, open_only)
+        if not rows:
+            break
+
+        labels, reused = classify_chunk(classifier, db, rows, use_stored_embeddings, store_embeddings)
+
+        updates = []
+        for row, label in zip(rows, labels):
+            values = {}
+            if label != row.category:
+                values["category"] = label
+                totals["changed"] += 1
+                totals["transitions"][f"{row.category} -> {label}"] += 1
+            if update_authority:
+                authority_id = authorities.get((label, row.district))
+                if authority_id is None:
+                    totals["no_authority"] += 1
+                elif authority_id != row.authority_id:
+                    values["authority_id"] = authority_id
+                    totals["rerouted"] += 1
+            if values:
+                updates.append({"id": row.id, **values})
+
+        if updates and not dry_run:
+            db.execute(update(Issue), updates)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+
+        processed_this_run += len(rows)
+        totals["processed"] += len(rows)
+        totals["from_stored_embeddings"] += reused
+        totals["after_id"] = str(rows[-1].id)
+        if checkpoint_path and not dry_run:
+            save_checkpoint(checkpoint_path, _serializable(totals))
+
+        elapsed = time.perf_counter() - start
+        progress(
+            f"   {totals['processed']} issues ({processed_this_run / elapsed:.1f} issues/s), "
+            f"{totals['changed']} re-categorized, {totals['rerouted']} re-routed"
+        )
+
+    totals["seconds"] = time.perf_counter() - start
+    totals["processed_this_run"] = processed_this_run
+    return _serializable(totals)
+
+
+def _serializable(totals: dict) -> dict:
+    return {**totals, "transitions": dict(totals["transitions"])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-classify existing issues with the current category model")
+    parser.add_argument("--batch-size", type=int, default=32, help="Issues per chunk and forward pass")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many issues in this run (0 = all)")
+    parser.add_argument("--update-authority", action="store_true", help="Also re-route issues to the authority of the new category")
+    parser.add_argument("--open-only", action="store_true", help="Skip resolved and closed issues")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--no-stored-embeddings", action="store_true", help="Always run the encoder, even when a stored embedding exists")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Progress file used to resume")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start from the first issue")
+    args = parser.parse_args()
+
+    classifier = get_classifier_service()
+    print(f"🔄 Loading classifier ({classifier.backend})...")
+    if not classifier.ensure_loaded():
+        print(f"❌ Classifier unavailable: {classifier.load_error}")
+        sys.exit(1)
+
+    checkpoint = {} if args.restart or args.dry_run else load_checkpoint(args.checkpoint)
+    if checkpoint:
+        signature = model_signature(classifier)
+        if any(checkpoint.get(key) != value for key, value in signature.items()):
+            print(f"❌ {args.checkpoint} was written with a different model; use --restart to start over")
+            sys.exit(1)
+        print(f"⏩ Resuming after issue {checkpoint['after_id']} ({checkpoint['processed']} already processed)")
+
+    db = SessionLocal()
+    try:
+        totals = reclassify(
+            db,
+            classifier,
+            batch_size=args.batch_size,
+            limit=args.limit,
+            update_authority=args.update_authority,
+            open_only=args.open_only,
+            dry_run=args.dry_run,
+            use_stored_embeddings=not args.no_stored_embeddings,
+            checkpoint_path=args.checkpoint,
+            checkpoint=checkpoint
+        )
+    finally:
+        db.close()
+
+    rate = totals["processed_this_run"] / totals["seconds"] if totals["seconds"] else 0.0
+    verb = "Would re-categorize" if args.dry_run else "Re-categorized"
+    print(f"\n✅ {verb} {totals['changed']} of {totals['processed']} issues "
+          f"({totals['processed_this_run']} this run in {totals['seconds']:.1f}s, {rate:.1f} issues/s)")
+    print(f"   {totals['from_stored_embeddings']} scored from stored embeddings")
+    if args.update_authority:
+        print(f"   {totals['rerouted']} re-routed, {totals['no_authority']} without an authority for the new category")
+    for transition, count in sorted(totals["transitions"].items(), key=lambda item: -item[1]):
+        print(f"   {count:6d}  {transition}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the concurrent AI stage runner
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.ai_pipeline import Stage, run_stages, pipeline_stats
+
+
+def sleeper(seconds, value):
+    def run():
+        time.sleep(seconds)
+        return value
+    return run
+
+
+def test_stages_run_concurrently():
+    """Total latency follows the slowest stage, not the sum"""
+    executor = ThreadPoolExecutor(max_workers=4)
+    stages = [
+        Stage("spam", sleeper(0.3, "LEGITIMATE"), "fallback", 5),
+        Stage("category", sleeper(0.3, "Road Authority"), "fallback", 5),
+        Stage("priority", sleeper(0.3, 2), 1, 5),
+        Stage("radius", sleeper(0.3, 100), 500, 5),
+    ]
+    started = time.perf_counter()
+    results = run_stages(stages, executor)
+    elapsed = time.perf_counter() - started
+
+    assert all(result.status == "ok" for result in results.values())
+    assert results["priority"].value == 2
+    assert elapsed < 0.9, f"stages ran sequentially ({elapsed:.2f}s)"
+    print(f"✅ Four 0.3s stages finished in {elapsed:.2f}s")
+    executor.shutdown(wait=True)
+
+
+def test_timeout_uses_fallback():
+    """A stage that misses its deadline returns the fallback without holding up the others"""
+    executor = ThreadPoolExecutor(max_workers=2)
+    stages = [
+        Stage("radius", sleeper(1.0, 100), 500, 0.2),
+        Stage("priority", sleeper(0.05, 3), 1, 5),
+    ]
+    started = time.perf_counter()
+    results = run_stages(stages, executor)
+    elapsed = time.perf_counter() - started
+
+    assert results["radius"].status == "timeout"
+    assert results["radius"].value == 500
+    assert results["priority"].value == 3
+    assert elapsed < 0.8
+    assert pipeline_stats.snapshot()["radius"]["timeout"] >= 1
+    print(f"✅ Timed-out stage fell back after {elapsed:.2f}s")
+    executor.shutdown(wait=True)
+
+
+def test_error_uses_fallback():
+    """A stage that raises returns the fallback and keeps the error message"""
+    def broken():
+        raise RuntimeError("provider down")
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    results = run_stages([Stage("spam", broken, "LEGITIMATE - check unavailable", 5)], executor)
+
+    assert results["spam"].status == "error"
+    assert results["spam"].value == "LEGITIMATE - check unavailable"
+    assert "provider down" in results["spam"].error
+    print("✅ Failing stage fell back")
+    executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
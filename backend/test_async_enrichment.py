@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Unit tests for provisional issue categories and the background enrichment worker
+"""
+import sys
+import os
+import threading
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.routers.issues as issues
+from app.config import settings
+from app.models import Authority, Base, Issue, Notification, User, Vote
+from app.services.enrichment import EnrichmentResult
+from app.services.keyword_classifier import guess_category
+from app.services.enrichment_worker import EnrichmentWorker
+
+
+def test_keyword_guess():
+    """Obvious reports are routed to the matching authority"""
+    test_cases = [
+        ("Huge pothole on the main road near the bus depot", "Road Authority"),
+        ("Garbage has not been collected for a week and the bins are overflowing", "Dumping/Waste Authority"),
+        ("The park benches are broken and the public toilet is locked", "Public Amenities Authority"),
+        ("Frequent power cuts and low voltage since the transformer blew", "Electricity Company"),
+        ("Something is wrong here", "Road Authority"),  # No keywords -> default
+    ]
+    for description, expected in test_cases:
+        category = guess_category(description)
+        print(f"{description} -> {category}")
+        assert category == expected
+    print("✅ Keyword category guesses")
+
+
+def test_worker_counts_jobs():
+    """Completed and failed jobs are counted and failures do not stop the worker"""
+    worker = EnrichmentWorker(max_workers=2)
+    seen = []
+    lock = threading.Lock()
+
+    def job(issue_id):
+        if issue_id == "bad":
+            raise RuntimeError("database unavailable")
+        with lock:
+            seen.append(issue_id)
+
+    futures = [worker.submit(job, issue_id) for issue_id in ["a", "bad", "b"]]
+    for future in futures:
+        future.result(timeout=5)
+
+    status = worker.status()
+    assert sorted(seen) == ["a", "b"]
+    assert status["completed"] == 2
+    assert status["failed"] == 1
+    assert status["in_flight"] == 0
+    worker.stop(wait=True)
+    print(f"✅ Worker status: {status}")
+
+
+@pytest.fixture
+def provisional(monkeypatch):
+    """A provisional issue routed to the Road Authority, with the AI stages' answer set per test"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(issues, "SessionLocal", session_factory)
+    monkeypatch.setattr(settings, "SEMANTIC_DUPLICATES_ENABLED", False)
+    monkeypatch.setattr(settings, "NEAR_DUPLICATES_ENABLED", False)
+
+    db = session_factory()
+    reporter = User(id=uuid.uuid4(), name="Reporter", email="r@example.com", password="x", role=0)
+    db.add(reporter)
+    accounts = {}
+    for category in ["Road Authority", "Electricity Company"]:
+        account = User(id=uuid.uuid4(), name=category, email=f"{category[0]}@example.com", password="x", role=1)
+        db.add_all([account, Authority(
+            id=uuid.uuid4(), name=category, district="Ahmedabad", contact_email="a@example.com", category=category, user_id=account.id
+        )])
+        accounts[category] = account.id
+    db.commit()
+    road = db.query(Authority).filter(Authority.category == "Road Authority").first()
+    issue = Issue(
+        user_id=reporter.id, authority_id=road.id, title="Report", description="Hanging wire near the road",
+        location="23.0225,72.5714", radius=500, category="Road Authority", priority=1, status=0, enrichment_status="pending"
+    )
+    db.add(issue)
+    db.commit()
+
+    state = {"db": db, "issue_id": issue.id, "reporter": reporter.id, "accounts": accounts, "road": road.id}
+
+    def set_result(category="Road Authority", priority=1, is_spam=False):
+        result = EnrichmentResult(is_spam=is_spam, verdict="SPAM - ad" if is_spam else "LEGITIMATE", priority=priority, radius=500)
+        monkeypatch.setattr(issues, "run_ai_stages", lambda description: (result, category, None))
+
+    state["set_result"] = set_result
+    yield state
+    db.close()
+
+
+def reloaded(state) -> Issue:
+    state["db"].expire_all()
+    return state["db"].get(Issue, state["issue_id"])
+
+
+def notifications(state, user_id) -> list:
+    db = state["db"]
+    db.expire_all()
+    return [n.message for n in db.query(Notification).filter(Notification.user_id == user_id)]
+
+
+def test_spam_closes_and_tells_the_authority(provisional):
+    provisional["set_result"](is_spam=True)
+    issues.enrich_issue_in_background(provisional["issue_id"])
+    issue = reloaded(provisional)
+    assert (issue.status, issue.enrichment_status) == (3, "spam")
+    assert any("flagged as spam" in m for m in notifications(provisional, provisional["reporter"]))
+    assert any("closed as spam" in m for m in notifications(provisional, provisional["accounts"]["Road Authority"]))
+    print("✅ Spam closed, reporter and authority notified")
+
+
+def test_merge_tells_the_provisional_authority(provisional):
+    db = provisional["db"]
+    existing = Issue(
+        user_id=uuid.uuid4(), authority_id=provisional["road"], title="Earlier report", description="Wire hanging",
+        location="23.0226,72.5714", radius=500, category="Road Authority", priority=2, status=0
+    )
+    db.add(existing)
+    db.commit()
+    provisional["set_result"](priority=2)
+    issues.enrich_issue_in_background(provisional["issue_id"])
+    issue = reloaded(provisional)
+    assert (issue.status, issue.enrichment_status) == (3, "merged")
+    assert db.query(Vote).filter(Vote.issue_id == existing.id, Vote.user_id == provisional["reporter"]).count() == 1
+    assert any("merged" in m for m in notifications(provisional, provisional["reporter"]))
+    assert any("merged into the existing report 'Earlier report'" in m for m in notifications(provisional, provisional["accounts"]["Road Authority"]))
+    print("✅ Duplicate merged with an upvote, reporter and authority notified")
+
+
+def test_reroute_notifies_both_authorities(provisional):
+    provisional["set_result"](category="Electricity Company", priority=3)
+    issues.enrich_issue_in_background(provisional["issue_id"])
+    issue = reloaded(provisional)
+    assert (issue.category, issue.priority, issue.enrichment_status) == ("Electricity Company", 3, "complete")
+    assert any("re-routed" in m for m in notifications(provisional, provisional["accounts"]["Road Authority"]))
+    assert any("New issue reported" in m for m in notifications(provisional, provisional["accounts"]["Electricity Company"]))
+    assert any("category 'Electricity Company', priority 3" in m for m in notifications(provisional, provisional["reporter"]))
+    print("✅ Re-routed, both authorities and the reporter notified")
+
+
+def test_priority_change_notifies_the_authority(provisional):
+    provisional["set_result"](priority=3)
+    issues.enrich_issue_in_background(provisional["issue_id"])
+    assert reloaded(provisional).priority == 3
+    assert notifications(provisional, provisional["accounts"]["Road Authority"]) == [
+        "Issue 'Report' priority was changed to 3 after review."
+    ]
+    assert any("priority 3" in m for m in notifications(provisional, provisional["reporter"]))
+    assert notifications(provisional, provisional["accounts"]["Electricity Company"]) == []
+    print("✅ Priority change notified to the assigned authority")
+
+
+def test_unchanged_review_sends_nothing(provisional):
+    provisional["set_result"]()
+    issues.enrich_issue_in_background(provisional["issue_id"])
+    assert reloaded(provisional).enrichment_status == "complete"
+    assert provisional["db"].query(Notification).count() == 0
+    print("✅ Nothing changed, nobody notified")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming chatbot endpoint, using the local fake LLM provider
+"""
+import sys
+import os
+import asyncio
+import json
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.util as util
+from app.config import settings
+from app.routers import chatbot
+from app.services import fake_llm as fake_llm_module
+from app.services.fake_llm import FakeLLM
+from app.services.llm_cache import LLMResponseCache
+
+QUERY = "How do I report a broken streetlight?"
+ANSWER = f"This is a simulated answer to: {QUERY}"
+
+memory_cache = LLMResponseCache(use_db=False)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeLLM(token_delay_ms=0)
+    monkeypatch.setattr(settings, "LLM_FAKE_ENABLED", True)
+    monkeypatch.setattr(fake_llm_module, "_fake_llm", fake)
+    monkeypatch.setattr(util, "get_llm_cache", lambda: memory_cache)
+    memory_cache.clear_memory()
+    return fake
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.include_router(chatbot.router, prefix="/api")
+    return TestClient(app)
+
+
+def read_events(response) -> list:
+    """Parse an SSE body into (event, data) pairs"""
+    events, event = [], "message"
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((event, json.loads(line[len("data: "):])))
+            event = "message"
+    return events
+
+
+def test_stream_forwards_deltas_in_order(fake):
+    """Every provider delta becomes one SSE message, followed by a done event"""
+    with make_client().stream("POST", "/api/chatbot/stream", json={"query": QUERY}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = read_events(response)
+
+    deltas = [data["delta"] for event, data in events if event == "message"]
+    assert len(deltas) == len(ANSWER.split(" "))
+    assert "".join(deltas) == ANSWER
+    assert events[-1][0] == "done"
+    assert fake.open_streams == 0
+    print(f"✅ {len(deltas)} deltas streamed, then done")
+
+
+def test_completed_stream_is_cached(fake):
+    """A finished answer is cached; the next request gets it whole from the cache and as JSON"""
+    client = make_client()
+    with client.stream("GET", "/api/chatbot/stream", params={"query": QUERY}) as response:
+        read_events(response)
+    with client.stream("GET", "/api/chatbot/stream", params={"query": QUERY}) as response:
+        events = read_events(response)
+
+    assert events == [("message", {"delta": ANSWER}), ("done", {})]
+    assert client.post("/api/chatbot/", json={"query": QUERY}).json() == {"response": ANSWER}
+    assert fake.calls == 1
+    print("✅ Second request served from cache")
+
+
+def test_cancelled_stream_stops_provider_and_skips_cache(fake):
+    """Setting the cancel event or closing the generator closes the provider stream; partial answers are not cached"""
+    cancelled = threading.Event()
+    deltas = util.stream_query_response(QUERY, cancelled=cancelled)
+    assert next(deltas) == "This"
+    assert fake.open_streams == 1
+    cancelled.set()
+    assert list(deltas) == []
+    assert fake.open_streams == 0
+
+    deltas = util.stream_query_response(QUERY)
+    next(deltas)
+    deltas.close()
+    assert fake.open_streams == 0
+    assert memory_cache.get("system_prompt.txt", util.get_prompt_store().get("system_prompt.txt").text, QUERY) is None
+    print("✅ Provider stream closed on cancel, nothing cached")
+
+
+class DisconnectingRequest:
+    """Reports a disconnect after the client has received `after` messages"""
+
+    def __init__(self, after: int):
+        self.after = after
+        self.checks = 0
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.checks > self.after
+
+
+def test_client_disconnect_closes_stream(fake):
+    """When the client goes away the endpoint stops forwarding and releases the provider stream"""
+    async def consume():
+        return [message async for message in chatbot._chat_events(DisconnectingRequest(after=2), QUERY)]
+
+    messages = asyncio.run(consume())
+    assert len(messages) == 2
+    assert not any("event: done" in message for message in messages)
+    assert fake.open_streams == 0
+    print("✅ Disconnect after 2 deltas stopped the stream")
+
+
+def test_provider_error_becomes_error_event(fake, monkeypatch):
+    """A provider failure mid-answer ends the stream with an error event"""
+    def failing_stream(messages):
+        yield "Partial"
+        raise RuntimeError("provider dropped the connection")
+
+    monkeypatch.setattr(fake, "stream", failing_stream)
+    with make_client().stream("POST", "/api/chatbot/stream", json={"query": QUERY}) as response:
+        events = read_events(response)
+    assert events[0] == ("message", {"delta": "Partial"})
+    assert events[-1][0] == "error"
+    print("✅ Provider error surfaced as an SSE error event")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
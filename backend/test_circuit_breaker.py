@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the LLM provider circuit breakers and failover
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import app.util as util
+from app.config import settings
+from app.routers.issues import get_priority_from_text, get_radius_from_text
+from app.services import circuit_breaker as breaker_module
+from app.services import llm_limiter as limiter_module
+from app.services.circuit_breaker import CircuitBreaker, ProvidersUnavailableError, get_provider_breaker
+from app.services.llm_limiter import LLMConcurrencyLimiter
+
+MESSAGES = [{"role": "system", "content": "prompt"}, {"role": "user", "content": "Streetlight out on 5th avenue"}]
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Two g4f providers, 'Primary' failing and 'Backup' healthy, with fresh breakers"""
+    calls = []
+
+    def provider_complete(name, messages):
+        calls.append(name)
+        if name == "Primary":
+            raise ConnectionError("upstream 502")
+        return f"answer from {name}"
+
+    def provider_stream(name, messages):
+        calls.append(name)
+        if name == "Primary":
+            raise ConnectionError("upstream 502")
+        yield "answer "
+        yield f"from {name}"
+
+    monkeypatch.setattr(settings, "LLM_FAKE_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_PROVIDERS", "Primary, Backup")
+    monkeypatch.setattr(settings, "LLM_BREAKER_MIN_CALLS", 3)
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SECONDS", 60.0)
+    monkeypatch.setattr(breaker_module, "_breakers", {})
+    monkeypatch.setattr(limiter_module, "_llm_limiter", LLMConcurrencyLimiter(max_concurrent=4))
+    monkeypatch.setattr(util, "_provider_complete", provider_complete)
+    monkeypatch.setattr(util, "_provider_stream", provider_stream)
+    return calls
+
+
+def test_breaker_opens_on_errors_and_recovers():
+    """Closed -> open on error rate -> half-open after the open period -> closed on a good trial"""
+    breaker = CircuitBreaker("test", window=10, min_calls=4, error_rate=0.5, open_seconds=0.05)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1, "timeout")
+    assert breaker.state == "closed"
+    breaker.record_failure(0.1, "timeout")
+    assert breaker.state == "open"
+    assert not breaker.allow() and breaker.status()["short_circuited"] == 1
+
+    time.sleep(0.06)
+    assert breaker.allow()  # The single half-open trial
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == "closed" and breaker.allow()
+    print(f"✅ Breaker cycle: {breaker.status()}")
+
+
+def test_breaker_opens_on_latency_and_failed_trial_reopens():
+    """Mostly slow calls open the breaker; a failing half-open trial opens it again"""
+    breaker = CircuitBreaker("slow", window=5, min_calls=5, slow_call_seconds=1.0, slow_rate=0.8, open_seconds=0.05)
+    for elapsed in [3.0, 3.0, 0.2, 3.0, 3.0]:
+        breaker.record_success(elapsed)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure(0.1, "still broken")
+    assert breaker.state == "open" and breaker.status()["times_opened"] == 2
+    print("✅ Slow provider opened the circuit, failed trial re-opened it")
+
+
+def test_failover_skips_open_provider(providers):
+    """Calls fail over to the backup; once Primary's circuit opens it is no longer tried"""
+    for _ in range(3):
+        assert util.complete_chat(MESSAGES) == "answer from Backup"
+    assert providers == ["Primary", "Backup"] * 3
+    assert get_provider_breaker("Primary").state == "open"
+
+    providers.clear()
+    assert util.complete_chat(MESSAGES) == "answer from Backup"
+    assert providers == ["Backup"]
+    print("✅ Failed over to Backup, Primary short-circuited")
+
+
+def test_stream_fails_over_before_first_delta(providers):
+    """A provider that fails before sending anything is replaced by the next one"""
+    assert "".join(util.stream_chat(MESSAGES)) == "answer from Backup"
+    assert providers == ["Primary", "Backup"]
+    assert get_provider_breaker("Backup").status()["successes"] == 1
+    print("✅ Stream served by Backup")
+
+
+def test_all_open_short_circuits_to_defaults(providers, monkeypatch):
+    """With every circuit open, calls fail immediately (without queuing) and AI stages use their defaults"""
+    for name in ("Primary", "Backup"):
+        breaker = get_provider_breaker(name)
+        for _ in range(3):
+            breaker.record_failure(0.1, "down")
+    # Even a saturated limiter is never waited on
+    limiter = LLMConcurrencyLimiter(max_concurrent=1, max_queue=10, queue_timeout=5)
+    limiter.acquire()
+    monkeypatch.setattr(limiter_module, "_llm_limiter", limiter)
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+
+    with pytest.raises(ProvidersUnavailableError) as excinfo:
+        util.complete_chat(MESSAGES)
+    assert 1 <= excinfo.value.retry_after <= 60
+
+    started = time.perf_counter()
+    assert get_priority_from_text("Streetlight out on 5th avenue") == 1
+    assert get_radius_from_text("Streetlight out on 5th avenue") == 500
+    assert time.perf_counter() - started < 0.5
+    assert providers == []
+    print(f"✅ All circuits open: defaults without calling out (retry after {excinfo.value.retry_after}s)")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the micro-batching classifier front end
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.classifier_batcher import ClassifierBatcher
+
+
+class RecordingClassifier:
+    """Classifier double that labels each text with its own upper-cased value"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def predict(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return [text.upper() for text in texts]
+
+    def predict_with_embeddings(self, texts):
+        labels = self.predict(texts)
+        return labels, [[float(len(text))] for text in texts]
+
+
+def test_concurrent_callers_share_a_batch():
+    """Burst of callers is classified in fewer forward passes, each caller gets its own label"""
+    classifier = RecordingClassifier()
+    batcher = ClassifierBatcher(classifier=classifier, max_batch_size=32, max_wait_ms=50)
+    try:
+        texts = [f"report {i}" for i in range(20)]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            labels = list(pool.map(batcher.classify_sync, texts))
+
+        assert labels == [text.upper() for text in texts]
+        assert len(classifier.batches) < len(texts)
+        assert sum(len(batch) for batch in classifier.batches) == len(texts)
+
+        stats = batcher.status()
+        assert stats["items"] == 20
+        assert stats["batches"] == len(classifier.batches)
+        assert stats["max_batch_size"] > 1
+        print(f"✅ 20 requests classified in {stats['batches']} batches: {stats['batch_size_counts']}")
+    finally:
+        batcher.stop()
+
+
+def test_batch_size_is_capped():
+    """No batch exceeds max_batch_size"""
+    classifier = RecordingClassifier(delay=0.01)
+    batcher = ClassifierBatcher(classifier=classifier, max_batch_size=4, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(batcher.classify_sync, [f"text {i}" for i in range(16)]))
+        assert max(len(batch) for batch in classifier.batches) <= 4
+        print("✅ Batches capped at max_batch_size")
+    finally:
+        batcher.stop()
+
+
+def test_errors_propagate_to_every_caller():
+    """A failing forward pass raises in each waiting caller"""
+    batcher = ClassifierBatcher(classifier=RecordingClassifier(fail=True), max_batch_size=8, max_wait_ms=5)
+    try:
+        try:
+            batcher.classify_sync("broken streetlight")
+            assert False, "Expected the classifier error to propagate"
+        except RuntimeError as e:
+            assert "model exploded" in str(e)
+        assert batcher.status()["errors"] == 1
+        print("✅ Classifier errors propagate to callers")
+    finally:
+        batcher.stop()
+
+
+def test_async_classify():
+    """Async callers on another event loop share the batcher as well"""
+    batcher = ClassifierBatcher(classifier=RecordingClassifier(), max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.classify(f"issue {i}") for i in range(5)))
+
+    try:
+        assert asyncio.run(run()) == [f"ISSUE {i}" for i in range(5)]
+        print("✅ Async callers receive their own labels")
+    finally:
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the load-once category classifier service
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import torch
+import transformers
+
+from app.services import classifier as classifier_module
+from app.services.classifier import CategoryClassifier, CATEGORIES
+from app.services.numpy_head import NumpyDenseHead
+
+
+class FakeTokenizer:
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": torch.ones((len(texts), 4), dtype=torch.long)}
+
+
+class FakeOutputs:
+    def __init__(self, batch_size):
+        self.last_hidden_state = torch.zeros((batch_size, 4, 768))
+
+
+class FakeEncoder:
+    def eval(self):
+        return self
+
+    def __call__(self, input_ids):
+        return FakeOutputs(input_ids.shape[0])
+
+
+class FakeHead:
+    def __call__(self, embeddings):
+        # Always predict "Electricity Company"
+        probabilities = np.zeros((embeddings.shape[0], len(CATEGORIES)), dtype=np.float32)
+        probabilities[:, 3] = 1.0
+        return probabilities
+
+
+def install_fakes(monkeypatch, calls):
+    def fake_tokenizer(name):
+        calls["tokenizer"] += 1
+        return FakeTokenizer()
+
+    def fake_encoder(name):
+        calls["encoder"] += 1
+        return FakeEncoder()
+
+    def fake_head(path):
+        calls["head"] += 1
+        return FakeHead()
+
+    # Imported by _load_models, so patch them where they are defined
+    monkeypatch.setattr(transformers.RobertaTokenizer, "from_pretrained", fake_tokenizer)
+    monkeypatch.setattr(transformers.RobertaModel, "from_pretrained", fake_encoder)
+    monkeypatch.setattr(NumpyDenseHead, "from_h5", fake_head)
+
+
+def test_models_loaded_once(monkeypatch, tmp_path):
+    """Tokenizer, encoder and head are loaded once no matter how many predictions run"""
+    calls = {"tokenizer": 0, "encoder": 0, "head": 0}
+    install_fakes(monkeypatch, calls)
+    model_path = tmp_path / "model_new.h5"
+    model_path.write_bytes(b"")
+
+    classifier = CategoryClassifier(model_path=str(model_path))
+    assert classifier.ensure_loaded()
+    assert classifier.ready
+    assert classifier.warmup_seconds is not None
+
+    for _ in range(5):
+        assert classifier.predict(["Power cut in our area since morning"]) == ["Electricity Company"]
+
+    assert calls == {"tokenizer": 1, "encoder": 1, "head": 1}
+    print("✅ Models loaded once and reused across predictions")
+
+
+def test_missing_model_reports_not_ready(tmp_path):
+    """A missing head file leaves the classifier not ready and is not retried"""
+    classifier = CategoryClassifier(model_path=str(tmp_path / "missing.h5"))
+    assert not classifier.ensure_loaded()
+    assert not classifier.ensure_loaded()
+
+    status = classifier.status()
+    assert status["ready"] is False
+    assert "Model file not found" in status["error"]
+    print("✅ Missing model reported through status()")
+
+
+def test_batch_predict(monkeypatch, tmp_path):
+    """predict() returns one label per input text"""
+    calls = {"tokenizer": 0, "encoder": 0, "head": 0}
+    install_fakes(monkeypatch, calls)
+    model_path = tmp_path / "model_new.h5"
+    model_path.write_bytes(b"")
+
+    classifier = CategoryClassifier(model_path=str(model_path))
+    classifier.load()
+    labels = classifier.predict(["one", "two", "three"])
+    assert labels == ["Electricity Company"] * 3
+    assert classifier.predict([]) == []
+    print("✅ Batch prediction returns one label per text")
+
+
+def test_variant_selection():
+    """CLASSIFIER_VARIANT picks the distilled model for either runtime"""
+    from app.services.distilled_classifier import DistilledCategoryClassifier
+    from app.services.onnx_classifier import OnnxCategoryClassifier
+
+    assert type(classifier_module.create_classifier("keras", "base")) is CategoryClassifier
+    assert isinstance(classifier_module.create_classifier("keras", "distilled"), DistilledCategoryClassifier)
+    onnx_distilled = classifier_module.create_classifier("onnx", "distilled")
+    assert isinstance(onnx_distilled, OnnxCategoryClassifier)
+    assert "distilled" in onnx_distilled.model_path
+    try:
+        classifier_module.create_classifier("keras", "tiny")
+        assert False, "unknown variant accepted"
+    except ValueError:
+        pass
+    print("✅ Classifier variant selection")
+
+
+
+def test_head_scoring_capability():
+    """Only the encoder + head pipeline scores stored embeddings; fused backends say so up front"""
+    from app.services.distilled_classifier import DistilledCategoryClassifier
+    from app.services.inference_pool import PooledCategoryClassifier
+    from app.services.onnx_classifier import OnnxCategoryClassifier
+
+    assert CategoryClassifier.supports_head_scoring
+    for fused in (OnnxCategoryClassifier, DistilledCategoryClassifier, PooledCategoryClassifier):
+        assert not fused.supports_head_scoring, fused.__name__
+    try:
+        classifier_module.create_classifier("onnx", "base").predict_proba(np.zeros((1, 768), dtype=np.float32))
+        assert False, "fused backend scored embeddings"
+    except TypeError:
+        pass
+    print("✅ Head scoring capability declared per backend")
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the combined spam/priority/radius enrichment parser
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import enrichment as enrichment_module
+from app.services.enrichment import parse_enrichment_response, request_enrichment
+
+
+def test_valid_response():
+    """A well-formed answer fills every field on our scales"""
+    result = parse_enrichment_response('{"spam": false, "reason": "Road damage", "priority": 2, "radius": 20}')
+    assert result.is_spam is False
+    assert result.priority == 3  # AI severe -> our 3
+    assert result.radius == 50  # 20m clamped to the 50m minimum like the single prompt path
+    assert result.missing_fields == []
+    assert result.spam_verdict == "LEGITIMATE - Road damage"
+    print("✅ Valid combined response parsed")
+
+
+def test_code_fenced_response():
+    """JSON wrapped in a markdown fence is still accepted"""
+    result = parse_enrichment_response('```json\n{"spam": true, "reason": "Advertisement", "priority": 0, "radius": 5}\n```')
+    assert result.is_spam is True
+    assert result.spam_verdict == "SPAM - Advertisement"
+    print("✅ Code-fenced response parsed")
+
+
+def test_invalid_fields_fall_back_individually():
+    """Each invalid field is dropped on its own; valid ones are kept"""
+    test_cases = [
+        ('{"spam": "no", "priority": 1, "radius": 100}', ["is_spam"]),
+        ('{"spam": false, "priority": 7, "radius": 100}', ["priority"]),
+        ('{"spam": false, "priority": true, "radius": 100}', ["priority"]),
+        ('{"spam": false, "priority": 1, "radius": 30}', ["radius"]),
+        ('{"spam": false, "priority": 1, "radius": "20"}', ["radius"]),
+        ('{"spam": false}', ["priority", "radius"]),
+    ]
+    for response, expected_missing in test_cases:
+        result = parse_enrichment_response(response)
+        print(f"{response} -> missing {result.missing_fields}")
+        assert result.missing_fields == expected_missing
+    print("✅ Invalid fields fall back per field")
+
+
+def test_unparseable_response():
+    """Free text without JSON leaves every field for the fallback path"""
+    result = parse_enrichment_response("LEGITIMATE - priority 1, radius 20m")
+    assert result.missing_fields == ["is_spam", "priority", "radius"]
+    assert result.errors
+    print("✅ Unparseable response handled")
+
+
+def test_call_failure_counts(monkeypatch):
+    """Provider errors return an empty result and are counted"""
+    def failing_query(query, systempromptpath="system_prompt.txt"):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(enrichment_module, "get_query_response", failing_query)
+    before = enrichment_module.enrichment_stats.snapshot()
+    result = request_enrichment("Streetlight broken near the temple")
+    after = enrichment_module.enrichment_stats.snapshot()
+
+    assert result.missing_fields == ["is_spam", "priority", "radius"]
+    assert after["failed_calls"] == before["failed_calls"] + 1
+    print("✅ Call failures recorded")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
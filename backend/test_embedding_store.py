@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the persisted issue embedding store
+"""
+import sys
+import os
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import IssueEmbedding
+from app.services.embedding_store import (
+    save_issue_embedding,
+    save_issue_embeddings,
+    get_issue_embedding,
+    get_embedding_matrix,
+)
+
+MODEL = "roberta-base/keras"
+
+
+def make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=[IssueEmbedding.__table__])
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def test_round_trip():
+    """Vectors come back bit-exact as float32"""
+    db = make_session()
+    issue_id = uuid.uuid4()
+    vector = np.random.default_rng(0).standard_normal(768).astype(np.float32)
+
+    save_issue_embedding(db, issue_id, vector, MODEL)
+    stored = get_issue_embedding(db, issue_id)
+    assert stored.dtype == np.float32
+    assert np.array_equal(stored, vector)
+    assert db.query(IssueEmbedding).first().dim == 768
+    print("✅ Embedding round trip")
+
+
+def test_replace_and_model_filter():
+    """Saving again replaces the vector; lookups can be restricted to one encoder"""
+    db = make_session()
+    issue_id = uuid.uuid4()
+    save_issue_embedding(db, issue_id, np.zeros(4), MODEL)
+    save_issue_embedding(db, issue_id, np.ones(4), "roberta-base/onnx")
+
+    assert db.query(IssueEmbedding).count() == 1
+    assert get_issue_embedding(db, issue_id, model=MODEL) is None
+    assert np.array_equal(get_issue_embedding(db, issue_id, model="roberta-base/onnx"), np.ones(4, dtype=np.float32))
+    print("✅ Embedding replaced and filtered by model")
+
+
+def test_matrix_in_request_order():
+    """Matrix rows follow the requested id order and skip issues without a vector"""
+    db = make_session()
+    ids = [uuid.uuid4() for _ in range(3)]
+    save_issue_embeddings(db, [(ids[0], np.full(4, 0.0)), (ids[2], np.full(4, 2.0))], MODEL)
+
+    row_ids, matrix = get_embedding_matrix(db, [ids[2], ids[1], ids[0]], MODEL)
+    assert row_ids == [ids[2], ids[0]]
+    assert matrix.shape == (2, 4)
+    assert matrix[0, 0] == 2.0 and matrix[1, 0] == 0.0
+    print("✅ Embedding matrix assembled")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the local fake LLM provider
+"""
+import sys
+import os
+import statistics
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import app.util as util
+from app.config import settings
+from app.routers.issues import get_priority_from_text, get_radius_from_text, is_spam_from_text
+from app.services import fake_llm as fake_llm_module
+from app.services.enrichment import parse_enrichment_response
+from app.services.fake_llm import FakeLLM, FakeLLMError
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeLLM(token_delay_ms=0, latency_ms=0, error_rate=0)
+    monkeypatch.setattr(settings, "LLM_FAKE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(fake_llm_module, "_fake_llm", fake)
+    return fake
+
+
+def test_canned_answers_per_prompt(fake):
+    """Each AI stage gets an answer in its prompt's format, parsed by the real parsers"""
+    assert "SPAM" not in is_spam_from_text("Live wire hanging from a pole after the storm").upper()
+    assert "SPAM" in is_spam_from_text("Buy cheap phones, click here for a discount").upper()
+    assert get_priority_from_text("Live wire hanging from a pole after the storm") == 3
+    assert get_priority_from_text("Streetlight not working") == 2
+    assert get_priority_from_text("Graffiti on the wall") == 1
+    assert get_radius_from_text("Power outage in our society") == 50
+
+    combined = parse_enrichment_response(util.get_query_response("Gas leak near the school", "system_prompt5.txt"))
+    assert not combined.errors and combined.is_spam is False and combined.priority == 3
+    assert util.get_query_response("Who fixes potholes?").startswith("This is a simulated answer")
+    assert fake.status()["calls_by_kind"] == {"spam": 2, "priority": 3, "radius": 1, "enrichment": 1, "chat": 1}
+    print(f"✅ Canned answers: {fake.status()['calls_by_kind']}")
+
+
+def test_response_overrides():
+    """Answers from the responses file replace the canned ones for their prompt kind"""
+    fake = FakeLLM(token_delay_ms=0, latency_ms=0, error_rate=0, responses={"chat": "Call 311 about: {query}"})
+    messages = [{"role": "system", "content": "You are a helpful assistant"}, {"role": "user", "content": "potholes"}]
+    assert fake.complete(messages) == "Call 311 about: potholes"
+    print("✅ Chat answer overridden")
+
+
+@pytest.mark.parametrize("distribution", ["constant", "uniform", "normal", "lognormal"])
+def test_latency_distributions(distribution):
+    """Sampled latencies have the configured mean and are never negative"""
+    fake = FakeLLM(latency_distribution=distribution, latency_ms=200, latency_spread_ms=50, seed=1)
+    samples = [fake.sample_latency_ms() for _ in range(5000)]
+    assert min(samples) >= 0
+    assert abs(statistics.mean(samples) - 200) < 5
+    if distribution != "constant":
+        assert 25 < statistics.pstdev(samples) < 60  # Uniform half-width 50 gives ~29
+    print(f"✅ {distribution}: mean {statistics.mean(samples):.1f}ms, stdev {statistics.pstdev(samples):.1f}ms")
+
+
+def test_seeded_error_rate_is_reproducible():
+    """The same seed fails the same calls; the failure share follows the error rate"""
+    messages = [{"role": "user", "content": "Pothole"}]
+
+    def outcomes(seed):
+        fake = FakeLLM(latency_ms=0, error_rate=0.2, seed=seed)
+        results = []
+        for _ in range(1000):
+            try:
+                fake.complete(messages)
+                results.append(True)
+            except FakeLLMError:
+                results.append(False)
+        return results
+
+    first = outcomes(7)
+    assert first == outcomes(7)
+    assert first != outcomes(8)
+    assert 150 < first.count(False) < 250
+    print(f"✅ {first.count(False)} of 1000 calls failed, same sequence for the same seed")
+
+
+def test_unknown_distribution_rejected():
+    with pytest.raises(ValueError):
+        FakeLLM(latency_distribution="pareto")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
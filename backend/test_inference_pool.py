@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the classifier inference process pool
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+
+import numpy as np
+
+from app.services.classifier import CATEGORIES
+from app.services.classifier_batcher import ClassifierBatcher
+from app.services.inference_pool import InferenceWorkerError, PooledCategoryClassifier
+
+
+class KeywordClassifier:
+    """Classifier double run inside the workers: label from a keyword, embedding from the text length"""
+
+    embedding_model = "fake-encoder/test"
+
+    def load(self):
+        pass
+
+    def predict_with_embeddings(self, texts):
+        if any(text == "crash" for text in texts):
+            os._exit(1)
+        if any(text == "hang" for text in texts):
+            time.sleep(60)
+        labels = [CATEGORIES[3] if "wire" in text else CATEGORIES[0] for text in texts]
+        embeddings = np.array([[float(len(text)), float(os.getpid()), 1.0] for text in texts], dtype=np.float32)
+        return labels, embeddings
+
+
+def make_classifier():
+    # Top level so the spawned workers can unpickle it
+    return KeywordClassifier()
+
+
+def create_pool(**kwargs):
+    options = {"workers": 2, "threads_per_worker": 1, "max_batch": 4, "timeout": 5.0, "start_timeout": 60.0}
+    options.update(kwargs)
+    pool = PooledCategoryClassifier(factory=make_classifier, model_path=__file__, **options)
+    pool.load()
+    return pool
+
+
+def wait_for_restart(pool, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = pool.status()["pool"]
+        if status["alive"] == status["workers"] and status["idle"] == status["workers"]:
+            return
+        time.sleep(0.1)
+    raise AssertionError("Worker was not restarted")
+
+
+def test_predictions_round_trip_through_shared_memory():
+    """Labels and embeddings come back in order, across chunks larger than max_batch"""
+    pool = create_pool()
+    try:
+        texts = [f"hanging wire number {i}" if i % 2 else f"pothole {i} on the road ☂" for i in range(10)]
+        labels, embeddings = pool.predict_with_embeddings(texts)
+
+        assert labels == [CATEGORIES[3] if i % 2 else CATEGORIES[0] for i in range(10)]
+        assert embeddings.shape == (10, 3)
+        assert embeddings[:, 0].tolist() == [float(len(text)) for text in texts]
+        assert os.getpid() not in embeddings[:, 1]
+        assert pool.embedding_model == "fake-encoder/test"
+        assert pool.ready and pool.status()["pool"]["alive"] == 2
+        print("✅ 10 descriptions classified by worker processes in chunks of 4")
+    finally:
+        pool.close()
+
+
+def test_crashed_worker_is_restarted():
+    """A worker that dies fails only the call in flight and is replaced in the background"""
+    pool = create_pool(workers=1)
+    try:
+        try:
+            pool.predict_with_embeddings(["crash"])
+            assert False, "Expected InferenceWorkerError"
+        except InferenceWorkerError:
+            pass
+
+        wait_for_restart(pool)
+        labels, _ = pool.predict_with_embeddings(["loose wire"])
+        assert labels == [CATEGORIES[3]]
+        status = pool.status()["pool"]
+        assert status["restarts"] == 1 and status["failures"] == 1
+        print("✅ Crashed worker restarted, next call succeeded")
+    finally:
+        pool.close()
+
+
+def test_hung_worker_times_out():
+    """A worker that exceeds the call timeout is killed instead of blocking callers"""
+    pool = create_pool(workers=1, timeout=1.0)
+    try:
+        started = time.perf_counter()
+        try:
+            pool.predict_with_embeddings(["hang"])
+            assert False, "Expected InferenceWorkerError"
+        except InferenceWorkerError:
+            pass
+        assert time.perf_counter() - started < 5
+
+        wait_for_restart(pool)
+        assert pool.predict(["pothole"]) == [CATEGORIES[0]]
+        print("✅ Hung worker killed after the timeout and replaced")
+    finally:
+        pool.close()
+
+
+def test_batcher_uses_one_slot_per_worker():
+    """The batcher keeps one batch in flight per pool worker"""
+    pool = create_pool()
+    batcher = ClassifierBatcher(classifier=pool, max_batch_size=4, max_wait_ms=5)
+    try:
+        assert batcher.max_concurrency == 2
+        label, embedding = batcher.classify_with_embedding_sync("sparking wire")
+        assert label == CATEGORIES[3]
+        assert embedding[0] == len("sparking wire")
+        print("✅ Batcher dispatches to the pool")
+    finally:
+        batcher.stop()
+        pool.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
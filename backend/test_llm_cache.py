@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the two-tier LLM answer cache
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import LLMCacheEntry
+from app.services.llm_cache import LLMResponseCache, normalize_query
+
+PROMPT = "Respond with ONLY the integer (0, 1, or 2)"
+
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=[LLMCacheEntry.__table__])
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def test_normalization():
+    """Case, punctuation and whitespace differences map to the same text"""
+    assert normalize_query("  Huge POTHOLE on MG Road!!  ") == normalize_query("huge pothole on mg road")
+    assert normalize_query("Power cut") != normalize_query("Water cut")
+    print("✅ Query normalization")
+
+
+def test_memory_then_db_tier():
+    """Memory hits first; after the memory tier is cleared the DB tier still answers"""
+    cache = LLMResponseCache(session_factory=make_session_factory(), use_db=True)
+
+    assert cache.get("system_prompt1.txt", PROMPT, "Huge pothole on MG Road") is None
+    cache.set("system_prompt1.txt", PROMPT, "Huge pothole on MG Road", "2")
+
+    assert cache.get("system_prompt1.txt", PROMPT, "huge pothole on MG road!") == "2"
+    cache.clear_memory()
+    assert cache.get("system_prompt1.txt", PROMPT, "Huge pothole on MG Road") == "2"
+
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["db_hits"] == 1
+    print(f"✅ Two-tier lookups: {stats}")
+
+
+def test_prompts_are_isolated():
+    """The same query against different prompt files does not collide"""
+    cache = LLMResponseCache(use_db=False)
+    cache.set("system_prompt1.txt", PROMPT, "Streetlight broken", "1")
+    assert cache.get("system_prompt3.txt", "radius prompt", "Streetlight broken") is None
+    print("✅ Prompt files isolated")
+
+
+def test_prompt_change_invalidates():
+    """Editing a prompt file stops old answers from matching and purges them from the DB"""
+    session_factory = make_session_factory()
+    cache = LLMResponseCache(session_factory=session_factory, use_db=True)
+
+    cache.get("system_prompt4.txt", "old prompt", "Garbage not collected")
+    cache.set("system_prompt4.txt", "old prompt", "Garbage not collected", "LEGITIMATE")
+    assert cache.get("system_prompt4.txt", "new prompt", "Garbage not collected") is None
+
+    db = session_factory()
+    try:
+        assert db.query(LLMCacheEntry).filter(LLMCacheEntry.prompt_name == "system_prompt4.txt").count() == 0
+    finally:
+        db.close()
+    assert cache.stats()["invalidations"] == 1
+    print("✅ Prompt change invalidates cached answers")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
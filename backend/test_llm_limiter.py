@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the outbound LLM concurrency limiter and its backpressure behaviour
+"""
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.util as util
+from app.config import settings
+from app.routers import chatbot
+from app.routers import issues
+from app.routers.issues import SpamCheckUnavailableError, get_priority_from_text, get_radius_from_text
+from app.services import fake_llm as fake_llm_module
+from app.services import llm_limiter as limiter_module
+from app.services.fake_llm import FakeLLM
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_limiter import LLMConcurrencyLimiter, LLMOverloadedError
+from app.services.metrics import latency_metrics
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    """Fake provider behind a limiter whose only slot is taken"""
+    limiter = LLMConcurrencyLimiter(max_concurrent=1, max_queue=4, queue_timeout=0.1, retry_after=7)
+    limiter.acquire()
+    monkeypatch.setattr(limiter_module, "_llm_limiter", limiter)
+    monkeypatch.setattr(settings, "LLM_FAKE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_DEGRADABLE_QUEUE_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(fake_llm_module, "_fake_llm", FakeLLM(token_delay_ms=0))
+    cache = LLMResponseCache(use_db=False)
+    monkeypatch.setattr(util, "get_llm_cache", lambda: cache)
+    yield limiter
+    limiter.release()
+
+
+def test_slots_queue_and_rejection():
+    """Calls beyond the slots wait in the queue; beyond the queue they are rejected immediately"""
+    limiter = LLMConcurrencyLimiter(max_concurrent=2, max_queue=1, queue_timeout=5, retry_after=3)
+    limiter.acquire()
+    limiter.acquire()
+
+    admitted = threading.Event()
+    def queued_call():
+        with limiter.slot():
+            admitted.set()
+
+    waiter = threading.Thread(target=queued_call)
+    waiter.start()
+    time.sleep(0.05)
+    assert limiter.status()["waiting"] == 1 and limiter.queue_full()
+
+    with pytest.raises(LLMOverloadedError) as excinfo:
+        limiter.acquire()
+    assert excinfo.value.retry_after == 3
+
+    limiter.release()
+    waiter.join(timeout=2)
+    assert admitted.is_set()
+    status = limiter.status()
+    assert status["admitted"] == 3 and status["queued"] == 1 and status["rejected_queue_full"] == 1
+    assert latency_metrics.snapshot()["llm.queue_wait"]["max_ms"] >= 40
+    print(f"✅ Limiter status: {status}")
+
+
+def test_queue_timeout():
+    """A queued call gives up after its timeout instead of hanging"""
+    limiter = LLMConcurrencyLimiter(max_concurrent=1, max_queue=10, queue_timeout=5)
+    limiter.acquire()
+    started = time.perf_counter()
+    with pytest.raises(LLMOverloadedError):
+        limiter.acquire(timeout=0.05)
+    assert time.perf_counter() - started < 1
+    assert limiter.status()["rejected_timeout"] == 1 and limiter.status()["waiting"] == 0
+    print("✅ Queued call timed out")
+
+
+def test_chatbot_returns_503_with_retry_after(saturated):
+    """The chatbot fails fast with 503 and Retry-After when no slot frees up"""
+    app = FastAPI()
+    app.include_router(chatbot.router, prefix="/api")
+    response = TestClient(app).post("/api/chatbot/", json={"query": "Who fixes streetlights?"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    print("✅ 503 with Retry-After: 7")
+
+
+def test_ai_stages_degrade_to_defaults(saturated):
+    """Priority and radius return their defaults after the short degradable wait"""
+    started = time.perf_counter()
+    assert get_priority_from_text("Large pothole near the school gate") == 1
+    assert get_radius_from_text("Large pothole near the school gate") == 500
+    elapsed = time.perf_counter() - started
+    assert elapsed < saturated.queue_timeout * 2
+    assert saturated.status()["rejected_timeout"] == 2
+    print(f"✅ Defaults returned in {elapsed * 1000:.0f}ms while saturated")
+
+
+def test_spam_check_has_no_default(saturated, monkeypatch):
+    """Without a spam verdict the AI stages fail with a retry hint instead of passing the report"""
+    monkeypatch.setattr(settings, "SPAM_FILTER_ENABLED", False)
+    monkeypatch.setattr(settings, "AI_ENRICHMENT_MODE", "separate")
+    monkeypatch.setattr(issues, "get_category_and_embedding", lambda description: ("Road Authority", np.ones(4)))
+    with pytest.raises(SpamCheckUnavailableError) as excinfo:
+        issues.run_ai_stages("Large pothole near the school gate")
+    assert excinfo.value.retry_after == settings.LLM_RETRY_AFTER_SECONDS
+    assert saturated.status()["rejected_timeout"] == 3  # Spam, priority and radius
+    print("✅ Saturated spam check failed the request")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
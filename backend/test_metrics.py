@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Unit tests for latency histograms and per-request timing spans
+"""
+import sys
+import os
+import json
+import logging
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.services import metrics as metrics_module
+from app.services.ai_pipeline import Stage, run_stages
+from app.services.metrics import Histogram, LatencyMetrics, annotate, span, traced
+
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(record.getMessage()))
+
+
+def capture_request_log(monkeypatch) -> CapturingHandler:
+    handler = CapturingHandler()
+    request_logger = logging.getLogger("app.requests.test")
+    request_logger.handlers = [handler]
+    request_logger.setLevel(logging.INFO)
+    request_logger.propagate = False
+    monkeypatch.setattr(metrics_module, "get_request_logger", lambda: request_logger)
+    return handler
+
+
+def test_histogram_buckets_and_quantiles():
+    """Observations land in the right buckets; quantiles are interpolated within them"""
+    histogram = Histogram(buckets=[10, 100, 1000])
+    for value in [5] * 50 + [50] * 45 + [500] * 4 + [5000]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["buckets"] == {"le_10": 50, "le_100": 45, "le_1000": 4, "le_inf": 1}
+    assert 0 < snapshot["p50_ms"] <= 10
+    assert 10 < snapshot["p95_ms"] <= 100
+    assert snapshot["max_ms"] == 5000
+    print(f"✅ p50 {snapshot['p50_ms']}ms, p95 {snapshot['p95_ms']}ms, p99 {snapshot['p99_ms']}ms")
+
+
+def test_prometheus_rendering():
+    """Buckets are cumulative and end with +Inf == count"""
+    metrics = LatencyMetrics()
+    for value in [1, 20, 20, 40000]:
+        metrics.observe("duplicate_scan", value)
+    text = metrics.render_prometheus()
+
+    assert "# TYPE app_latency_ms histogram" in text
+    assert 'app_latency_ms_bucket{span="duplicate_scan",le="1"} 1' in text
+    assert 'app_latency_ms_bucket{span="duplicate_scan",le="25"} 3' in text
+    assert 'app_latency_ms_bucket{span="duplicate_scan",le="+Inf"} 4' in text
+    assert 'app_latency_ms_count{span="duplicate_scan"} 4' in text
+    print("✅ Prometheus exposition rendered")
+
+
+def test_traced_request_logs_spans(monkeypatch):
+    """A traced call logs one line with its spans, stage timings and annotated outcome"""
+    handler = capture_request_log(monkeypatch)
+
+    @traced("unit_request")
+    def endpoint():
+        with span("duplicate_scan"):
+            time.sleep(0.01)
+        run_stages([Stage("priority", lambda: 2, 1, 5.0)])
+        annotate(outcome="created", category="Road Authority")
+        return "done"
+
+    assert endpoint() == "done"
+    assert len(handler.lines) == 1
+    line = handler.lines[0]
+    assert line["event"] == "unit_request" and line["outcome"] == "created"
+    assert line["category"] == "Road Authority"
+    assert line["spans_ms"]["duplicate_scan"] >= 10
+    assert "stage.priority" in line["spans_ms"]
+    assert line["total_ms"] >= line["spans_ms"]["duplicate_scan"]
+    assert metrics_module.latency_metrics.snapshot()["request.unit_request"]["count"] == 1
+    print(f"✅ Request line: {line}")
+
+
+def test_traced_outcome_on_errors(monkeypatch):
+    """HTTP errors are logged with their status, annotated outcomes win, spans outside requests are not traced"""
+    handler = capture_request_log(monkeypatch)
+
+    @traced("unit_errors")
+    def endpoint(kind):
+        if kind == "spam":
+            annotate(outcome="spam")
+        if kind in ("spam", "bad"):
+            raise HTTPException(status_code=400, detail="rejected")
+        raise RuntimeError("boom")
+
+    for kind in ("spam", "bad", "crash"):
+        try:
+            endpoint(kind)
+        except (HTTPException, RuntimeError):
+            pass
+    assert [line["outcome"] for line in handler.lines] == ["spam", "http_400", "error"]
+
+    with span("outside_request"):
+        pass
+    assert metrics_module.current_trace() is None
+    assert metrics_module.latency_metrics.snapshot()["outside_request"]["count"] >= 1
+    print("✅ Outcomes: spam, http_400, error")
+
+
+def test_metrics_endpoints_require_admin(monkeypatch):
+    """Metrics are admin-only, and a scrape does not create the classifier batcher"""
+    from app.auth import get_admin_user
+    from app.main import app
+    from app.services import classifier_batcher as batcher_module
+
+    monkeypatch.setattr(batcher_module, "_classifier_batcher", None)
+    client = TestClient(app)
+    for path in ["/metrics", "/metrics/prometheus"]:
+        assert client.get(path).status_code in (401, 403)
+
+    monkeypatch.setitem(app.dependency_overrides, get_admin_user, lambda: None)
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.json()["classifier_batcher"] is None
+    assert client.get("/metrics/prometheus").status_code == 200
+    assert batcher_module._classifier_batcher is None
+    print("✅ Metrics behind the admin dependency")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
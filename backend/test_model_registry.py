@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Unit tests for versioned category models: hot reload and shadow scoring
+"""
+import sys
+import os
+import json
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app.config import settings
+from app.services import model_registry as registry_module
+from app.services.classifier import CategoryClassifier, CATEGORIES
+from app.services.classifier_batcher import ClassifierBatcher
+from app.services.model_registry import ModelRegistry, leased_classifier
+
+
+class ConstantClassifier(CategoryClassifier):
+    """Predicts the label named in its version's model_info.json"""
+
+    backend = "test"
+
+    def __init__(self, version_dir: str, info: dict):
+        super().__init__(model_path=version_dir, encoder_name=os.path.basename(version_dir))
+        self.label = info.get("label", CATEGORIES[0])
+        self.fail = info.get("fail", False)
+        self.closed = False
+
+    def _load_models(self):
+        if self.fail:
+            raise RuntimeError("corrupt weights")
+
+    def predict_with_embeddings(self, texts):
+        return [self.label] * len(texts), np.zeros((len(texts), 4), dtype=np.float32)
+
+    def close(self):
+        self.closed = True
+
+
+def make_registry(tmp_path, versions: dict) -> ModelRegistry:
+    for version, info in versions.items():
+        os.makedirs(tmp_path / version)
+        with open(tmp_path / version / "model_info.json", "w") as f:
+            json.dump(info, f)
+    return ModelRegistry(models_dir=str(tmp_path), poll_interval=0.05, factory=ConstantClassifier, log_every=1)
+
+
+def point_registry(tmp_path, primary, shadow=None):
+    """Edit registry.json by hand, as an operator would"""
+    with open(tmp_path / "registry.json", "w") as f:
+        json.dump({"primary": primary, "shadow": shadow}, f)
+    # Make sure the mtime changes even on coarse-grained filesystems
+    stat = os.stat(tmp_path / "registry.json")
+    os.utime(tmp_path / "registry.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.02)
+    raise AssertionError("Condition not reached")
+
+
+def test_hot_reload_swaps_primary(tmp_path):
+    """Changing registry.json loads the new version and swaps it in without a restart"""
+    registry = make_registry(tmp_path, {"v1": {"label": CATEGORIES[0]}, "v2": {"label": CATEGORIES[3]}})
+    point_registry(tmp_path, "v1")
+    registry.start_watching()
+    try:
+        wait_for(lambda: registry.primary_version == "v1")
+        old = registry.primary
+        assert old.ready and old.predict(["pothole"]) == [CATEGORIES[0]]
+
+        point_registry(tmp_path, "v2")
+        wait_for(lambda: registry.primary_version == "v2")
+        assert registry.primary.predict(["pothole"]) == [CATEGORIES[3]]
+        assert registry.primary is not old and old.closed  # Nothing was leasing v1
+        assert registry.status()["available"] == ["v1", "v2"]
+        print("✅ registry.json change swapped v1 -> v2")
+    finally:
+        registry.stop()
+
+
+def test_failed_load_keeps_current_version(tmp_path):
+    """A version that cannot be loaded never replaces the serving one"""
+    registry = make_registry(tmp_path, {"v1": {}, "broken": {"fail": True}})
+    point_registry(tmp_path, "v1")
+    assert registry.reload()
+
+    point_registry(tmp_path, "broken")
+    assert not registry.reload()
+    assert registry.primary_version == "v1"
+    assert "corrupt weights" in registry.last_error and registry.reload_errors == 1
+    print("✅ Broken version rejected, v1 still serving")
+
+
+def test_shadow_agreement_and_promotion(tmp_path):
+    """The shadow scores primary traffic off the request path; promoting it reuses the loaded model"""
+    registry = make_registry(tmp_path, {"v1": {"label": CATEGORIES[0]}, "v2": {"label": CATEGORIES[0]}})
+    try:
+        registry.write_registry(primary="v1", shadow="v2")
+        assert registry.shadow_version == "v2"
+
+        primary = registry.primary
+        registry.record(primary, ["a", "b", "c"], [CATEGORIES[0], CATEGORIES[0], CATEGORIES[1]], 0.01)
+        wait_for(lambda: registry.status()["shadow"].get("compared") == 3)
+        shadow_status = registry.status()["shadow"]
+        assert shadow_status["agreement_rate"] == round(2 / 3, 4)
+        assert registry.status()["primary"]["items"] == 3
+
+        shadow_classifier = registry._shadow.classifier
+        registry.write_registry(primary="v2", shadow=None)
+        assert registry.primary_version == "v2" and registry.shadow_version is None
+        assert registry.primary is shadow_classifier
+        print(f"✅ Shadow agreement {shadow_status['agreement_rate']:.1%}, promoted without reloading")
+    finally:
+        registry.stop()
+
+
+def test_batcher_follows_primary(tmp_path, monkeypatch):
+    """With the registry enabled the batcher classifies with whichever version is primary"""
+    registry = make_registry(tmp_path, {"v1": {"label": CATEGORIES[0]}, "v2": {"label": CATEGORIES[2]}})
+    monkeypatch.setattr(settings, "CLASSIFIER_REGISTRY_ENABLED", True)
+    monkeypatch.setattr(registry_module, "_model_registry", registry)
+    batcher = ClassifierBatcher(max_batch_size=4, max_wait_ms=1)
+    try:
+        registry.write_registry(primary="v1")
+        assert batcher.classify_sync("overflowing bin") == CATEGORIES[0]
+        registry.write_registry(primary="v1", shadow="v2")
+        assert batcher.classify_sync("overflowing bin") == CATEGORIES[0]
+        wait_for(lambda: registry.status()["shadow"].get("compared") == 1)
+        assert registry.status()["shadow"]["agreement_rate"] == 0.0
+
+        registry.write_registry(primary="v2")
+        assert batcher.classify_sync("overflowing bin") == CATEGORIES[2]
+        print("✅ Batcher picked up the hot-swapped version")
+    finally:
+        batcher.stop()
+        registry.stop()
+
+
+def test_retired_version_closes_after_last_lease(tmp_path, monkeypatch):
+    """A replaced primary or shadow stays open while a call still leases it, however long that takes"""
+    registry = make_registry(tmp_path, {"v1": {}, "v2": {}, "v3": {}})
+    monkeypatch.setattr(settings, "CLASSIFIER_REGISTRY_ENABLED", True)
+    monkeypatch.setattr(registry_module, "_model_registry", registry)
+    try:
+        registry.write_registry(primary="v1", shadow="v2")
+        with leased_classifier() as v1, registry.lease(shadow=True) as v2:
+            registry.write_registry(primary="v3")
+            assert registry.primary_version == "v3" and registry.shadow_version is None
+            assert not v1.closed and not v2.classifier.closed
+            assert v1.predict(["pothole"]) == [CATEGORIES[0]]
+            with leased_classifier() as current:
+                assert current is registry.primary  # New calls lease the replacement
+        assert v1.closed and v2.classifier.closed
+        assert registry.status()["primary"]["in_flight"] == 0
+
+        # Promoting the shadow hands its classifier over instead of closing it
+        registry.write_registry(primary="v3", shadow="v1")
+        with registry.lease(shadow=True) as shadow:
+            registry.write_registry(primary="v1")
+        assert registry.primary is shadow.classifier and not shadow.classifier.closed
+        print("✅ Retired versions closed when their last lease was released")
+    finally:
+        registry.stop()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
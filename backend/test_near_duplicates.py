@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the MinHash LSH near-duplicate index
+"""
+import sys
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Authority, Base, Issue, User
+from app.services.near_duplicates import NearDuplicateIndex, shingles, words
+
+REPORT = "Garbage has not been collected from the corner of Station Road for a week and the bins are overflowing"
+OTHER_REPORTS = [
+    "Streetlight on Station Road has been flickering every night and the whole corner is dark",
+    "Open manhole in front of the primary school gate on Station Road, children walk past it daily"
+]
+LOCATION = "12.9716,77.5946"
+NEARBY = "12.9730,77.5950"  # About 160m away
+FAR = "13.0500,77.6500"  # About 10km away
+
+
+@pytest.fixture
+def index():
+    return NearDuplicateIndex(num_perm=64, bands=16, threshold=0.8, min_words=8, max_distance_m=2000, window_days=30, max_entries=1000)
+
+
+def test_shingles():
+    assert shingles(words("Pothole on Main Road!")) == {"pothole on main", "on main road"}
+    assert shingles(words("Pothole here")) == {"pothole", "here"}
+
+
+def test_copy_paste_matches_with_issue_id(index):
+    """Verbatim and lightly edited copies match; a different report in the same place does not"""
+    issue_id = uuid.uuid4()
+    assert index.add(issue_id, REPORT, "North", LOCATION)
+
+    match = index.query(REPORT, "North", NEARBY)
+    assert match.issue_id == issue_id and match.similarity == 1.0
+    assert 100 < match.distance_meters < 250
+
+    edited = index.query(REPORT.upper() + "!!", "North", LOCATION)
+    assert edited is not None and edited.issue_id == issue_id
+
+    other = "Streetlight on Station Road has been flickering every night and the whole corner is dark"
+    assert index.query(other, "North", LOCATION) is None
+    print(f"✅ Copy matched issue {match.issue_id} at {match.distance_meters:.0f}m")
+
+
+def test_district_distance_and_length_filters(index):
+    issue_id = uuid.uuid4()
+    index.add(issue_id, REPORT, "North", LOCATION)
+    assert index.query(REPORT, "South", LOCATION) is None
+    assert index.query(REPORT, "North", FAR) is None
+    assert not index.add(uuid.uuid4(), "Pothole on Main Road", "North", LOCATION)  # Too short to index
+    assert index.query("Pothole on Main Road", "North", LOCATION) is None
+
+    anywhere = NearDuplicateIndex(num_perm=64, bands=16, max_distance_m=0, min_words=8)
+    anywhere.add(issue_id, REPORT, "North", LOCATION)
+    assert anywhere.query(REPORT, "North", FAR).issue_id == issue_id
+    print("✅ Other districts, far locations and short texts do not match")
+
+
+def test_remove_and_reindex(index):
+    issue_id = uuid.uuid4()
+    index.add(issue_id, REPORT, "North", LOCATION)
+    index.remove(issue_id)
+    assert index.query(REPORT, "North", LOCATION) is None
+    assert index.stats()["entries"] == 0 and index.stats()["buckets"] == 0
+
+    index.add(issue_id, REPORT, "North", LOCATION)
+    edited = "Open manhole in front of the primary school gate on Station Road, children walk past it daily"
+    index.add(issue_id, edited, "North", LOCATION)  # Description edited
+    assert index.query(REPORT, "North", LOCATION) is None
+    assert index.query(edited, "North", LOCATION).issue_id == issue_id
+    assert index.stats()["entries"] == 1
+    print("✅ Removed and re-indexed issues")
+
+
+def test_window_and_size_eviction():
+    index = NearDuplicateIndex(num_perm=64, bands=16, min_words=8, window_days=30, max_entries=3)
+    old_id = uuid.uuid4()
+    index.add(old_id, REPORT, "North", LOCATION, created_at=datetime.now() - timedelta(days=45))
+    assert index.stats()["entries"] == 0
+
+    ids = [uuid.uuid4() for _ in range(4)]
+    for n, issue_id in enumerate(ids):
+        index.add(issue_id, f"{REPORT} near house number {n * 1000}", "North", LOCATION)
+    assert index.stats()["entries"] == 3
+    assert index.query(f"{REPORT} near house number 0", "North", LOCATION).issue_id != ids[0]
+    print("✅ Issues outside the window or beyond the size limit are evicted")
+
+
+def test_edited_old_issue_expires():
+    """Re-indexing an edited issue keeps its age; it stops matching once it is outside the window"""
+    index = NearDuplicateIndex(num_perm=64, bands=16, min_words=8, window_days=30, max_entries=100)
+    index.add(uuid.uuid4(), OTHER_REPORTS[0], "North", LOCATION)
+    index.add(uuid.uuid4(), REPORT, "North", LOCATION, created_at=datetime.now() - timedelta(days=45))  # Edited today
+    assert index.stats()["entries"] == 2  # Behind a fresh issue, so not evicted
+    assert index.query(REPORT, "North", LOCATION) is None
+    print("✅ Edited issue older than the window does not match")
+
+
+def test_build_does_not_block_lookups():
+    """Lookups and router updates go through while the build is loading rows"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    user = User(id=uuid.uuid4(), name="reporter", email="reporter@example.com", password="x", role=0)
+    authority = Authority(id=uuid.uuid4(), name="Roads", district="North", contact_email="r@example.com", category="Road Authority", user_id=user.id)
+    stored = [Issue(
+        user_id=user.id, authority_id=authority.id, title="Report", description=description,
+        location=LOCATION, category="Road Authority", status=0
+    ) for description in OTHER_REPORTS]
+    db.add_all([user, authority, *stored])
+    db.commit()
+    kept, closed = [issue.id for issue in stored]
+    db.close()
+
+    loading, release = threading.Event(), threading.Event()
+    def slow_session():
+        loading.set()
+        release.wait(5)
+        return session_factory()
+
+    index = NearDuplicateIndex(num_perm=64, bands=16, min_words=8, session_factory=slow_session)
+    build = index.start_background_build()
+    assert loading.wait(5)
+    added = uuid.uuid4()
+    started = time.perf_counter()
+    index.ensure_built()  # Request path: does not wait for the build
+    index.add(added, REPORT, "North", LOCATION)
+    index.remove(closed)  # Closed while the build was loading
+    assert index.query(REPORT, "North", LOCATION).issue_id == added
+    assert time.perf_counter() - started < 1
+    release.set()
+    build.join(5)
+
+    assert index.built and index.stats()["entries"] == 2
+    assert index.query(OTHER_REPORTS[0], "North", LOCATION).issue_id == kept
+    assert index.query(OTHER_REPORTS[1], "North", LOCATION) is None
+    print("✅ Build swapped in without blocking lookups or resurrecting closed issues")
+
+
+def test_lookup_is_sub_millisecond():
+    """Lookups stay well under a millisecond with thousands of indexed issues"""
+    index = NearDuplicateIndex(num_perm=64, bands=16, min_words=8, max_entries=10000)
+    for n in range(5000):
+        index.add(uuid.uuid4(), f"Report {n}: water pipe {n % 97} burst near block {n} of sector {n % 13}, road flooded since morning", f"D{n % 10}", LOCATION)
+    index.lookups, index.lookup_seconds = 0, 0.0
+    start = time.perf_counter()
+    for n in range(500):
+        index.query(f"Report {n}: water pipe {n % 97} burst near block {n} of sector {n % 13}, road flooded since morning", f"D{n % 10}", LOCATION)
+    per_lookup_ms = (time.perf_counter() - start) / 500 * 1000
+    stats = index.stats()
+    assert stats["matches"] == 500
+    assert per_lookup_ms < 1.0
+    print(f"✅ {per_lookup_ms:.3f}ms per lookup over {stats['entries']} issues")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
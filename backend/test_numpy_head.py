@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the pure-NumPy model_new.h5 classification head
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from app.services.numpy_head import NumpyDenseHead
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "routers", "model_new.h5")
+
+
+def random_embeddings(rows: int = 64) -> np.ndarray:
+    # Roughly the scale of RoBERTa [CLS] activations
+    return np.random.default_rng(42).normal(0, 0.5, size=(rows, 768)).astype(np.float32)
+
+
+def test_head_structure():
+    """The head is 768 -> 256 -> 128 -> 4 with a softmax output"""
+    head = NumpyDenseHead.from_h5(MODEL_PATH)
+    assert [kernel.shape for kernel, _, _ in head.layers] == [(768, 256), (256, 128), (128, 4)]
+    assert [activation for _, _, activation in head.layers] == ["relu", "relu", "softmax"]
+    assert head.input_dim == 768
+    assert head.output_dim == 4
+
+    probabilities = head(random_embeddings())
+    assert probabilities.shape == (64, 4)
+    assert np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-5)
+    print("✅ NumPy head loaded with the expected layer structure")
+
+
+def test_parity_with_keras():
+    """NumPy predictions match Keras predictions on the same embeddings"""
+    tf = pytest.importorskip("tensorflow")
+
+    embeddings = random_embeddings()
+    keras_model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+    expected = keras_model.predict(embeddings, verbose=0)
+    actual = NumpyDenseHead.from_h5(MODEL_PATH)(embeddings)
+
+    assert np.allclose(actual, expected, atol=1e-5), f"Max difference {np.max(np.abs(actual - expected))}"
+    assert np.array_equal(np.argmax(actual, axis=1), np.argmax(expected, axis=1))
+    print(f"✅ NumPy head matches Keras (max diff {np.max(np.abs(actual - expected)):.2e})")
+
+
+def test_unsupported_activation_rejected():
+    """Unknown activations fail loudly instead of producing wrong predictions"""
+    kernel = np.zeros((2, 2), dtype=np.float32)
+    bias = np.zeros(2, dtype=np.float32)
+    with pytest.raises(ValueError):
+        NumpyDenseHead([(kernel, bias, "gelu")])
+    print("✅ Unsupported activation rejected")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
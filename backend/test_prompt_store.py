@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the system prompt store
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.prompt_store import PromptStore
+
+
+def write_prompt(path, text, mtime_ns):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_prompt_read_once(tmp_path):
+    """Repeated lookups are served from memory"""
+    write_prompt(tmp_path / "system_prompt4.txt", "Reply SPAM or LEGITIMATE", 1_000_000_000)
+    store = PromptStore(base_dir=str(tmp_path), reload_interval=0)
+
+    first = store.get("system_prompt4.txt")
+    second = store.get("system_prompt4.txt")
+    assert first is second
+    assert first.text == "Reply SPAM or LEGITIMATE"
+    assert store.stats()["loads"] == 1
+    assert store.stats()["hits"] == 1
+    print(f"✅ Prompt served from memory: {store.stats()}")
+
+
+def test_prompt_reloaded_on_change(tmp_path):
+    """Editing the file changes the text and hash on the next lookup"""
+    path = tmp_path / "system_prompt1.txt"
+    write_prompt(path, "Respond with 0, 1 or 2", 1_000_000_000)
+    store = PromptStore(base_dir=str(tmp_path), reload_interval=0)
+    old = store.get("system_prompt1.txt")
+
+    write_prompt(path, "Respond with 0, 1, 2 or 3", 2_000_000_000)
+    new = store.get("system_prompt1.txt")
+    assert new.text == "Respond with 0, 1, 2 or 3"
+    assert new.hash != old.hash
+    assert store.stats()["reloads"] == 1
+    print("✅ Edited prompt reloaded")
+
+
+def test_reload_check_throttled(tmp_path):
+    """Within the reload interval the file is not checked again"""
+    path = tmp_path / "system_prompt3.txt"
+    write_prompt(path, "Radius prompt", 1_000_000_000)
+    store = PromptStore(base_dir=str(tmp_path), reload_interval=60)
+    store.get("system_prompt3.txt")
+
+    write_prompt(path, "Radius prompt v2", 2_000_000_000)
+    assert store.get("system_prompt3.txt").text == "Radius prompt"
+    print("✅ Reload checks throttled")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
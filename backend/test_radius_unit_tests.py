@@ -12,6 +12,11 @@ from app.routers.issues import (
     auto_upvote_issue
 )
 import math
+import uuid
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models import Authority, Base, Issue, User
 
 def test_distance_calculation():
     """Test the Haversine distance calculation"""
@@ -140,6 +145,41 @@ def test_ai_radius_extraction():
     
     print("✅ AI radius extraction logic tests passed!")
 
+def test_check_duplicate_issue():
+    """Test duplicate lookup against stored issues (same scan as find_duplicate_issue)"""
+    print("\n🗺️ Testing duplicate lookup...")
+    
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user = User(id=uuid.uuid4(), name="reporter", email="reporter@example.com", password="x", role=0)
+    authority = Authority(id=uuid.uuid4(), name="Roads", district="North", contact_email="r@example.com", category="Road Authority", user_id=user.id)
+    db.add_all([user, authority])
+    db.commit()
+    
+    def add_issue(location: str, category: str = "Road Authority", status: int = 0) -> Issue:
+        issue = Issue(
+            user_id=user.id, authority_id=authority.id, title="Pothole", description="Pothole on the main road",
+            location=location, category=category, status=status, radius=100
+        )
+        db.add(issue)
+        db.commit()
+        return issue
+    
+    far = add_issue("40.7140,-74.0060")  # ~130m away
+    near = add_issue("40.7129,-74.0060")  # ~11m away
+    add_issue("40.7128,-74.0060", category="Water Authority")
+    add_issue("40.7128,-74.0061", status=3)  # Closed
+    
+    assert check_duplicate_issue("Road Authority", "North", "40.7128,-74.0060", 500, user.id, db) is near
+    assert check_duplicate_issue("Road Authority", "North", "40.7128,-74.0060", 500, user.id, db, exclude_issue_id=near.id) is far
+    assert check_duplicate_issue("Road Authority", "North", "40.7128,-74.0060", 50, user.id, db, exclude_issue_id=near.id) is None
+    assert check_duplicate_issue("Road Authority", "South", "40.7128,-74.0060", 500, user.id, db) is None
+    assert check_duplicate_issue("Road Authority", "North", "not a location", 500, user.id, db) is None
+    db.close()
+    
+    print("✅ Duplicate lookup tests passed!")
+
 def run_all_tests():
     """Run all tests"""
     print("🧪 Running Radius-Based Duplicate Detection Unit Tests")
@@ -150,6 +190,7 @@ def run_all_tests():
         test_location_parsing()
         test_radius_functionality()
         test_ai_radius_extraction()
+        test_check_duplicate_issue()
         
         print("\n" + "=" * 60)
         print("🎉 All tests passed! Radius-based duplicate detection is working correctly.")
@@ -158,6 +199,7 @@ def run_all_tests():
         print("✅ Location coordinate parsing")
         print("✅ Radius-based proximity logic")
         print("✅ AI radius extraction logic")
+        print("✅ Duplicate lookup against stored issues")
         
     except Exception as e:
         print(f"\n❌ Test failed: {e}")
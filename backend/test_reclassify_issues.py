@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the batch re-classification command
+"""
+import sys
+import os
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Authority, Issue, IssueEmbedding
+from app.services.classifier import CATEGORIES
+from app.services.embedding_store import save_issue_embedding
+from reclassify_issues import load_checkpoint, reclassify
+
+MODEL = "fake-encoder/keras"
+
+
+class KeywordClassifier:
+    """Classifier double: 'wire' -> Electricity Company, anything else -> Road Authority.
+    Embeddings are one-hot category vectors, so the head can score stored ones."""
+
+    embedding_model = MODEL
+    model_path = None
+    supports_head_scoring = True
+
+    def __init__(self):
+        self.texts = []
+        self.head_rows = 0
+
+    def predict_with_embeddings(self, texts):
+        self.texts.extend(texts)
+        labels = [CATEGORIES[3] if "wire" in text else CATEGORIES[0] for text in texts]
+        return labels, np.eye(len(CATEGORIES), dtype=np.float32)[[CATEGORIES.index(label) for label in labels]]
+
+    def predict_proba(self, embeddings):
+        self.head_rows += len(embeddings)
+        return embeddings
+
+
+def make_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(
+        bind=engine, tables=[Authority.__table__, Issue.__table__, IssueEmbedding.__table__]
+    )
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def seed(db, count: int = 10):
+    """Issues all filed under Road Authority; odd ones describe electrical faults"""
+    user_id = uuid.uuid4()
+    authorities = {}
+    for category in CATEGORIES:
+        authority = Authority(
+            name=category, district="Ahmedabad", contact_email="a@example.com", category=category, user_id=user_id
+        )
+        db.add(authority)
+        authorities[category] = authority
+    db.flush()
+    for i in range(count):
+        db.add(Issue(
+            user_id=user_id,
+            authority_id=authorities[CATEGORIES[0]].id,
+            title=f"Issue {i}",
+            description=f"hanging wire {i}" if i % 2 else f"pothole {i}",
+            location="23.0225,72.5714",
+            category=CATEGORIES[0]
+        ))
+    db.commit()
+    return authorities
+
+
+def test_reclassify_updates_category_and_authority(tmp_path):
+    """Changed labels are bulk-updated and re-routed to the district's authority for the new category"""
+    db = make_session()
+    authorities = seed(db)
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    totals = reclassify(db, KeywordClassifier(), batch_size=3, update_authority=True,
+                        checkpoint_path=checkpoint, progress=lambda line: None)
+
+    assert totals["processed"] == 10
+    assert totals["changed"] == 5 and totals["rerouted"] == 5
+    assert totals["transitions"] == {f"{CATEGORIES[0]} -> {CATEGORIES[3]}": 5}
+    electricity = db.query(Issue).filter(Issue.category == CATEGORIES[3]).all()
+    assert len(electricity) == 5
+    assert all(issue.authority_id == authorities[CATEGORIES[3]].id for issue in electricity)
+    assert db.query(IssueEmbedding).count() == 10
+    assert load_checkpoint(checkpoint)["processed"] == 10
+    print("✅ 5 of 10 issues re-categorized and re-routed")
+
+
+def test_resume_from_checkpoint(tmp_path):
+    """A run stopped by --limit resumes after the last committed chunk"""
+    db = make_session()
+    seed(db)
+    checkpoint = str(tmp_path / "checkpoint.json")
+    classifier = KeywordClassifier()
+
+    first = reclassify(db, classifier, batch_size=4, limit=4, checkpoint_path=checkpoint, progress=lambda line: None)
+    assert first["processed"] == 4
+    second = reclassify(db, classifier, batch_size=4, checkpoint_path=checkpoint,
+                        checkpoint=load_checkpoint(checkpoint), progress=lambda line: None)
+
+    assert second["processed"] == 10 and second["processed_this_run"] == 6
+    assert len(classifier.texts) == 10  # Nothing classified twice
+    assert db.query(Issue).filter(Issue.category == CATEGORIES[3]).count() == 5
+    print("✅ Resumed after 4 issues, each issue classified once")
+
+
+def test_stored_embeddings_skip_the_encoder():
+    """Issues with an embedding from the same encoder are scored with the head only"""
+    db = make_session()
+    seed(db, count=4)
+    issues = db.query(Issue).order_by(Issue.id).all()
+    for issue in issues[:2]:
+        save_issue_embedding(db, issue.id, np.eye(len(CATEGORIES))[3], MODEL)
+    classifier = KeywordClassifier()
+
+    totals = reclassify(db, classifier, batch_size=10, progress=lambda line: None)
+
+    assert totals["from_stored_embeddings"] == 2
+    assert classifier.head_rows == 2 and len(classifier.texts) == 2
+    assert all(db.get(Issue, issue.id).category == CATEGORIES[3] for issue in issues[:2])
+    print("✅ Stored embeddings re-scored without the encoder")
+
+
+def test_fused_classifier_reencodes_stored_issues():
+    """Without a separate head, stored embeddings are ignored and every text is encoded"""
+    db = make_session()
+    seed(db, count=4)
+    for issue in db.query(Issue).all():
+        save_issue_embedding(db, issue.id, np.eye(len(CATEGORIES))[3], MODEL)
+    classifier = KeywordClassifier()
+    classifier.supports_head_scoring = False
+
+    totals = reclassify(db, classifier, batch_size=10, progress=lambda line: None)
+
+    assert totals["from_stored_embeddings"] == 0
+    assert classifier.head_rows == 0 and len(classifier.texts) == 4
+    print("✅ Fused classifier re-encoded every issue")
+
+
+def test_dry_run_writes_nothing():
+    """--dry-run reports changes without touching the table"""
+    db = make_session()
+    seed(db)
+    totals = reclassify(db, KeywordClassifier(), dry_run=True, update_authority=True, progress=lambda line: None)
+
+    assert totals["changed"] == 5
+    assert db.query(Issue).filter(Issue.category == CATEGORIES[3]).count() == 0
+    assert db.query(IssueEmbedding).count() == 0
+    print("✅ Dry run left issues unchanged")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
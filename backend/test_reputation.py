@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Unit tests for reporter reputation and the spam check it lets trusted reporters skip
+"""
+import sys
+import os
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.routers.issues as issues
+from app.config import settings
+from app.models import Authority, Base, Issue, Notification, User, Vote
+from app.services import fake_llm as fake_llm_module
+from app.services import reputation as reputation_module
+from app.services.enrichment_worker import EnrichmentWorker
+from app.services.fake_llm import FakeLLM
+from app.services.reputation import ReputationService, reputation_score
+
+CIVIC = "Streetlight flickering"  # Too short for the pre-filter, so the LLM spam check would run
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def add_user(db, name: str) -> User:
+    user = User(id=uuid.uuid4(), name=name, email=f"{name}@example.com", password="x", role=0)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def add_reports(db, user: User, authority: Authority, outcomes: list, voters=()) -> list:
+    """One issue per (status, enrichment_status); every voter votes on every issue"""
+    reports = []
+    for status, enrichment_status in outcomes:
+        issue = Issue(
+            user_id=user.id, authority_id=authority.id, title="Report", description="Pothole on the main road",
+            location="12.97,77.59", category="Road Authority", status=status, enrichment_status=enrichment_status
+        )
+        db.add(issue)
+        db.flush()
+        db.add_all([Vote(user_id=voter.id, issue_id=issue.id) for voter in voters])
+        reports.append(issue)
+    db.commit()
+    return reports
+
+
+@pytest.fixture
+def reporters(session_factory):
+    db = session_factory()
+    admin = add_user(db, "authority")
+    authority = Authority(id=uuid.uuid4(), name="Roads", district="North", contact_email="r@example.com", category="Road Authority", user_id=admin.id)
+    db.add(authority)
+    db.commit()
+    users = {name: add_user(db, name) for name in ["veteran", "newcomer", "mixed", "spammer"]}
+    voters = [add_user(db, f"voter{n}") for n in range(2)]
+    add_reports(db, users["veteran"], authority, [(2, "complete")] * 5 + [(1, "complete"), (0, "complete"), (3, "merged")], voters)
+    add_reports(db, users["newcomer"], authority, [(2, "complete")] * 2)
+    add_reports(db, users["mixed"], authority, [(2, "complete")] * 4 + [(3, "complete")] * 3)
+    add_reports(db, users["spammer"], authority, [(2, "complete")] * 9 + [(3, "spam")])
+    ids = {name: user.id for name, user in users.items()}
+    ids["authority"] = authority.id
+    db.close()
+    return ids
+
+
+def test_score():
+    assert reputation_score(0, 0, 0, 0.25) == 0.5
+    assert reputation_score(5, 0, 0, 0.25) == pytest.approx(6 / 7)
+    assert reputation_score(10, 1, 10, 0.25) > reputation_score(10, 1, 0, 0.25)
+    assert reputation_score(2, 0, 100, 0.25) == reputation_score(2, 0, 2, 0.25)  # At most one vote per accepted report
+
+
+def test_trust_from_history(session_factory, reporters):
+    """Accepted reports, votes, rejections and spam closures decide trust"""
+    service = ReputationService(min_reports=5, trust_threshold=0.85, vote_weight=0.25, session_factory=session_factory)
+    reputations = service.compute([reporters[name] for name in ["veteran", "newcomer", "mixed", "spammer"]])
+
+    veteran = reputations[reporters["veteran"]]
+    assert (veteran.accepted, veteran.rejected, veteran.open, veteran.votes_received) == (6, 0, 1, 12)
+    assert veteran.trusted
+    assert not reputations[reporters["newcomer"]].trusted  # Too few reports
+    assert not reputations[reporters["mixed"]].trusted  # Score 5/9
+    assert not reputations[reporters["spammer"]].trusted  # A report was closed as spam
+    print(f"✅ Veteran score {veteran.score:.3f}, mixed {reputations[reporters['mixed']].score:.3f}")
+
+
+def test_cache_refresh_and_invalidate(session_factory, reporters):
+    service = ReputationService(min_reports=5, trust_threshold=0.85, session_factory=session_factory)
+    veteran = reporters["veteran"]
+    assert service.is_trusted(veteran) and service.is_trusted(veteran)
+    assert (service.stats()["hits"], service.stats()["misses"]) == (1, 1)
+
+    # A report closed as spam shows up on the next refresh
+    db = session_factory()
+    db.query(Issue).filter(Issue.user_id == veteran, Issue.status == 0).update({"status": 3, "enrichment_status": "spam"})
+    db.commit()
+    db.close()
+    assert service.is_trusted(veteran)  # Still the cached value
+    service.refresh()
+    assert not service.is_trusted(veteran)
+    assert service.stats()["misses"] == 1
+
+    service.invalidate(veteran)
+    service.is_trusted(veteran)
+    assert service.stats()["misses"] == 2
+    print(f"✅ Cache stats: {service.stats()}")
+
+
+@pytest.fixture
+def pipeline(monkeypatch, session_factory, reporters):
+    """AI stages against the fake provider, issue router and reputation backed by the test database"""
+    fake = FakeLLM(token_delay_ms=0, latency_ms=0, error_rate=0)
+    monkeypatch.setattr(settings, "LLM_FAKE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "AI_ENRICHMENT_MODE", "separate")
+    monkeypatch.setattr(settings, "REPUTATION_ENABLED", True)
+    monkeypatch.setattr(fake_llm_module, "_fake_llm", fake)
+    monkeypatch.setattr(reputation_module, "_reputation_service", ReputationService(session_factory=session_factory))
+    monkeypatch.setattr(issues, "SessionLocal", session_factory)
+    monkeypatch.setattr(issues, "get_category_and_embedding", lambda description: ("Road Authority", np.ones(4)))
+    return fake
+
+
+def test_trusted_reporter_skips_llm_spam_check(pipeline, reporters):
+    """Trusted reporters' issues are enriched without the spam call; others still get it"""
+    assert issues.trusted_reporter_screen(reporters["newcomer"], None) is None
+    screen = issues.trusted_reporter_screen(reporters["veteran"], None)
+    assert screen.decision == "ham" and screen.tier == "reputation"
+
+    enrichment, _, _ = issues.run_ai_stages(CIVIC, screen)
+    assert enrichment.is_spam is False and "trusted reporter" in enrichment.spam_verdict
+    assert "spam" not in pipeline.status()["calls_by_kind"]
+    assert reputation_module.get_reputation_service().stats()["spam_checks_skipped"] == 1
+    print(f"✅ Reputation stats: {reputation_module.get_reputation_service().stats()}")
+
+
+def test_deferred_check_closes_spam(pipeline, session_factory, reporters):
+    """The deferred check keeps legitimate reports and closes spam, which costs the reporter their trust"""
+    db = session_factory()
+    legitimate, spam = [Issue(
+        user_id=reporters["veteran"], authority_id=reporters["authority"], title="Report", description=description,
+        location="12.97,77.59", category="Road Authority", status=0, enrichment_status="spam_check"
+    ) for description in [CIVIC, "Buy cheap phones, click here for a discount"]]
+    db.add_all([legitimate, spam])
+    db.commit()
+    service = reputation_module.get_reputation_service()
+    assert service.is_trusted(reporters["veteran"])
+
+    issues.check_trusted_report_in_background(legitimate.id)
+    issues.check_trusted_report_in_background(spam.id)
+    db.expire_all()
+    assert (legitimate.status, legitimate.enrichment_status) == (0, "complete")
+    assert (spam.status, spam.enrichment_status) == (3, "spam")
+    assert db.query(Notification).filter(Notification.issue_id == spam.id).count() == 2  # Reporter and authority
+    assert not service.is_trusted(reporters["veteran"])
+    assert service.stats()["deferred_checks"] == 2 and service.stats()["deferred_spam"] == 1
+    db.close()
+    print("✅ Deferred check closed the spam report and revoked trust")
+
+
+def test_failed_deferred_check_is_retried(pipeline, session_factory, reporters, monkeypatch):
+    """A deferred check that gets no verdict leaves the report waiting for the next requeue"""
+    db = session_factory()
+    issue = Issue(
+        user_id=reporters["veteran"], authority_id=reporters["authority"], title="Report", description=CIVIC,
+        location="12.97,77.59", category="Road Authority", status=0, enrichment_status="spam_check"
+    )
+    db.add(issue)
+    db.commit()
+
+    is_spam_from_text = issues.is_spam_from_text
+    def unavailable(description):
+        raise RuntimeError("provider down")
+    monkeypatch.setattr(issues, "is_spam_from_text", unavailable)
+    issues.check_trusted_report_in_background(issue.id)
+    db.expire_all()
+    assert (issue.status, issue.enrichment_status) == (0, "spam_check")
+
+    # The provider is back after a restart
+    monkeypatch.setattr(issues, "is_spam_from_text", is_spam_from_text)
+    worker = EnrichmentWorker(max_workers=1)
+    monkeypatch.setattr(issues, "get_enrichment_worker", lambda: worker)
+    assert issues.requeue_deferred_spam_checks() == 1
+    worker.stop(wait=True)
+    db.expire_all()
+    assert (issue.status, issue.enrichment_status) == (0, "complete")
+    db.close()
+    print("✅ Failed deferred check retried after the requeue")
+
+
+def test_requeue_survives_unavailable_database(monkeypatch):
+    """Startup requeue logs a broken database instead of raising"""
+    broken = sessionmaker(bind=create_engine("sqlite:///file:missing?mode=ro&uri=true"))
+    monkeypatch.setattr(issues, "SessionLocal", broken)
+    assert issues.requeue_deferred_spam_checks() == 0
+    print("✅ Requeue skipped without a database")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
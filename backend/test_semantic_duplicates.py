@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for geo + embedding duplicate matching
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app.services.duplicate_detection import select_duplicate, haversine_distances, cosine_similarities
+
+LAT, LON = 23.0225, 72.5714
+POTHOLE = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32)
+POTHOLE_REWORDED = np.array([0.98, 0.2, 0.0, 0.0], dtype=np.float32)
+STREETLIGHT = np.array([0.0, 0.0, 1.0, 0.0], dtype=np.float32)
+
+
+def candidates(categories, offsets_m, embeddings, radius=100):
+    # ~1e-5 degrees of latitude is ~1.11 m
+    lats = np.array([LAT + offset / 111_195 for offset in offsets_m])
+    return dict(
+        candidate_categories=categories,
+        candidate_lats=lats,
+        candidate_lons=np.full(len(categories), LON),
+        candidate_radii=np.full(len(categories), radius),
+        candidate_embeddings=np.stack(embeddings),
+        has_embedding=np.ones(len(categories), dtype=bool),
+    )
+
+
+def test_vectorized_math():
+    """Vectorized haversine and cosine agree with their scalar definitions"""
+    distances = haversine_distances(LAT, LON, np.array([LAT, LAT + 0.001]), np.array([LON, LON]))
+    assert distances[0] == 0.0
+    assert abs(distances[1] - 111.19) < 0.5
+    similarities = cosine_similarities(POTHOLE, np.stack([POTHOLE * 3, STREETLIGHT]))
+    assert np.allclose(similarities, [1.0, 0.0])
+    print("✅ Vectorized distance and similarity")
+
+
+def test_different_problem_on_same_street_not_merged():
+    """Same category and inside the radius, but unrelated descriptions"""
+    match = select_duplicate(
+        "Road Authority", LAT, LON, 100, embedding=POTHOLE, threshold=0.9, cross_category_threshold=0.95,
+        **candidates(["Road Authority"], [20], [STREETLIGHT])
+    )
+    assert match is None
+    print("✅ Unrelated report on the same street kept separate")
+
+
+def test_same_problem_other_category_merged():
+    """A reworded report filed under another category is still found, with distance and similarity"""
+    match = select_duplicate(
+        "Road Authority", LAT, LON, 100, embedding=POTHOLE_REWORDED, threshold=0.9, cross_category_threshold=0.95,
+        **candidates(["Road Authority", "Public Amenities Authority"], [40, 30], [STREETLIGHT, POTHOLE])
+    )
+    assert match is not None
+    assert match.index == 1
+    assert 25 < match.distance_meters < 35
+    assert match.similarity > 0.95
+    print(f"✅ Cross-category duplicate found: {match}")
+
+
+def test_outside_geo_window_ignored():
+    """Identical descriptions far apart are different issues"""
+    match = select_duplicate(
+        "Road Authority", LAT, LON, 100, embedding=POTHOLE, threshold=0.9, cross_category_threshold=0.95,
+        **candidates(["Road Authority"], [5000], [POTHOLE])
+    )
+    assert match is None
+    print("✅ Geo window respected")
+
+
+def test_geo_rule_without_embeddings():
+    """Without an embedding the plain category + radius rule picks the nearest candidate"""
+    data = candidates(["Road Authority", "Road Authority", "Electricity Company"], [80, 30, 10], [POTHOLE] * 3)
+    data.pop("candidate_embeddings")
+    data.pop("has_embedding")
+    match = select_duplicate("Road Authority", LAT, LON, 100, **data)
+    assert match.index == 1
+    assert match.similarity is None
+    print("✅ Geo-only fallback")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
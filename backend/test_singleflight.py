@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for coalescing identical concurrent LLM queries
+"""
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.util as util
+from app.config import settings
+from app.services import fake_llm as fake_llm_module
+from app.services import singleflight as singleflight_module
+from app.services.fake_llm import FakeLLM
+from app.services.llm_cache import LLMResponseCache
+from app.services.singleflight import SingleFlight
+
+
+def run_concurrently(func, count: int) -> list:
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: func(), range(count)))
+
+
+def test_concurrent_callers_share_one_call():
+    """Callers arriving while the leader runs get its result without calling func"""
+    flight = SingleFlight(wait_timeout=5)
+    calls = []
+
+    def slow_upstream():
+        calls.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    results = run_concurrently(lambda: flight.do("same-key", slow_upstream), 8)
+    assert results == ["answer"] * 8
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert stats["upstream_calls"] == 1 and stats["coalesced"] == 7 and stats["in_flight"] == 0
+    print(f"✅ 8 callers, 1 upstream call (coalesce rate {stats['coalesce_rate']:.0%})")
+
+
+def test_errors_are_shared_and_not_remembered():
+    """Waiters see the leader's exception; the next call after the flight runs again"""
+    flight = SingleFlight(wait_timeout=5)
+    attempts = []
+
+    def failing_upstream():
+        attempts.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("provider unavailable")
+
+    def call():
+        try:
+            return flight.do("key", failing_upstream)
+        except RuntimeError as e:
+            return str(e)
+
+    assert run_concurrently(call, 4) == ["provider unavailable"] * 4
+    assert len(attempts) == 1
+    assert flight.do("key", lambda: "recovered") == "recovered"
+    assert flight.stats()["errors"] == 1
+    print("✅ Shared failure, next flight recovered")
+
+
+def test_slow_leader_waiters_fall_back():
+    """A waiter gives up on a stuck leader after wait_timeout and calls upstream itself"""
+    flight = SingleFlight(wait_timeout=0.05)
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=("key", lambda: release.wait(5)))
+    leader.start()
+    time.sleep(0.02)
+    try:
+        assert flight.do("key", lambda: "own call") == "own call"
+        assert flight.stats()["wait_timeouts"] == 1
+    finally:
+        release.set()
+        leader.join()
+    print("✅ Waiter fell back after the wait timeout")
+
+
+def test_get_query_response_coalesces_normalized_queries(monkeypatch):
+    """Identical questions (up to case and punctuation) against one prompt make a single provider call"""
+    fake = FakeLLM(token_delay_ms=0)
+    original_complete = fake.complete
+
+    def slow_complete(messages):
+        time.sleep(0.2)
+        return original_complete(messages)
+
+    monkeypatch.setattr(fake, "complete", slow_complete)
+    monkeypatch.setattr(settings, "LLM_FAKE_ENABLED", True)
+    monkeypatch.setattr(fake_llm_module, "_fake_llm", fake)
+    monkeypatch.setattr(singleflight_module, "_singleflight", SingleFlight(wait_timeout=5))
+    cache = LLMResponseCache(use_db=False)
+    monkeypatch.setattr(util, "get_llm_cache", lambda: cache)
+
+    queries = ["Where do I report a pothole?", "where do i report a pothole", "WHERE do I report a pothole!"]
+    with ThreadPoolExecutor(max_workers=9) as pool:
+        answers = list(pool.map(util.get_query_response, queries * 3))
+    assert len(set(answers)) == 1
+    assert fake.calls == 1
+
+    # Different prompt files are different keys
+    util.get_query_response(queries[0], "system_prompt1.txt")
+    assert fake.calls == 2
+    print(f"✅ 9 concurrent chatbot queries, {fake.calls - 1} upstream call")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Startup budget tests: importing the app must not load the ML/LLM stacks
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_startup import (
+    HEAVY_MODULES, IMPORT_RSS_BUDGET_MB, IMPORT_TIME_BUDGET_SECONDS, measure_import
+)
+
+
+def test_app_import_defers_heavy_modules():
+    """torch, transformers, onnxruntime, g4f, ... are loaded on first use, not by importing app.main"""
+    result = measure_import("app.main")
+    assert result["heavy_modules"] == [], f"Imported at startup: {result['heavy_modules']}"
+    print(f"✅ None of {', '.join(HEAVY_MODULES)} imported by app.main")
+
+
+def test_app_import_within_budget():
+    """A fresh import of app.main stays within the time and memory budget"""
+    result = measure_import("app.main")
+    assert result["seconds"] < IMPORT_TIME_BUDGET_SECONDS, f"Import took {result['seconds']:.2f}s"
+    if result["rss_mb"] is not None:
+        assert result["rss_mb"] < IMPORT_RSS_BUDGET_MB, f"Peak RSS {result['rss_mb']:.0f} MB"
+    print(f"✅ app.main imported in {result['seconds']:.2f}s, peak RSS {result['rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-v"]))